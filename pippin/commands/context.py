@@ -3,11 +3,13 @@ import sys
 import os
 from pippin.utils.executor import execute_command
 from pippin.utils.ui import get_ui_tree_hierarchical
-from pippin.commands.vision import simplify_node, screenshot_cmd
+from pippin.commands.vision import screenshot_cmd
+from pippin.utils.tree import walk, ScreenInfoVisitor, SimplifyVisitor
 from pippin.utils.state import get_last_bundle_id
 from pippin.utils.errors import fail, ERR_COMMAND_FAILED, EXIT_COMMAND_FAILED
 
 from pippin.utils.device import get_target_udid
+from pippin.utils.logs import read_buffer
 
 def get_device_info():
     """Get info about the booted simulator."""
@@ -57,68 +59,19 @@ def get_app_info():
 
 def analyze_screen(tree):
     """Extract high-level screen context from the UI tree."""
-    info = {
-        "title": None,
-        "breadcrumb": [],
-        "focused_element": None,
-        "alert": None,
-    }
-
-    def walk(node, depth=0):
-        role = node.get("role", "")
-        label = node.get("AXLabel", "")
-        identifier = node.get("AXIdentifier", "")
-        
-        # Breadcrumbs & Title from NavigationBar
-        if role == "NavigationBar":
-             # usually identifier is the title
-             if identifier:
-                 info["title"] = identifier
-             elif label:
-                 info["title"] = label
-             
-             # Look for children that might be back buttons
-             if "nodes" in node:
-                 for child in node["nodes"]:
-                     child_role = child.get("role", "")
-                     child_label = child.get("AXLabel", "")
-                     if child_role == "Button" and child_label:
-                         # Heuristic: Back buttons often are at the left or have specific labels
-                         # For now, just collecting buttons in navbar might be too noisy, 
-                         # but let's assume non-title buttons are nav mechanics
-                         if child_label not in [info["title"], "Edit", "Done", "Add"]:
-                              info["breadcrumb"].append(child_label)
-
-        # Alert detection
-        if role in ["Alert", "Sheet"]:
-            info["alert"] = {
-                "title": label,
-                "message": next((c.get("AXLabel") for c in node.get("nodes", []) if c.get("role") == "StaticText"), "")
-            }
-
-        # Focused element (keyboard connected)
-        # idb doesn't strictly give "focused" state easily in all versions, 
-        # but we can look for "has_keyboard_focus" if available or infer.
-        # For now, let's skip complex focus inference unless explicitly marked.
-        
-        if "nodes" in node:
-            for child in node["nodes"]:
-                walk(child, depth + 1)
-
+    analyzer = ScreenInfoVisitor()
     if isinstance(tree, list):
-        for node in tree:
-            walk(node)
-    
-    return info
+        walk(tree, [analyzer])
+    return analyzer.info
 
 def get_recent_logs(lines=20):
-    """Fetch the last N lines of system logs."""
-    # This is expensive and tricky to filter correctly without a predicate.
-    # For now, we'll try to get logs for the simulator, but filtering by app is hard 
-    # without a known pid.
-    # We will return null for now as per design to verify mechanics 
-    # or implement a simple log dump.
-    return None
+    """Return the last N buffered log lines, if a log collector is running."""
+    # Fetching logs on demand is too slow for a context snapshot, so this is
+    # only served from the background collector (`pippin logs --collect start`).
+    try:
+        return read_buffer(get_target_udid(), lines)
+    except (SystemExit, Exception):
+        return None
 
 def context_cmd(include_logs: bool = False, screenshot_path: str = None, brief: bool = False):
     result = {}
@@ -130,13 +83,17 @@ def context_cmd(include_logs: bool = False, screenshot_path: str = None, brief:
         # 2. App info
         result["app"] = get_app_info()
 
-        # 3. Screen analysis
+        # 3-4. Screen analysis and UI hierarchy, from one walk of the tree
         tree = get_ui_tree_hierarchical()
-        result["screen"] = analyze_screen(tree)
-
-        # 4. UI hierarchy
+        analyzer = ScreenInfoVisitor()
+        visitors = [analyzer]
+        if not brief:
+            simplifier = SimplifyVisitor()
+            visitors.append(simplifier)
+        walk(tree, visitors)
+        result["screen"] = analyzer.info
         if not brief:
-            result["ui"] = [s for n in tree if (s := simplify_node(n))]
+            result["ui"] = simplifier.results
         
         # 5. Optional logs
         if include_logs:
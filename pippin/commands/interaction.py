@@ -1,24 +1,57 @@
 import sys
 import time
 import json
-from pippin.utils.ui import get_ui_tree, find_element, get_center
+from pippin.utils.ui import get_ui_tree, find_element, match_element, get_center
 from pippin.utils import wda
+from pippin.utils.geometry import get_screen_size
+from pippin.utils.tree import walk, DigestVisitor
 from pippin.utils.errors import (
     fail, EXIT_ELEMENT_NOT_FOUND, EXIT_COMMAND_FAILED, EXIT_INVALID_ARGS,
-    ERR_ELEMENT_NOT_FOUND, ERR_COORDINATES_NOT_FOUND, ERR_COMMAND_FAILED, ERR_INVALID_ARGS
+    ERR_ELEMENT_NOT_FOUND, ERR_COORDINATES_NOT_FOUND, ERR_COMMAND_FAILED, ERR_INVALID_ARGS,
+    ERR_ELEMENT_OCCLUDED
 )
 
-def tap_cmd(query: str = None, x: int = None, y: int = None, strict: bool = False, scroll: bool = False):
+def _describe(el):
+    """Short {type, id, label, frame} summary of a raw element for JSON output."""
+    out = {"type": el.get("role", "Unknown")}
+    if el.get("AXIdentifier"):
+        out["id"] = el["AXIdentifier"]
+    if el.get("AXLabel"):
+        out["label"] = el["AXLabel"]
+    frame = el.get("frame")
+    if isinstance(frame, dict):
+        out["frame"] = f"{frame.get('x',0)},{frame.get('y',0)},{frame.get('width', frame.get('w', 0))},{frame.get('height', frame.get('h', 0))}"
+    return out
+
+def _check_occlusion(query, element, point, snapshot):
+    """Fails if another element would receive a tap aimed at element.
+
+    snapshot is the tree the element was matched in, so no extra fetch is
+    needed; handles (which skip the tree) have none and are not checked.
+    """
+    if not snapshot:
+        return
+    from pippin.utils.spatial import SpatialIndex
+    blocker = SpatialIndex(snapshot).occluder(element, point)
+    if blocker is not None:
+        blocked_by = _describe(blocker)
+        fail(ERR_ELEMENT_OCCLUDED,
+             f"Element '{query}' is covered by {json.dumps(blocked_by)}. Use --force to tap anyway.",
+             EXIT_COMMAND_FAILED)
+
+def tap_cmd(query: str = None, x: int = None, y: int = None, strict: bool = False, scroll: bool = False,
+            force: bool = False):
     target_x, target_y = x, y
-    
+    scrolled = None
+
     if query:
         # Try to find element by ID or Label
-        element = find_element(query, strict=strict)
+        element, snapshot = match_element(query, strict=strict, fuzzy=True)
         
         if not element and scroll:
             print(f"Element '{query}' not found, auto-scrolling to find it...", file=sys.stderr)
-            scroll_cmd("down", until_visible=query, silent=True)
-            element = find_element(query, strict=strict)
+            scrolled = scroll_cmd("down", until_visible=query, silent=True)
+            element, snapshot = match_element(query, strict=strict, fuzzy=True)
 
         if element:
             frame = element.get("frame")
@@ -32,120 +65,367 @@ def tap_cmd(query: str = None, x: int = None, y: int = None, strict: bool = Fals
                 try:
                     w = float(frame.get("width", frame.get("w", 0)))
                     if w == 0:
-                        # Find screen width from window or default
-                        screen_w = 375
-                        tree = get_ui_tree(silent=True)
-                        if tree:
-                            for el in tree:
-                                if el.get("role") == "Window":
-                                    f = el.get("frame", {})
-                                    screen_w = float(f.get("width", f.get("w", screen_w)))
-                                    break
+                        screen_w, _ = get_screen_size(tree=snapshot)
                         target_x = screen_w / 2
                         print(f"Tapping '{query}' (zero-width) at screen center {target_x}, {target_y}...", file=sys.stderr)
                     else:
                         print(f"Tapping '{query}' at {target_x}, {target_y}...", file=sys.stderr)
                 except (ValueError, TypeError):
                     print(f"Tapping '{query}' at {target_x}, {target_y}...", file=sys.stderr)
+                if not force:
+                    _check_occlusion(query, element, (target_x, target_y), snapshot)
             else:
                 fail(ERR_ELEMENT_NOT_FOUND, f"Element '{query}' found but has no frame.")
         elif x is None or y is None:
-             fail(ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found.", EXIT_ELEMENT_NOT_FOUND)
+             from pippin.utils.ui import suggest
+             hint = suggest(query, snapshot)
+             fail(ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found.{hint}", EXIT_ELEMENT_NOT_FOUND)
 
     # Fallback to coordinates if query failed or not provided
     if target_x is not None and target_y is not None:
         try:
             ix, iy = int(round(float(target_x))), int(round(float(target_y)))
             wda.tap(ix, iy)
-            print(json.dumps({"status": "success", "action": "tap", "target": f"{ix},{iy}"}))
+            result = {"status": "success", "action": "tap", "target": f"{ix},{iy}"}
+            if scrolled:
+                result["scroll_strategy"] = scrolled
+            print(json.dumps(result))
         except Exception as e:
             fail(ERR_COMMAND_FAILED, f"Tap failed: {e}")
     else:
         if not query and (x is None or y is None):
             fail(ERR_INVALID_ARGS, "Must provide query or coordinates.", EXIT_INVALID_ARGS)
 
-def type_cmd(text: str, submit: bool = False):
+TYPE_STRATEGIES = ("auto", "keys", "paste", "set-value")
+# Up to this many characters, key events are as fast as anything else
+AUTO_KEYS_MAX = 64
+LONG_PRESS_MS = 800
+
+def _focused_field():
+    """Returns (wda_id, type) of the element with keyboard focus."""
+    element_id = wda.active_element()
+    if not element_id:
+        raise Exception("No focused text field. Use --into to focus one.")
+    return element_id, (wda.element_attribute(element_id, "type") or "").replace("XCUIElementType", "")
+
+def _paste_text(text: str, element_id: str):
+    """Loads text into the simulator pasteboard and pastes it through the field's edit menu."""
+    from pippin.utils.device import get_target_udid
+    from pippin.utils.executor import execute_command
+    from pippin.utils.gestures import ActionChain
+
+    execute_command(["xcrun", "simctl", "pbcopy", get_target_udid()], input=text)
+    center = get_center(wda.element_rect(element_id))
+    if not center:
+        raise Exception("Could not locate the focused field.")
+    chain = ActionChain()
+    chain.pointer().move(*center).down().pause(LONG_PRESS_MS).up()
+    chain.perform()
+    time.sleep(0.5)  # Edit menu animation
+    for menu_id in wda.find_element_ids("accessibility id", "Paste"):
+        target = get_center(wda.element_rect(menu_id))
+        if target:
+            wda.tap(int(round(target[0])), int(round(target[1])))
+            return
+    raise Exception("The Paste menu did not appear.")
+
+def _pick_strategy(text: str, field_type: str) -> list:
+    """Strategies to try in order for auto: keys for short text, else paste then set-value."""
+    if len(text) <= AUTO_KEYS_MAX:
+        return ["keys"]
+    # Secure fields hide the edit menu
+    if field_type == "SecureTextField":
+        return ["set-value"]
+    return ["paste", "set-value"]
+
+def type_cmd(text: str, submit: bool = False, into: str = None, strategy: str = "auto"):
+    if strategy not in TYPE_STRATEGIES:
+        fail(ERR_INVALID_ARGS, f"Invalid strategy: {strategy}", EXIT_INVALID_ARGS)
+    if into:
+        # Focus the target field first
+        element = find_element(into, silent=True, fuzzy=True)
+        center = get_center(element.get("frame")) if element else None
+        if not center:
+            fail(ERR_ELEMENT_NOT_FOUND, f"Element '{into}' not found.", EXIT_ELEMENT_NOT_FOUND)
+        try:
+            wda.tap(int(round(center[0])), int(round(center[1])))
+            time.sleep(0.3)
+        except Exception as e:
+            fail(ERR_COMMAND_FAILED, f"Could not focus '{into}': {e}")
+
     try:
-        wda.type_text(text)
+        used, elapsed = _enter_text(text, strategy)
         if submit:
              wda.press_key("ENTER")
-        print(json.dumps({"status": "success", "action": "type", "text": text, "submit": submit}))
+        print(json.dumps({"status": "success", "action": "type", "text": text, "submit": submit,
+                          "strategy": used, "elapsed": round(elapsed, 3),
+                          "chars_per_sec": _rate(text, elapsed)}))
     except Exception as e:
         fail(ERR_COMMAND_FAILED, f"Type failed: {e}")
 
-def scroll_cmd(direction: str, until_visible: str = None, silent: bool = False):
-    # Try to get screen dimensions from inspect
-    tree = get_ui_tree(silent=True) # Silent to avoid polluting stdout on error
-    w, h = None, None
-    if tree:
-        for el in tree:
-            if el.get("role") == "Window":
-                f = el.get("frame", {})
-                if isinstance(f, dict):
-                    try:
-                        w = float(f.get("width", f.get("w", w or 375)))
-                        h = float(f.get("height", f.get("h", h or 812)))
-                    except (ValueError, TypeError):
-                        pass
-                if w and h:
-                    break
-    
-    # Fallback if no window found or dimensions missing
-    w = w or 375
-    h = h or 812
+def _rate(text, elapsed):
+    return round(len(text) / elapsed, 1) if elapsed > 0 else None
 
-    cx, cy = w / 2, h / 2
-    swipe_len = h * 0.4
+def _enter_text(text: str, strategy: str, element_id: str = None, field_type: str = None):
+    """Enters text into the focused field. Returns (strategy used, seconds taken).
 
-    start_x, start_y, end_x, end_y = cx, cy, cx, cy
+    element_id and field_type describe the focused field when the caller
+    already knows them; otherwise they are looked up if the strategy needs them.
+    """
+    # Short text goes out as keys straight away, without looking up the field
+    if element_id is None and strategy != "keys" and not (strategy == "auto" and len(text) <= AUTO_KEYS_MAX):
+        element_id, field_type = _focused_field()
+    candidates = _pick_strategy(text, field_type or "") if strategy == "auto" else [strategy]
+
+    started = time.monotonic()
+    for n, used in enumerate(candidates):
+        try:
+            if used == "keys":
+                wda.type_text(text)
+            elif used == "paste":
+                _paste_text(text, element_id)
+            else:
+                wda.set_element_value(element_id, text)
+            break
+        except Exception as e:
+            if n == len(candidates) - 1:
+                raise
+            print(f"WARN: {used} failed ({e}), trying {candidates[n + 1]}.", file=sys.stderr)
+    return used, time.monotonic() - started
+
+# A focused field whose frame is off by more than this has moved since the snapshot
+MOVE_TOLERANCE = 2
+
+def _moved(rect, frame) -> bool:
+    from pippin.utils.ui import get_rect
+    a, b = get_rect(rect), get_rect(frame)
+    if not a or not b:
+        return True
+    return any(abs(p - q) > MOVE_TOLERANCE for p, q in zip(a, b))
+
+def _focus(element):
+    """Taps element and returns the focused field's WDA id if the tap focused it, else None."""
+    center = get_center(element.get("frame"))
+    if not center:
+        return None
+    wda.tap(int(round(center[0])), int(round(center[1])))
+    time.sleep(0.3)
+    element_id = wda.active_element()
+    if element_id and not _moved(wda.element_rect(element_id), element.get("frame")):
+        return element_id
+    return None
+
+def fill_cmd(fields: str, submit: bool = False, strategy: str = "auto"):
+    """Fills several fields, given as a JSON object of {query: text}, from one snapshot.
+
+    Every field is resolved up front, so a missing one fails before anything
+    is typed. The tree is only fetched again when a tap does not focus the
+    expected field (e.g. the form scrolled when the keyboard came up).
+    """
+    try:
+        values = json.loads(fields)
+    except ValueError as e:
+        fail(ERR_INVALID_ARGS, f"Invalid JSON for fill: {e}", EXIT_INVALID_ARGS)
+    if not isinstance(values, dict) or not values:
+        fail(ERR_INVALID_ARGS, 'Expected a JSON object like {"Email": "a@b.c"}.', EXIT_INVALID_ARGS)
+    if strategy not in TYPE_STRATEGIES:
+        fail(ERR_INVALID_ARGS, f"Invalid strategy: {strategy}", EXIT_INVALID_ARGS)
+
+    def resolve_all(queries):
+        tree = get_ui_tree(silent=True)
+        resolved = {query: find_element(query, silent=True, elements=tree, fuzzy=True) for query in queries}
+        missing = [query for query, el in resolved.items() if el is None]
+        if missing:
+            fail(ERR_ELEMENT_NOT_FOUND, f"Field(s) not found: {', '.join(missing)}", EXIT_ELEMENT_NOT_FOUND)
+        return resolved
+
+    started = time.monotonic()
+    queries = list(values)
+    resolved = resolve_all(queries)
+
+    refetches = 0
+    report = []
+    try:
+        for index, (query, text) in enumerate(values.items()):
+            element_id = _focus(resolved[query])
+            if element_id is None:
+                # The field moved (or the tap missed it): re-resolve the rest from a fresh snapshot
+                refetches += 1
+                resolved = resolve_all(queries[index:])
+                element_id = _focus(resolved[query])
+                if element_id is None:
+                    fail(ERR_COMMAND_FAILED, f"Could not focus field '{query}'.")
+            field_type = (wda.element_attribute(element_id, "type") or "").replace("XCUIElementType", "")
+            used, elapsed = _enter_text(str(text), strategy, element_id, field_type)
+            report.append({"field": query, "strategy": used, "chars_per_sec": _rate(str(text), elapsed)})
 
+        if submit:
+            wda.press_key("ENTER")
+        elif not wda.dismiss_keyboard():
+            print("WARN: Could not dismiss the keyboard.", file=sys.stderr)
+    except Exception as e:
+        fail(ERR_COMMAND_FAILED, f"Fill failed: {e}")
+
+    print(json.dumps({"status": "success", "action": "fill", "fields": report, "submit": submit,
+                      "refetches": refetches, "elapsed": round(time.monotonic() - started, 3)}))
+
+# Adaptive scrolling: unknown targets start with a 40% swipe that grows
+# by SWIPE_GROWTH per miss, up to SWIPE_MAX of the screen.
+SWIPE_MIN = 0.4
+SWIPE_MAX = 0.7
+SWIPE_GROWTH = 1.5
+MAX_SWIPES = 10
+SCROLL_SETTLE = 0.6
+
+def _swipe_points(direction, w, h, length):
+    """Start and end points for a swipe of length points that scrolls content in direction."""
+    cx, cy = w / 2, h / 2
     if direction == "down":
-        start_y = cy + swipe_len / 2
-        end_y = cy - swipe_len / 2
-    elif direction == "up":
-        start_y = cy - swipe_len / 2
-        end_y = cy + swipe_len / 2
-    elif direction == "right":
-        start_x = cx + w * 0.3
-        end_x = cx - w * 0.3
-    elif direction == "left":
-        start_x = cx - w * 0.3
-        end_x = cx + w * 0.3
-    else:
-        fail(ERR_INVALID_ARGS, f"Invalid direction: {direction}", EXIT_INVALID_ARGS)
+        return cx, cy + length / 2, cx, cy - length / 2
+    if direction == "up":
+        return cx, cy - length / 2, cx, cy + length / 2
+    if direction == "right":
+        return cx + length / 2, cy, cx - length / 2, cy
+    if direction == "left":
+        return cx - length / 2, cy, cx + length / 2, cy
+    fail(ERR_INVALID_ARGS, f"Invalid direction: {direction}", EXIT_INVALID_ARGS)
+
+def _offscreen_target(query, tree):
+    """The element matching query among those WDA reports as not visible, if any."""
+    from pippin.utils.handles import is_handle
+    from pippin.utils.selectors import is_selector, select
+    if is_handle(query):
+        return None
+    if is_selector(query):
+        # Selectors need the ancestors, so match the whole snapshot
+        return next((el for el in select(tree, query) if el.get("visible") is False), None)
+    hidden = [dict(el, visible=True) for el in tree if el.get("visible") is False]
+    return find_element(query, silent=True, elements=hidden) if hidden else None
+
+def _distance_to(element, direction, w, h):
+    """Signed scroll distance (along direction) that brings element to mid-screen, or None."""
+    center = get_center(element.get("frame"))
+    if not center:
+        return None
+    if direction in ("down", "up"):
+        delta = center[1] - h / 2
+        return delta if direction == "down" else -delta
+    delta = center[0] - w / 2
+    return delta if direction == "right" else -delta
+
+def _native_scroll(query):
+    """Scrolls the target into view with WDA's own scroll-to-visible, without swiping.
+
+    Only accessibility ids and exact labels can be looked up this way; other
+    queries (handles, selectors) return False and are left to the swipe loop.
+    """
+    from pippin.utils.handles import is_handle
+    from pippin.utils.selectors import is_selector
+    if is_handle(query) or is_selector(query):
+        return False
+    role, value = None, query
+    if ":" in query and not query.startswith("http"):
+        role, value = query.split(":", 1)
+    ids = wda.find_element_ids("accessibility id", value)
+    if not ids:
+        escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+        predicate = f"label ==[c] '{escaped}'"
+        if role:
+            predicate = f"type ==[c] 'XCUIElementType{role}' AND {predicate}"
+        ids = wda.find_element_ids("predicate string", predicate)
+    # Several matches: the first one WDA manages to scroll to
+    return any(wda.scroll_to_visible(element_id) for element_id in ids[:3])
+
+def _snapshot_key(tree):
+    """Identifies a snapshot's content; equal keys mean the scroll did not move anything."""
+    digest = DigestVisitor()
+    walk(tree, [digest])
+    return digest.digest
+
+def scroll_cmd(direction: str, until_visible: str = None, silent: bool = False):
+    _swipe_points(direction, 0, 0, 0)  # Validates direction
+    w, h = get_screen_size(fetch_tree=lambda: get_ui_tree(silent=True))
+    extent = h if direction in ("down", "up") else w
 
-    def perform_scroll():
-        ixs, iys = int(round(start_x)), int(round(start_y))
-        ixe, iye = int(round(end_x)), int(round(end_y))
-        wda.swipe(ixs, iys, ixe, iye, 0.5)
+    def perform_scroll(towards, length, duration=0.5):
+        x1, y1, x2, y2 = _swipe_points(towards, w, h, length)
+        wda.swipe(int(round(x1)), int(round(y1)), int(round(x2)), int(round(y2)), duration)
 
     try:
         if until_visible:
-            max_retries = 10
-            # Check first before scrolling
-            if find_element(until_visible, silent=True):
-                 if not silent:
-                     print(json.dumps({"status": "success", "action": "scroll", "found": until_visible}))
-                 return
-
-            for i in range(max_retries):
-                # We can't easily print progress to stderr without confusing the model if it parses stderr.
-                # But typically we want to be silent until success or failure.
-                perform_scroll()
-                time.sleep(1.0) # Wait for animation
-                if find_element(until_visible, silent=True):
+            started = time.monotonic()
+            swipes = 0
+            length = extent * SWIPE_MIN
+            opposite = {"down": "up", "up": "down", "left": "right", "right": "left"}
+
+            def report():
+                return {"strategy": strategy, "swipes": swipes, "elapsed": round(time.monotonic() - started, 2)}
+
+            tree = get_ui_tree(silent=True)
+            strategy = "none"
+            # WDA can often scroll straight to an offscreen element in one request
+            if not find_element(until_visible, silent=True, elements=tree) and _native_scroll(until_visible):
+                strategy = "native"
+                tree = get_ui_tree(silent=True)
+            while True:
+                if find_element(until_visible, silent=True, elements=tree):
                     if not silent:
-                        print(json.dumps({"status": "success", "action": "scroll", "found": until_visible}))
-                    return
-            
-            fail(ERR_ELEMENT_NOT_FOUND, f"Element '{until_visible}' not found after scrolling.", EXIT_ELEMENT_NOT_FOUND)
+                        print(json.dumps({"status": "success", "action": "scroll", "found": until_visible,
+                                          **report()}))
+                    return strategy
+                strategy = "swipe"
+                if swipes >= MAX_SWIPES:
+                    break
+
+                # A target already in the tree but offscreen: scroll exactly as far as needed
+                target = _offscreen_target(until_visible, tree)
+                distance = _distance_to(target, direction, w, h) if target else None
+                if distance is not None and abs(distance) >= extent * 0.1:
+                    towards = direction if distance > 0 else opposite[direction]
+                    # Slower swipes keep the content from coasting past the target
+                    perform_scroll(towards, min(abs(distance), extent * SWIPE_MAX), duration=1.0)
+                else:
+                    perform_scroll(direction, length)
+                    length = min(length * SWIPE_GROWTH, extent * SWIPE_MAX)
+                swipes += 1
+                time.sleep(SCROLL_SETTLE)
+
+                previous, tree = tree, get_ui_tree(silent=True)
+                if tree and previous and _snapshot_key(tree) == _snapshot_key(previous):
+                    fail(ERR_ELEMENT_NOT_FOUND,
+                         f"Element '{until_visible}' not found: reached the end of the content after "
+                         f"{swipes} swipe(s) in {report()['elapsed']}s.", EXIT_ELEMENT_NOT_FOUND)
+
+            fail(ERR_ELEMENT_NOT_FOUND,
+                 f"Element '{until_visible}' not found after {swipes} swipe(s) in {report()['elapsed']}s.",
+                 EXIT_ELEMENT_NOT_FOUND)
         else:
-            perform_scroll()
+            perform_scroll(direction, extent * SWIPE_MIN if direction in ("down", "up") else extent * 0.6)
             if not silent:
                 print(json.dumps({"status": "success", "action": "scroll", "direction": direction}))
     except Exception as e:
          fail(ERR_COMMAND_FAILED, f"Scroll failed: {e}")
 
+def at_cmd(x: float, y: float, limit: int = 5):
+    """Reports which element would receive a tap at a point, and what lies beneath it."""
+    from pippin.utils.spatial import SpatialIndex, takes_touches
+
+    tree = get_ui_tree(silent=True)
+    if not tree:
+        fail(ERR_COMMAND_FAILED, "Could not fetch the UI tree.")
+    stack = SpatialIndex(tree).at(x, y)
+    # The tap goes to the topmost element that takes touches, else the topmost element
+    receiver = next((el for el in stack if takes_touches(el)), None)
+    if receiver is None and stack:
+        receiver = stack[0]
+    print(json.dumps({
+        "status": "success",
+        "action": "at",
+        "point": f"{x:g},{y:g}",
+        "hit": _describe(receiver) if receiver else None,
+        "stack": [_describe(el) for el in stack[:limit]],
+    }))
+
 def gesture_cmd(gesture_type: str, args: list):
     if gesture_type == "swipe":
         # Expect 4 numbers and optional duration. 
@@ -171,7 +451,37 @@ def gesture_cmd(gesture_type: str, args: list):
         except Exception as e:
             fail(ERR_COMMAND_FAILED, f"Swipe failed: {e}")
 
-    elif gesture_type == "pinch":
-         fail(ERR_COMMAND_FAILED, "Pinch gesture not implemented.", EXIT_COMMAND_FAILED)
+    elif gesture_type in ("pinch", "rotate", "chain"):
+        from pippin.utils import gestures
+
+        try:
+            if gesture_type == "chain":
+                chain = gestures.parse_spec(" ".join(args))
+                details = {"pointers": len(chain.pointers)}
+            else:
+                flat_args = []
+                for arg in args:
+                    flat_args.extend(arg.replace(',', ' ').split())
+                if len(flat_args) not in (3, 4):
+                    amount = "scale" if gesture_type == "pinch" else "degrees"
+                    fail(ERR_INVALID_ARGS, f"Usage: gesture {gesture_type} center_x,center_y {amount} [duration]",
+                         EXIT_INVALID_ARGS)
+                cx, cy, amount = (float(v) for v in flat_args[:3])
+                duration_ms = int(float(flat_args[3]) * 1000) if len(flat_args) == 4 else 500
+                if gesture_type == "pinch":
+                    chain = gestures.pinch(cx, cy, amount, duration_ms)
+                    details = {"center": f"{cx:g},{cy:g}", "scale": amount}
+                else:
+                    chain = gestures.rotate(cx, cy, amount, duration_ms)
+                    details = {"center": f"{cx:g},{cy:g}", "degrees": amount}
+        except ValueError as e:
+            fail(ERR_INVALID_ARGS, f"Invalid {gesture_type} gesture: {e}", EXIT_INVALID_ARGS)
+
+        try:
+            chain.perform()
+            print(json.dumps({"status": "success", "action": "gesture", "type": gesture_type, **details,
+                              "duration_ms": chain.duration_ms()}))
+        except Exception as e:
+            fail(ERR_COMMAND_FAILED, f"{gesture_type.capitalize()} failed: {e}")
     else:
          fail(ERR_INVALID_ARGS, f"Unknown gesture: {gesture_type}", EXIT_INVALID_ARGS)
@@ -0,0 +1,38 @@
+import json
+from pippin.utils.errors import (
+    fail, EXIT_INVALID_ARGS, EXIT_TIMEOUT,
+    ERR_INVALID_ARGS, ERR_COMMAND_FAILED, ERR_TIMEOUT
+)
+from pippin.utils import pool
+
+def pool_cmd(action: str, golden: str = None, size: int = None, isolated: bool = False,
+             udid: str = None, reset: bool = True, wait: float = 0):
+    try:
+        if action == "create":
+            if not golden or not size or size < 1:
+                fail(ERR_INVALID_ARGS, "pool create requires --golden <udid> and --size N.", EXIT_INVALID_ARGS)
+            created = pool.create_pool(golden, size, isolated=isolated)
+            print(json.dumps({"status": "success", "action": "pool_create",
+                              "device_set": created["device_set"],
+                              "devices": [{"udid": d["udid"], "port": d["port"]} for d in created["devices"]]}))
+        elif action == "lease":
+            lease = pool.lease_device(timeout=wait)
+            if lease is None:
+                fail(ERR_TIMEOUT, "No free device in the pool.", EXIT_TIMEOUT)
+            print(json.dumps({"status": "success", "action": "pool_lease", **lease}))
+        elif action == "return":
+            if not udid:
+                fail(ERR_INVALID_ARGS, "pool return requires the leased udid.", EXIT_INVALID_ARGS)
+            device = pool.return_device(udid, reset=reset)
+            print(json.dumps({"status": "success", "action": "pool_return", "returned": udid,
+                              "reset": reset, "udid": device["udid"]}))
+        elif action == "status":
+            state = pool.load_pool()
+            print(json.dumps({"status": "success", "action": "pool_status", "golden": state["golden"],
+                              "device_set": state["device_set"], "devices": state["devices"]}))
+        elif action == "destroy":
+            print(json.dumps({"status": "success", "action": "pool_destroy", "deleted": pool.destroy_pool()}))
+    except ValueError as e:
+        fail(ERR_INVALID_ARGS, str(e), EXIT_INVALID_ARGS)
+    except Exception as e:
+        fail(ERR_COMMAND_FAILED, f"pool {action} failed: {e}")
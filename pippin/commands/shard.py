@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+from pippin.utils.errors import (
+    fail, EXIT_INVALID_ARGS, EXIT_COMMAND_FAILED, EXIT_TIMEOUT,
+    ERR_INVALID_ARGS, ERR_COMMAND_FAILED, ERR_TIMEOUT
+)
+from pippin.utils import shard
+from pippin.utils import pool
+
+def shard_cmd(directory: str, devices: str = None, pool_size: int = None,
+              summary_path: str = "shard_summary.json", step_timeout: float = 120):
+    if not os.path.isdir(directory):
+        fail(ERR_INVALID_ARGS, f"Not a directory: {directory}", EXIT_INVALID_ARGS)
+    if not devices and not pool_size:
+        fail(ERR_INVALID_ARGS, "Provide --devices <udid,...> or --pool N.", EXIT_INVALID_ARGS)
+
+    scenarios = shard.load_scenarios(directory)
+    if not scenarios:
+        fail(ERR_INVALID_ARGS, f"No scripts ({', '.join(shard.SCRIPT_EXTENSIONS)}) in {directory}.", EXIT_INVALID_ARGS)
+    scenarios = shard.order_longest_first(scenarios, shard.load_history(summary_path))
+
+    leased = []
+    if devices:
+        udids = [d.strip() for d in devices.split(",") if d.strip()]
+    else:
+        try:
+            for _ in range(min(pool_size, len(scenarios))):
+                lease = pool.lease_device(owner="shard")
+                if lease is None:
+                    break
+                leased.append(lease["udid"])
+        except ValueError as e:
+            fail(ERR_INVALID_ARGS, str(e), EXIT_INVALID_ARGS)
+        if not leased:
+            fail(ERR_TIMEOUT, "No free device in the pool.", EXIT_TIMEOUT)
+        udids = leased
+
+    def emit(result):
+        # One JSON line per scenario, as soon as it finishes
+        print(json.dumps(result), flush=True)
+
+    try:
+        summary = shard.run_shards(scenarios, udids, on_result=emit, step_timeout=step_timeout)
+    finally:
+        for udid in leased:
+            try:
+                pool.return_device(udid)
+            except Exception as e:
+                print(f"WARN: Could not return {udid} to the pool: {e}", file=sys.stderr)
+
+    try:
+        with open(summary_path, "w") as f:
+            json.dump(summary, f, indent=2)
+    except IOError as e:
+        print(f"WARN: Could not write summary: {e}", file=sys.stderr)
+
+    del summary["durations"]
+    print(json.dumps({"status": "success" if not summary["failed"] else "failed",
+                      "action": "shard", "summary_file": summary_path, **summary}))
+    if summary["failed"]:
+        fail(ERR_COMMAND_FAILED, f"{len(summary['failed'])} scenario(s) failed.", EXIT_COMMAND_FAILED)
@@ -5,10 +5,13 @@ import json
 from pippin.utils.executor import execute_command
 from pippin.utils.errors import (
     fail, EXIT_COMMAND_FAILED, EXIT_APP_NOT_RUNNING, EXIT_INVALID_ARGS,
-    ERR_NO_TARGET_APP, ERR_COMMAND_FAILED
+    ERR_NO_TARGET_APP, ERR_COMMAND_FAILED, ERR_INVALID_ARGS
 )
 from pippin.utils.device import get_simctl_target
 from pippin.utils.state import get_last_bundle_id, set_last_bundle_id
+from pippin.utils.checkpoint import (
+    EMPTY, save_checkpoint, restore_checkpoint, list_checkpoints, delete_checkpoint
+)
 
 def _get_app_container(bundle_id):
     try:
@@ -18,7 +21,7 @@ def _get_app_container(bundle_id):
         print(f"WARN: Error getting app container for {bundle_id}: {e}", file=sys.stderr)
         return None
 
-def launch_cmd(bundle_id: str, clean: bool = False, args: str = None, locale: str = None):
+def launch_cmd(bundle_id: str, clean: bool = False, args: str = None, locale: str = None, checkpoint: str = None):
     if not bundle_id:
         bundle_id = get_last_bundle_id()
     
@@ -27,16 +30,20 @@ def launch_cmd(bundle_id: str, clean: bool = False, args: str = None, locale: st
 
     udid = get_simctl_target()
 
-    if clean:
-        print(f"Terminating and cleaning {bundle_id}...", file=sys.stderr)
+    # --clean is just the built-in empty checkpoint
+    if clean and not checkpoint:
+        checkpoint = EMPTY
+    if checkpoint:
+        print(f"Terminating {bundle_id} and restoring checkpoint '{checkpoint}'...", file=sys.stderr)
+        execute_command(["xcrun", "simctl", "terminate", udid, bundle_id], check=False)
+        container = _get_app_container(bundle_id)
+        # Launching on top of a missing or half-restored container is what --checkpoint is meant to prevent
+        if not container:
+            fail(ERR_COMMAND_FAILED, f"Could not find the data container of {bundle_id} to restore checkpoint '{checkpoint}'.")
         try:
-            execute_command(["xcrun", "simctl", "terminate", udid, bundle_id], check=False)
-            container = _get_app_container(bundle_id)
-            if container:
-                # Remove contents. Quote container path to be safe.
-                execute_command(["sh", "-c", f"rm -rf \"{container}\"/*"])
+            restore_checkpoint(udid, bundle_id, container, checkpoint)
         except Exception as e:
-            print(f"WARN: Error cleaning app: {e}", file=sys.stderr)
+            fail(ERR_COMMAND_FAILED, f"Error restoring checkpoint '{checkpoint}': {e}")
 
     cmd = ["xcrun", "simctl", "launch", udid, bundle_id]
     if locale:
@@ -70,7 +77,7 @@ def stop_cmd(bundle_id: str = None):
     except Exception as e:
         fail(ERR_COMMAND_FAILED, f"Error stopping app: {e}")
 
-def relaunch_cmd(bundle_id: str = None, clean: bool = False, args: str = None, locale: str = None):
+def relaunch_cmd(bundle_id: str = None, clean: bool = False, args: str = None, locale: str = None, checkpoint: str = None):
     # Relaunch reuses stop and launch, which handle their own errors/output.
     # To avoid double JSON output, we might want to silence them or just let them be.
     # For now, let's just use them as is, but we need to resolve bundle_id first to pass it consistently.
@@ -89,7 +96,45 @@ def relaunch_cmd(bundle_id: str = None, clean: bool = False, args: str = None, l
     except Exception:
         pass
         
-    launch_cmd(bundle_id, clean=clean, args=args, locale=locale)
+    launch_cmd(bundle_id, clean=clean, args=args, locale=locale, checkpoint=checkpoint)
+
+def checkpoint_cmd(action: str, name: str = None, bundle_id: str = None):
+    if not bundle_id:
+        bundle_id = get_last_bundle_id()
+
+    if not bundle_id:
+        fail(ERR_NO_TARGET_APP, "Could not determine target app. Run 'pippin launch' first or provide a bundle ID.", EXIT_INVALID_ARGS)
+
+    if action != "list" and not name:
+        fail(ERR_INVALID_ARGS, f"checkpoint {action} requires a NAME.", EXIT_INVALID_ARGS)
+
+    udid = get_simctl_target()
+    try:
+        if action == "list":
+            print(json.dumps({"status": "success", "action": "checkpoint", "bundle_id": bundle_id,
+                              "checkpoints": list_checkpoints(udid, bundle_id)}))
+            return
+        if action == "delete":
+            deleted = delete_checkpoint(udid, bundle_id, name)
+            print(json.dumps({"status": "success", "action": "checkpoint", "deleted": deleted, "name": name}))
+            return
+
+        container = _get_app_container(bundle_id)
+        if not container:
+            fail(ERR_COMMAND_FAILED, "Could not find app container.")
+
+        # The app must not be writing to its container while it is copied
+        execute_command(["xcrun", "simctl", "terminate", udid, bundle_id], check=False)
+        if action == "save":
+            result = save_checkpoint(udid, bundle_id, container, name)
+        else:
+            result = restore_checkpoint(udid, bundle_id, container, name)
+        print(json.dumps({"status": "success", "action": "checkpoint", "operation": action,
+                          "bundle_id": bundle_id, **result}))
+    except ValueError as e:
+        fail(ERR_INVALID_ARGS, str(e), EXIT_INVALID_ARGS)
+    except Exception as e:
+        fail(ERR_COMMAND_FAILED, f"Checkpoint {action} failed: {e}")
 
 def open_cmd(url: str):
     try:
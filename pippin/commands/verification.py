@@ -2,14 +2,22 @@ import sys
 import os
 import time
 import json
-from pippin.utils.executor import execute_command
-from pippin.utils.ui import find_element
+from pippin.utils.executor import execute_command, stream_command
+from pippin.utils.ui import find_element, match_element
 from pippin.utils.errors import (
     fail, EXIT_SUCCESS, EXIT_TIMEOUT, EXIT_ELEMENT_NOT_FOUND, EXIT_COMMAND_FAILED,
     ERR_TIMEOUT, ERR_ELEMENT_NOT_FOUND, ERR_TEXT_MISMATCH, ERR_NO_TARGET_APP, ERR_COMMAND_FAILED
 )
 
 from pippin.utils.state import get_last_bundle_id
+from pippin.utils.device import get_simctl_target, get_app_container
+from pippin.utils.sandbox import walk, fingerprints, diff_fingerprints, load_snapshot, save_snapshot
+from pippin.utils.crash import latest_crash, crash_details
+from pippin.utils.logs import (
+    read_buffer, start_collector, stop_collector, collector_pid,
+    get_app_pid, get_log_cursor, set_log_cursor, log_show_command, new_entries, summarize_logs,
+    filter_level
+)
 
 def wait_cmd(query: str, timeout: float = 10.0, state: str = "visible", strict: bool = False, scroll: bool = False):
     """Waits for an element to reach a certain state."""
@@ -17,8 +25,9 @@ def wait_cmd(query: str, timeout: float = 10.0, state: str = "visible", strict:
     from pippin.utils.ui import is_onscreen
     from pippin.commands.interaction import scroll_cmd
 
+    snapshot = None
     while time.time() - start_time < timeout:
-        el = find_element(query, silent=True, strict=strict)
+        el, snapshot = match_element(query, silent=True, strict=strict)
         if state == "visible":
             if el and is_onscreen(el):
                 print(json.dumps({"status": "success", "action": "wait", "query": query, "state": state}))
@@ -35,107 +44,208 @@ def wait_cmd(query: str, timeout: float = 10.0, state: str = "visible", strict:
                 return
         time.sleep(0.5)
     
-    fail(ERR_TIMEOUT, f"Timeout waiting {timeout}s for '{query}' to be {state}.", EXIT_TIMEOUT)
+    hint = ""
+    if state != "hidden":
+        from pippin.utils.ui import suggest
+        hint = suggest(query, snapshot)
+    fail(ERR_TIMEOUT, f"Timeout waiting {timeout}s for '{query}' to be {state}.{hint}", EXIT_TIMEOUT)
 
-def assert_cmd(query: str, state: str, strict: bool = False):
+ASSERT_STATES = ("exists", "visible", "hidden")
+
+def _valid_state(state) -> bool:
+    return isinstance(state, str) and (state in ASSERT_STATES or state.startswith("text="))
+
+def _evaluate(el, query: str, state: str):
+    """Checks one assertion against a matched element (or None).
+
+    Returns None if it holds, else (error_code, message, exit_code).
+    """
     from pippin.utils.ui import is_onscreen
-    el = find_element(query, strict=strict)
 
     if state == "exists":
-        if el:
-            print(json.dumps({"status": "success", "action": "assert", "query": query, "state": state}))
-        else:
-            fail(ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found.", EXIT_ELEMENT_NOT_FOUND)
-
+        if not el:
+            return ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found.", EXIT_ELEMENT_NOT_FOUND
     elif state == "visible":
-        if el and is_onscreen(el):
-            print(json.dumps({"status": "success", "action": "assert", "query": query, "state": state}))
-        else:
-            fail(ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found or not visible on screen.", EXIT_ELEMENT_NOT_FOUND)
-
+        if not (el and is_onscreen(el)):
+            return ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found or not visible on screen.", EXIT_ELEMENT_NOT_FOUND
     elif state == "hidden":
-        if not el or not is_onscreen(el):
-            print(json.dumps({"status": "success", "action": "assert", "query": query, "state": state}))
-        else:
+        if el and is_onscreen(el):
             # Using EXIT_ELEMENT_NOT_FOUND semantics loosely here, or just generic failure
-            fail("ERR_ELEMENT_EXISTS", f"Element '{query}' found and visible (expected hidden).", EXIT_COMMAND_FAILED)
-
+            return "ERR_ELEMENT_EXISTS", f"Element '{query}' found and visible (expected hidden).", EXIT_COMMAND_FAILED
     elif state.startswith("text="):
         expected_text = state.split("=", 1)[1]
         if not el:
-             fail(ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found.", EXIT_ELEMENT_NOT_FOUND)
-
+            return ERR_ELEMENT_NOT_FOUND, f"Element '{query}' not found.", EXIT_ELEMENT_NOT_FOUND
         actual_text = el.get("AXValue") or el.get("AXLabel") or ""
-        if str(actual_text) == expected_text:
-             print(json.dumps({"status": "success", "action": "assert", "query": query, "state": state}))
-        else:
-             fail(ERR_TEXT_MISMATCH, f"Element found but text was '{actual_text}', expected '{expected_text}'", EXIT_COMMAND_FAILED)
+        if str(actual_text) != expected_text:
+            return ERR_TEXT_MISMATCH, f"Element found but text was '{actual_text}', expected '{expected_text}'", EXIT_COMMAND_FAILED
     else:
-        fail("ERR_INVALID_ARGS", f"Unknown state: {state}", EXIT_COMMAND_FAILED)
+        return "ERR_INVALID_ARGS", f"Unknown state: {state}", EXIT_COMMAND_FAILED
+    return None
+
+def _lookup(query: str, state: str, strict: bool = False, elements=None):
+    from pippin.utils.handles import is_handle, resolve_handle
+    if is_handle(query) and state.startswith("text="):
+        return resolve_handle(query, silent=elements is not None, with_value=True)
+    return find_element(query, silent=elements is not None, strict=strict, elements=elements)
+
+def assert_cmd(query: str, state: str, strict: bool = False):
+    el = _lookup(query, state, strict=strict)
+    failure = _evaluate(el, query, state)
+    if failure:
+        fail(*failure)
+    print(json.dumps({"status": "success", "action": "assert", "query": query, "state": state}))
+
+def _load_checks(path: str) -> list:
+    """Reads checks from a JSON file (or stdin for "-").
+
+    Accepts a list of {"query", "state"[, "strict"]} objects, or an object
+    mapping each query to a state (or a list of states).
+    """
+    if path == "-":
+        data = json.load(sys.stdin)
+    else:
+        with open(path, "r") as f:
+            data = json.load(f)
+    if isinstance(data, dict):
+        data = [{"query": query, "state": state}
+                for query, states in data.items()
+                for state in (states if isinstance(states, list) else [states])]
+    if not isinstance(data, list):
+        raise ValueError("expected a list of checks or an object of query: state")
+    for check in data:
+        if not isinstance(check, dict) or not check.get("query") or not check.get("state"):
+            raise ValueError(f"each check needs a query and a state: {json.dumps(check)}")
+        if not _valid_state(check["state"]):
+            raise ValueError(f"unknown state '{check['state']}' for '{check['query']}' "
+                             f"(use {', '.join(ASSERT_STATES)} or text=...)")
+    return data
+
+def assert_file_cmd(path: str, strict: bool = False):
+    """Evaluates a batch of assertions against a single UI snapshot."""
+    from pippin.utils.ui import get_ui_tree
 
-def logs_cmd(crash_report: bool = False):
+    try:
+        checks = _load_checks(path)
+    except (IOError, ValueError) as e:
+        fail("ERR_INVALID_ARGS", f"Could not read checks from {path}: {e}", EXIT_COMMAND_FAILED)
+
+    tree = get_ui_tree(silent=True)
+    if not tree:
+        fail(ERR_COMMAND_FAILED, "Could not fetch the UI tree.")
+
+    results = []
+    for check in checks:
+        query, state = check["query"], check["state"]
+        el = _lookup(query, state, strict=check.get("strict", strict), elements=tree)
+        failure = _evaluate(el, query, state)
+        result = {"query": query, "state": state, "passed": failure is None}
+        if failure:
+            result["error"], result["message"] = failure[0], failure[1]
+        results.append(result)
+
+    failed = sum(1 for r in results if not r["passed"])
+    print(json.dumps({"status": "failed" if failed else "success", "action": "assert",
+                      "passed": len(results) - failed, "failed": failed, "checks": results}))
+    if failed:
+        fail("ERR_ASSERTION_FAILED", f"{failed} of {len(results)} check(s) failed.", EXIT_COMMAND_FAILED)
+
+def logs_cmd(crash_report: bool = False, collect: str = None, lines: int = None, full: bool = False,
+             raw: bool = False, level: str = None, max_lines: int = 100, max_tokens: int = None):
     bundle_id = None
     bundle_id = get_last_bundle_id()
 
+    # Stopping or checking a collector only needs its pid file
+    if collect in ("stop", "status"):
+        _collector_cmd(collect, bundle_id)
+        return
+
     if not bundle_id:
         fail(ERR_NO_TARGET_APP, "Could not determine target app. Run 'pippin launch' first.", EXIT_COMMAND_FAILED)
 
+    if collect:
+        _collector_cmd(collect, bundle_id)
+        return
+
     if crash_report:
-        # Crash logs on macOS for simulators are typically in ~/Library/Logs/DiagnosticReports
-        # and named like "AppName-YYYY-MM-DD-HHMMSS.ips"
-        # Since we are in a simulator, they might also be inside the simulator's own diagnostic path.
-        search_paths = [
-            os.path.expanduser("~/Library/Logs/DiagnosticReports"),
-        ]
-        
-        # Try to find the most recent .ips file containing the bundle_id or app name
-        # For simplicity, we'll look for files matching the bundle_id (often part of the process name)
-        # and sort by modification time.
-        found_report = None
-        latest_time = 0
-        
-        # bundle_id usually looks like 'com.company.AppName', we want 'AppName'
-        app_name = bundle_id.split(".")[-1]
-
-        for path in search_paths:
-            if not os.path.exists(path):
-                continue
-            for f in os.listdir(path):
-                if f.endswith(".ips") and app_name in f:
-                    full_path = os.path.join(path, f)
-                    mtime = os.path.getmtime(full_path)
-                    if mtime > latest_time:
-                        latest_time = mtime
-                        found_report = full_path
-
-        if found_report:
+        # Simulator app crashes land in ~/Library/Logs/DiagnosticReports as .ips
+        # files. The crash index only reads each report's one-line JSON header.
+        found = latest_crash(bundle_id)
+        if not found:
+            print("NO_CRASH_REPORT_FOUND")
+            return
+
+        found_report, info = found
+        print(f"CRASH_REPORT_FOUND: {found_report}")
+        if info.get("timestamp"):
+            print(f"Timestamp: {info['timestamp']}")
+        try:
+            details = crash_details(found_report)
+        except (IOError, ValueError):
+            details = None
+
+        print("--- STACK TRACE ---")
+        if details and details.get("frames"):
+            if details.get("exception"):
+                print(f"Exception: {details['exception']}")
+            if details.get("thread"):
+                print(f"Crashed thread: {details['thread']}")
+            print("\n".join(details["frames"]))
+        else:
+            # Not a JSON report body; fall back to the first lines of the file
             try:
                 with open(found_report, "r") as rf:
-                    # IPS files are JSON-like but often contain a header. 
-                    # We'll just output the first 100 lines for the LLM.
-                    content = rf.readlines()
-                    # Output JSON wrapper? Or just raw text since logs are unstructured?
-                    # Let's keep it raw for logs/crash reports as they are large.
-                    print(f"CRASH_REPORT_FOUND: {found_report}")
-                    print("--- STACK TRACE ---")
-                    print("".join(content[:100]))
+                    print("".join(line for _, line in zip(range(100), rf)))
             except Exception as e:
                 fail(ERR_COMMAND_FAILED, f"Error reading crash log: {e}")
-        else:
-            print("NO_CRASH_REPORT_FOUND")
         return
 
-    # Use 'subsystem' as a proxy for bundle_id filtering, or just dump recent logs
-    cmd = ["xcrun", "simctl", "spawn", "booted", "log", "show", "--style", "compact", "--predicate", f"subsystem == \"{bundle_id}\"", "--last", "5m"]
+    udid = get_simctl_target()
+
+    # A running collector has already buffered everything we need; otherwise
+    # only ask for entries newer than the stored cursor.
+    streamed = {}
+    source = read_buffer(udid, lines)
+    if source is None:
+        cursor = None if full else get_log_cursor(udid, bundle_id)
+        pid = get_app_pid(udid, bundle_id)
+        cmd = log_show_command(udid, bundle_id, pid=pid, cursor=cursor)
+        source = new_entries(stream_command(cmd), cursor, streamed)
 
     try:
-        # Print logs to stdout
-        output = execute_command(cmd, capture_output=True)
-        print(output)
+        last_seen = {}
+        if raw:
+            for line in filter_level(source, level):
+                print(line)
+            last_seen = streamed
+        else:
+            summary = summarize_logs(source, min_level=level, max_entries=max_lines, max_tokens=max_tokens,
+                                     last_seen=last_seen)
+            summary["truncated"] = summary["dropped"] > 0
+            print(json.dumps({"status": "success", "action": "logs", "bundle_id": bundle_id, **summary}, indent=2))
+        # Entries dropped from the summary stay after the cursor for the next call
+        if streamed and last_seen:
+            set_log_cursor(udid, bundle_id, last_seen["timestamp"])
     except Exception as e:
         fail(ERR_COMMAND_FAILED, f"Error fetching logs: {e}")
 
-def tree_cmd(directory: str):
+def _collector_cmd(collect: str, bundle_id: str):
+    udid = get_simctl_target()
+    try:
+        if collect == "start":
+            pid = start_collector(udid, bundle_id)
+            print(json.dumps({"status": "success", "action": "logs", "collector": "running", "pid": pid, "bundle_id": bundle_id}))
+        elif collect == "stop":
+            was_running = stop_collector(udid)
+            print(json.dumps({"status": "success", "action": "logs", "collector": "stopped", "was_running": was_running}))
+        else:
+            pid = collector_pid(udid)
+            print(json.dumps({"status": "success", "action": "logs", "collector": "running" if pid else "stopped", "pid": pid}))
+    except Exception as e:
+        fail(ERR_COMMAND_FAILED, f"Log collector failed: {e}")
+
+def tree_cmd(directory: str, depth: int = None, max_entries: int = None, pattern: str = None,
+             as_json: bool = False, since_last: bool = False):
     bundle_id = None
     bundle_id = get_last_bundle_id()
 
@@ -153,7 +263,7 @@ def tree_cmd(directory: str):
         subpath = directory
 
     try:
-        container = execute_command(["xcrun", "simctl", "get_app_container", "booted", bundle_id, "data"])
+        container = get_app_container(bundle_id)
         if not container:
              fail(ERR_COMMAND_FAILED, "Could not find app container.")
 
@@ -162,9 +272,35 @@ def tree_cmd(directory: str):
         if not os.path.exists(target_path):
              fail(ERR_COMMAND_FAILED, f"Directory {target_path} does not exist.")
 
-        # List files using ls -R to be tree-like
-        output = execute_command(["ls", "-R", target_path])
-        print(output)
+        if since_last:
+            # Diffs need the complete listing, so the entry limit only caps the output
+            entries, _ = walk(target_path, max_depth=depth, pattern=pattern)
+            udid = get_simctl_target()
+            key = f"{bundle_id}:{subpath}:{depth}:{pattern}"
+            current = fingerprints(entries)
+            previous = load_snapshot(udid, key)
+            save_snapshot(udid, key, current)
+            changes = diff_fingerprints(previous or {}, current)
+            if max_entries is not None:
+                changes = {k: v[:max_entries] for k, v in changes.items()}
+            result = {"status": "success", "action": "tree", "path": target_path,
+                      "baseline": previous is not None, **changes}
+            if as_json:
+                print(json.dumps(result, indent=2))
+            else:
+                for sign, kind in (("+", "added"), ("-", "removed"), ("~", "changed")):
+                    for path in changes[kind]:
+                        print(f"{sign} {path}")
+            return
+
+        entries, truncated = walk(target_path, max_depth=depth, max_entries=max_entries, pattern=pattern)
+        if as_json:
+            print(json.dumps({"status": "success", "action": "tree", "path": target_path,
+                              "entries": entries, "truncated": truncated}, indent=2))
+        else:
+            print("\n".join(e["path"] for e in entries))
+            if truncated:
+                print(f"... truncated after {max_entries} entries")
 
     except Exception as e:
         fail(ERR_COMMAND_FAILED, f"Error listing files: {e}")
@@ -1,213 +1,204 @@
 import json
+import math
 import sys
 from pippin.utils.executor import execute_command
-from pippin.utils.ui import get_ui_tree
-from pippin.utils.errors import fail, ERR_COMMAND_FAILED
-
-def simplify_node(node, interactive_only=False, depth=None, current_depth=0, include_hidden=False):
-    """Recursively simplify a node, keeping children nested."""
-    if depth is not None and current_depth > depth:
-        return None
-
-    role = node.get("role", "Unknown")
-    label = node.get("AXLabel", "")
-    identifier = node.get("AXIdentifier", "")
-    value = node.get("AXValue", "")
-    frame = node.get("frame", {})
-
-    children = []
-    for child in node.get("nodes", []):
-        simplified = simplify_node(child, interactive_only, depth, current_depth + 1, include_hidden)
-        if simplified:
-            children.append(simplified)
-
-    # Prune non-visible leaf nodes unless include_hidden is set
-    if not include_hidden and node.get("visible") is False and not children:
-        return None
-
-    # In interactive_only mode, skip non-interactive nodes that have no
-    # interactive descendants
-    if interactive_only:
-        is_interactive = role.lower().replace("ax", "") in [
-            "button", "textfield", "cell", "switch", "statictext",
-            "link", "image", "searchfield", "slider", "toggle",
-        ]
-        # Structural roles worth keeping as containers
-        is_structural = role.lower().replace("ax", "") in [
-            "navigationbar", "tabbar", "table", "scrollview",
-            "alert", "sheet", "toolbar", "window",
-        ]
-        if not is_interactive and not is_structural and not children:
-            return None
-
-    # Collapse pure wrapper nodes: if a node has no label/id/value, is not
-    # a meaningful role, and has exactly one child, promote that child.
-    _meaningful_roles = {
-        "button", "textfield", "cell", "switch", "statictext", "link",
-        "image", "searchfield", "slider", "toggle", "navigationbar",
-        "tabbar", "table", "scrollview", "alert", "sheet", "toolbar",
-        "window", "application",
-    }
-    if (not label and not identifier and not value
-            and len(children) == 1
-            and role.lower().replace("ax", "") not in _meaningful_roles):
-        return children[0]
-
-    result = {"type": role}
-    if identifier:
-        result["id"] = identifier
-    if label:
-        result["label"] = label
-    if value:
-        result["value"] = value
-    if isinstance(frame, dict):
-        result["frame"] = f"{frame.get('x',0)},{frame.get('y',0)},{frame.get('width', frame.get('w', 0))},{frame.get('height', frame.get('h', 0))}"
-    if children:
-        result["children"] = children
-
-    return result
-
-def inspect_cmd(interactive_only: bool = True, depth: int = None, flat: bool = False, query: str = None):
+from pippin.utils.ui import get_ui_tree, get_rect
+from pippin.utils.tree import (
+    walk, Visitor, SimplifyVisitor, FlatListVisitor, ScreenIdVisitor, DigestVisitor, format_frame
+)
+from pippin.utils.handles import assign_handles, save_handles
+from pippin.utils.errors import (
+    fail, ERR_COMMAND_FAILED, ERR_INVALID_ARGS, EXIT_INVALID_ARGS,
+    ERR_ELEMENT_NOT_FOUND, EXIT_ELEMENT_NOT_FOUND
+)
+
+def simplify_node(node, interactive_only=False, depth=None, current_depth=0, include_hidden=False,
+                  viewport=None, culled=None):
+    """Simplify a node, keeping children nested.
+
+    If viewport is an (x, y, w, h) rect, subtrees whose frame lies entirely
+    outside it are dropped without being visited. When culled is a dict, the
+    directions in which content was dropped are counted in it.
+    """
     if depth is not None:
-        pass # Depth is now supported in simplified logic
+        depth -= current_depth
+    simplifier = SimplifyVisitor(interactive_only, depth, include_hidden, viewport, culled)
+    walk([node], [simplifier])
+    results = simplifier.results
+    return results[0] if results else None
+
+class _ExtentVisitor(Visitor):
+    """Finds the bottom edge of the content, to count pages."""
+    def __init__(self):
+        self.bottom = 0
+
+    def enter(self, node, depth):
+        rect = get_rect(node.get("frame"))
+        if rect and rect[2] > 0 and rect[3] > 0:
+            self.bottom = max(self.bottom, rect[1] + rect[3])
+
+def _resolve_page(page, tree, screen_h):
+    """Turn a --page argument into a page index, advancing the stored cursor.
+
+    The index is clamped to the pages the content spans, and the cursor
+    starts over when the snapshot differs from the one it was stored for.
+    """
+    from pippin.utils.device import get_target_udid
+    from pippin.utils.state import get_device_state, set_device_state
+
+    digest = DigestVisitor()
+    extent = _ExtentVisitor()
+    walk(tree, [digest, extent])
+    pages = max(1, math.ceil(extent.bottom / screen_h)) if screen_h else 1
+
+    udid = get_target_udid()
+    cursor = get_device_state(udid, "inspect_page") or {}
+    current = cursor.get("index", 0) if isinstance(cursor, dict) and cursor.get("digest") == digest.digest else 0
+    if page == "next":
+        index = current + 1
+    elif page == "prev":
+        index = current - 1
+    elif page == "first":
+        index = 0
+    else:
+        try:
+            index = int(page)
+        except ValueError:
+            fail(ERR_INVALID_ARGS, f"Invalid page: {page}. Use next, prev, first or a number.", EXIT_INVALID_ARGS)
+    index = min(max(index, 0), pages - 1)
+    set_device_state(udid, "inspect_page", {"index": index, "digest": digest.digest})
+    return index
+
+def _viewport_rect(size, page_index):
+    """Returns the rect of a screen-sized page of content."""
+    w, h = size
+    return (0, (page_index or 0) * h, w, h)
+
+def _page_info(page_index, culled):
+    return {
+        "index": page_index,
+        "has_prev": culled.get("above", 0) > 0,
+        "has_next": culled.get("below", 0) > 0,
+    }
 
+def _assign_stable_ids(tree):
+    """Tags raw nodes with ids that persist across snapshots (see pippin.utils.identity)."""
+    from pippin.utils.identity import assign_stable_ids
+    udid = None
     try:
-        # Check if flat output is requested (backward compatibility)
-        if flat:
-            elements = get_ui_tree()
-            
-            # Try to detect app and screen (shared logic)
-            detected_bundle = "unknown"
-            detected_screen = "unknown"
-            
-            # We can use the flat list to detect screen info easily
-            for el in elements:
-                role = el.get("role", "")
-                if role in ["Window", "AXWindow", "AXApplication"]:
-                    detected_screen = el.get("AXLabel") or el.get("AXIdentifier") or "MainScreen"
-                    break
-            
-            if detected_screen == "unknown":
-                 for el in elements:
-                      if el.get("role") in ["Heading", "AXHeading"]:
-                           detected_screen = el.get("AXLabel") or "MainScreen"
-                           break
-
-            from pippin.utils.state import get_last_bundle_id
-            detected_bundle = get_last_bundle_id() or "unknown"
-
-            filtered_elements = []
-            for el in elements:
-                role = el.get("role", "Unknown")
-                if interactive_only:
-                    valid_roles = [
-                        "button", "textfield", "cell", "switch", "statictext", "link", "image", "searchfield",
-                        "axbutton", "axtextfield", "axcell", "axswitch", "axstatictext", "axlink", "aximage", "axsearchfield"
-                    ]
-                    if role.lower() not in valid_roles:
-                         continue
-
-                frame = el.get("frame", {})
-                if isinstance(frame, dict):
-                    frame_str = f"{frame.get('x',0)},{frame.get('y',0)},{frame.get('width', frame.get('w', 0))},{frame.get('height', frame.get('h', 0))}"
-                else:
-                    frame_str = str(frame)
-
-                mapped = {
-                    "id": el.get("AXIdentifier", ""),
-                    "label": el.get("AXLabel", ""),
-                    "type": role,
-                    "frame": frame_str,
-                    "value": el.get("AXValue", "")
-                }
-                filtered_elements.append(mapped)
-
-            if query:
-                q = query.lower()
-                filtered_elements = [
-                    el for el in filtered_elements 
-                    if q in str(el.get("id", "")).lower() 
-                    or q in str(el.get("label", "")).lower() 
-                    or q in str(el.get("value", "")).lower()
-                ]
-
-            result = {
-                "app": detected_bundle,
-                "screen_id": detected_screen,
-                "elements": filtered_elements
-            }
-            print(json.dumps(result, indent=2))
-            return
-
-        # Hierarchical Logic
-        from pippin.utils.ui import get_ui_tree_hierarchical
-        tree = get_ui_tree_hierarchical()
-        
-        # Detect app/screen from tree root usually
-        detected_bundle = "unknown"
-        detected_screen = "unknown"
-        
-        # Helper to find screen info in tree
-        def find_screen_info(nodes):
-            for node in nodes:
-                role = node.get("role", "")
-                if role in ["Window", "AXWindow", "AXApplication"]:
-                    return node.get("AXLabel") or node.get("AXIdentifier")
-                # fast check children?
-                # Usually window is top level or near top
-            return None
-
-        # If tree is a list (it is from idb describe-all), iterate top level
-        screen_name = find_screen_info(tree)
-        if screen_name:
-            detected_screen = screen_name
-        else:
-             # Fallback: check for heading in flattened subset or just traverse a bit?
-             # For simplicity, default unless we want to traverse again.
-             detected_screen = "MainScreen"
+        from pippin.utils.device import get_target_udid
+        udid = get_target_udid()
+    except (SystemExit, Exception):
+        pass
+    assign_stable_ids(tree, udid)
+
+def _select(tree, query):
+    """Splits a query into (text query, selected node ids): selectors are matched up front."""
+    from pippin.utils.selectors import is_selector, select, SelectorError
+    if not is_selector(query):
+        return query, None
+    try:
+        return None, {id(node) for node in select(tree, query)}
+    except SelectorError as e:
+        fail(ERR_INVALID_ARGS, str(e), EXIT_INVALID_ARGS)
+
+def _candidates_cmd(query: str, k: int):
+    """Prints the top-k scored matches for query, with handles, so one can be picked without re-inspecting."""
+    from pippin.utils.ui import find_candidates
 
-        # Bundle ID from state file
+    elements = get_ui_tree()
+    hits = find_candidates(query, elements, k)
+    entries = []
+    for score, el in hits:
+        frame = el.get("frame", {})
+        entries.append({
+            "score": round(score, 3),
+            "id": el.get("AXIdentifier", ""),
+            "label": el.get("AXLabel", ""),
+            "type": el.get("role", "Unknown"),
+            "frame": format_frame(frame) if isinstance(frame, dict) else str(frame),
+        })
+    entries, handle_table = assign_handles(entries)
+    try:
+        from pippin.utils.device import get_target_udid
+        save_handles(get_target_udid(), handle_table)
+    except (SystemExit, Exception):
+        pass
+    print(json.dumps({"query": query, "candidates": entries}, indent=2))
+
+def inspect_cmd(interactive_only: bool = True, depth: int = None, flat: bool = False, query: str = None,
+                viewport: bool = False, page: str = None, stable_ids: bool = False, candidates: int = None):
+    if candidates:
+        if not query:
+            fail(ERR_INVALID_ARGS, "--candidates needs --query.", EXIT_INVALID_ARGS)
+        try:
+            _candidates_cmd(query, candidates)
+        except Exception as e:
+            fail(ERR_COMMAND_FAILED, f"Could not inspect UI: {e}")
+        return
+
+    try:
         from pippin.utils.state import get_last_bundle_id
         detected_bundle = get_last_bundle_id() or "unknown"
-        
-        def filter_tree_by_query(node, q):
-            """Returns True if this node or any of its descendants matches the query."""
-            matches = False
-            if q in str(node.get("id", "")).lower(): matches = True
-            elif q in str(node.get("label", "")).lower(): matches = True
-            elif q in str(node.get("value", "")).lower(): matches = True
-            
-            filtered_children = []
-            if "children" in node:
-                for child in node["children"]:
-                    if filter_tree_by_query(child, q):
-                        filtered_children.append(child)
-                        matches = True
-                        
-            if filtered_children:
-                node["children"] = filtered_children
-            else:
-                node.pop("children", None)
-                
-            return matches
-
-        simplified_elements = []
-        for node in tree:
-            simplified = simplify_node(node, interactive_only, depth, include_hidden=not interactive_only)
-            if simplified:
-                if query:
-                    if filter_tree_by_query(simplified, query.lower()):
-                        simplified_elements.append(simplified)
-                else:
-                    simplified_elements.append(simplified)
-        
+
+        if flat:
+            tree = get_ui_tree()
+        else:
+            from pippin.utils.ui import get_ui_tree_hierarchical
+            tree = get_ui_tree_hierarchical()
+        if stable_ids:
+            _assign_stable_ids(tree)
+
+        # Screen detection, culling, simplification and query filtering
+        # all happen in a single walk over the snapshot
+        culled = {}
+        view_rect = None
+        page_index = None
+        if viewport or page is not None:
+            from pippin.utils.geometry import get_screen_size
+            size = get_screen_size(tree=tree)
+            if page is not None:
+                # Paging walks the content in screen-sized bands; page 0 is the screen itself
+                page_index = _resolve_page(page, tree, size[1])
+            view_rect = _viewport_rect(size, page_index)
+
+        query, selected = _select(tree, query)
+        if flat:
+            screen = ScreenIdVisitor()
+            lister = FlatListVisitor(interactive_only, viewport=view_rect, culled=culled, query=query,
+                                     selected=selected)
+            walk(tree, [screen, lister])
+            detected_screen = screen.screen_id("unknown")
+            output_elements = lister.elements
+        else:
+            include_hidden = not interactive_only
+            # Offscreen pages are made of elements WDA reports as not visible
+            if page_index:
+                include_hidden = True
+
+            # Only top-level windows name the screen in the hierarchical view
+            screen = ScreenIdVisitor(max_depth=0, headings=False)
+            simplifier = SimplifyVisitor(interactive_only, depth, include_hidden, viewport=view_rect,
+                                         culled=culled, query=query, stable_ids=stable_ids, selected=selected)
+            walk(tree, [screen, simplifier])
+            detected_screen = screen.screen_id("MainScreen")
+            output_elements = simplifier.results
+
+        # Short handles let later actions (tap @e3) skip fetching and matching the tree
+        output_elements, handle_table = assign_handles(output_elements)
+        try:
+            from pippin.utils.device import get_target_udid
+            save_handles(get_target_udid(), handle_table)
+        except (SystemExit, Exception):
+            pass
+
         result = {
             "app": detected_bundle,
             "screen_id": detected_screen,
-            "elements": simplified_elements
+            "elements": output_elements
         }
-        
-
+        if page_index is not None:
+            result["page"] = _page_info(page_index, culled)
         print(json.dumps(result, indent=2))
 
     except Exception as e:
@@ -215,13 +206,74 @@ def inspect_cmd(interactive_only: bool = True, depth: int = None, flat: bool = F
 
 from pippin.utils.device import get_simctl_target
 
-def screenshot_cmd(filename: str, mask_text: bool = False):
+def _parse_crop(crop: str):
+    """Returns (rect_in_points, screen_width) for a crop spec.
+
+    The spec is either "x,y,w,h" in points or an element query; the UI tree
+    is only fetched to find an element.
+    """
+    from pippin.utils.ui import find_element
+    from pippin.utils.geometry import get_screen_size
+
+    parts = crop.replace(" ", "").split(",")
+    if len(parts) == 4:
+        try:
+            rect = tuple(float(p) for p in parts)
+        except ValueError:
+            pass
+        else:
+            screen_w, _ = get_screen_size(fetch_tree=lambda: get_ui_tree(silent=True))
+            return rect, screen_w
+
+    elements = get_ui_tree(silent=True)
+    el = find_element(crop, silent=True, elements=elements)
+    rect = get_rect(el.get("frame")) if el else None
+    if not rect:
+        fail(ERR_ELEMENT_NOT_FOUND, f"Element '{crop}' not found for crop.", EXIT_ELEMENT_NOT_FOUND)
+    screen_w, _ = get_screen_size(tree=elements)
+    return rect, screen_w
+
+def screenshot_cmd(filename: str = None, mask_text: bool = False, max_dim: int = None, crop: str = None,
+                   grayscale: bool = False, fmt: str = None, quality: int = None, as_base64: bool = False):
     if mask_text:
         print("WARNING: Text masking is not implemented.", file=sys.stderr)
 
+    if not filename and not as_base64:
+        fail(ERR_INVALID_ARGS, "Provide a filename or --base64.", EXIT_INVALID_ARGS)
+
+    if fmt is None:
+        if quality or (filename and filename.lower().endswith((".jpg", ".jpeg"))):
+            fmt = "jpeg"
+        else:
+            fmt = "png"
+
+    from pippin.utils.imaging import capture_screenshot, process_image, load_image, to_base64
+
     try:
         udid = get_simctl_target()
-        execute_command(["xcrun", "simctl", "io", udid, "screenshot", filename])
-        print(json.dumps({"status": "success", "action": "screenshot", "file": filename}))
+        data = capture_screenshot(udid)
+
+        crop_rect, scale = None, 1.0
+        if crop:
+            crop_rect, screen_w = _parse_crop(crop)
+            scale = load_image(data).width / screen_w if screen_w else 1.0
+
+        data, width, height = process_image(
+            data, max_dim=max_dim, crop=crop_rect, grayscale=grayscale,
+            fmt=fmt, quality=quality, scale=scale,
+        )
+
+        result = {"status": "success", "action": "screenshot", "format": fmt, "bytes": len(data)}
+        if width and height:
+            result["width"], result["height"] = width, height
+        if filename:
+            with open(filename, "wb") as f:
+                f.write(data)
+            result["file"] = filename
+        if as_base64:
+            result["data"] = to_base64(data)
+        print(json.dumps(result))
+    except ImportError as e:
+        fail(ERR_COMMAND_FAILED, str(e))
     except Exception as e:
         fail(ERR_COMMAND_FAILED, f"Screenshot failed: {e}")
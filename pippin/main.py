@@ -1,9 +1,9 @@
 import argparse
 import sys
 from pippin.commands.vision import inspect_cmd, screenshot_cmd
-from pippin.commands.interaction import tap_cmd, type_cmd, scroll_cmd, gesture_cmd
-from pippin.commands.system import launch_cmd, stop_cmd, relaunch_cmd, open_cmd, permission_cmd, location_cmd, network_cmd
-from pippin.commands.verification import assert_cmd, logs_cmd, tree_cmd, wait_cmd
+from pippin.commands.interaction import tap_cmd, type_cmd, fill_cmd, scroll_cmd, gesture_cmd, at_cmd
+from pippin.commands.system import launch_cmd, stop_cmd, relaunch_cmd, open_cmd, permission_cmd, location_cmd, network_cmd, checkpoint_cmd
+from pippin.commands.verification import assert_cmd, assert_file_cmd, logs_cmd, tree_cmd, wait_cmd
 from pippin.commands.doctor import doctor_cmd
 
 def main():
@@ -13,15 +13,19 @@ Pippin: A Token-Efficient CLI for iOS Automation
 Commands:
   Vision & Context:
     inspect [--flat]   View UI hierarchy (default: hierarchical, use --flat for flat list)
+    inspect --page next  Page through offscreen content one screen at a time
     context            Get comprehensive state (device, app, screen, UI, logs)
-    screenshot <file>  Take a screenshot
+    screenshot <file>  Take a screenshot (--max-dim, --crop, --base64 to shrink it)
 
   Interaction:
     tap <query>        Tap an element by label/ID
+    tap @e12           Tap an element by its handle from the last inspect
     tap <x> <y>        Tap at coordinates
+    at <x> <y>         Show which element would receive a tap at a point
     type <text>        Type text into focused element
+    fill '<json>'      Fill several fields at once: {"Email": "...", "Password": "..."}
     scroll <dir>       Scroll (up/down/left/right)
-    gesture <type> ... Perform gestures (swipe, etc.)
+    gesture <type> ... Perform gestures (swipe, pinch, rotate, chain)
 
   System:
     launch <bundleId>  Launch an app
@@ -30,19 +34,28 @@ Commands:
     open <url>         Open a URL (deep link or web)
     permission <svc>   Manage TCC privacy permissions
     location <lat> <lon> Simulate GPS coordinates
+    checkpoint save|restore <name>  Snapshot or restore the app's data container
+    pool create|lease|return  Manage a pool of cloned simulators for parallel runs
+    shard <dir> --pool N      Run a directory of pippin scripts across N devices
 
   Verification:
     assert <query> <state>   Verify element state (exists/visible/text=...)
+    assert --file checks.json  Verify many states against one snapshot ('-' reads stdin)
     wait <query>             Wait for element to appear
-    logs                     Fetch recent app logs
+    logs                     Fetch app logs since the previous call
+    logs --collect start     Buffer app logs in the background for instant reads
     tree <dir>               List files in app sandbox
 
   Device:
     doctor             Check environment and list devices
 
 Global Options:
-  --device <udid>    Target a specific simulator (defaults to booted)
+  --device <udid>    Target a specific simulator (defaults to booted); a leased
+                     pool device is reached on its own WDA port automatically
+  --device-set <dir> Use a custom CoreSimulator device set
   --inspect          After executing, append the resulting UI state
+                     (skipped with "screen_changed": false if nothing moved)
+  --change-threshold <n>  Sensitivity of the --inspect change detector
 """
 
     parser = argparse.ArgumentParser(
@@ -51,7 +64,9 @@ Global Options:
         usage="pippin [options] [command] [args]", # Update usage to show options before command
     )
     parser.add_argument("--device", help="Target simulator UDID", default=None)
+    parser.add_argument("--device-set", help="Path of a custom CoreSimulator device set", default=None)
     parser.add_argument("--inspect", action="store_true", help="Append an inspect of the resulting UI state after the command executes.")
+    parser.add_argument("--change-threshold", type=int, default=2, help="With --inspect, how many of the 64 screen hash bits may differ before the screen counts as changed; closer screens are compared pixel by pixel. Default: 2")
 
     subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands")
 
@@ -61,11 +76,21 @@ Global Options:
     inspect_parser.add_argument("--all", action="store_false", dest="interactive_only", help="Show all elements, disabling the interactive-only filter.")
     inspect_parser.add_argument("--depth", type=int, help="Limit the hierarchy depth to save tokens. (Note: Partial support)")
     inspect_parser.add_argument("--flat", action="store_true", help="Return a flat list of elements instead of a hierarchical tree (Legacy mode).")
-    inspect_parser.add_argument("--query", help="Filter the output to only elements matching this text (and their structural context).")
+    inspect_parser.add_argument("--query", help="Filter the output to only elements matching this text or a 'sel:' selector (and their structural context).")
+    inspect_parser.add_argument("--viewport", action="store_true", help="Only include elements that intersect the screen, skipping offscreen content.")
+    inspect_parser.add_argument("--page", help="Page through offscreen content in screen-sized chunks: 'next', 'prev', 'first' or a page number. Implies --viewport.")
+    inspect_parser.add_argument("--candidates", type=int, metavar="K", help="With --query, list the K best-scored matches (exact, substring or fuzzy) with frames and handles instead of the tree.")
+    inspect_parser.add_argument("--stable-ids", action="store_true", help="Add an id_stable to each element that stays the same across snapshots, even after scrolling or relabeling.")
 
     screenshot_parser = subparsers.add_parser("screenshot", help="Capture the visual state for verification.")
-    screenshot_parser.add_argument("filename", help="The output filename for the screenshot (e.g., screen.png).")
+    screenshot_parser.add_argument("filename", nargs="?", help="The output filename for the screenshot (e.g., screen.png). Optional with --base64.")
     screenshot_parser.add_argument("--mask-text", action="store_true", help="Redact text for privacy/security (Not Implemented).")
+    screenshot_parser.add_argument("--max-dim", type=int, help="Downscale so the longest side is at most this many pixels.")
+    screenshot_parser.add_argument("--crop", help="Crop to an element query or an 'x,y,w,h' rect in points.")
+    screenshot_parser.add_argument("--grayscale", action="store_true", help="Convert the image to grayscale.")
+    screenshot_parser.add_argument("--format", choices=["png", "jpeg"], dest="fmt", help="Image format. Default: from the filename extension, else png.")
+    screenshot_parser.add_argument("--quality", type=int, help="JPEG quality (1-95). Implies --format jpeg.")
+    screenshot_parser.add_argument("--base64", action="store_true", dest="as_base64", help="Embed the image as base64 in the JSON output.")
 
     # Interaction
     tap_parser = subparsers.add_parser("tap", help="Tap a UI element.")
@@ -74,18 +99,32 @@ Global Options:
     tap_parser.add_argument("--y", type=int, help="Fallback Y coordinate if query fails or is not provided.")
     tap_parser.add_argument("--strict", action="store_true", help="Use strict matching (exact ID or label only, no substring).")
     tap_parser.add_argument("--scroll", action="store_true", help="Automatically scroll down to find the element.")
+    tap_parser.add_argument("--force", action="store_true", help="Tap even if another element (e.g. a modal or bar) covers the target.")
+
+    at_parser = subparsers.add_parser("at", help="Show which element would receive a tap at a point.")
+    at_parser.add_argument("x", type=float, help="X coordinate in points.")
+    at_parser.add_argument("y", type=float, help="Y coordinate in points.")
 
     type_parser = subparsers.add_parser("type", help="Input text into the currently focused field.")
     type_parser.add_argument("text", help="The text string to type.")
     type_parser.add_argument("--submit", action="store_true", help="Press 'Return/Enter' on the keyboard after typing.")
+    type_parser.add_argument("--into", help="Tap this element (a query or @handle) to focus it before typing.")
+    type_parser.add_argument("--strategy", choices=["auto", "keys", "paste", "set-value"], default="auto",
+                             help="How to enter the text: key events, the simulator pasteboard, or WDA's element value. 'auto' picks by length and field type.")
+
+    fill_parser = subparsers.add_parser("fill", help="Fill several fields from one snapshot.")
+    fill_parser.add_argument("fields", help='JSON object mapping field queries (or @handles) to text, e.g. \'{"Email": "a@b.c", "Password": "secret"}\'.')
+    fill_parser.add_argument("--submit", action="store_true", help="Press 'Return/Enter' after the last field instead of dismissing the keyboard.")
+    fill_parser.add_argument("--strategy", choices=["auto", "keys", "paste", "set-value"], default="auto",
+                             help="How to enter each value (see 'type --strategy').")
 
     scroll_parser = subparsers.add_parser("scroll", help="Scroll the screen.")
     scroll_parser.add_argument("direction", choices=["up", "down", "left", "right"], help="The direction to scroll.")
     scroll_parser.add_argument("--until-visible", help="Scroll repeatedly until the specified element (ID or label) becomes visible in the inspect tree.")
 
     gesture_parser = subparsers.add_parser("gesture", help="Perform a specific gesture.")
-    gesture_parser.add_argument("type", choices=["swipe", "pinch"], help="The type of gesture to perform.")
-    gesture_parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the gesture (e.g., start_x,start_y end_x,end_y for swipe).")
+    gesture_parser.add_argument("type", choices=["swipe", "pinch", "rotate", "chain"], help="The type of gesture to perform.")
+    gesture_parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the gesture: start_x,start_y end_x,end_y for swipe, center_x,center_y scale|degrees [duration] for pinch/rotate, or a spec like '100,600 tap 200,600 tap' for chain (pointers separated by '|').")
 
     # System
     launch_parser = subparsers.add_parser("launch", help="Launch an application.")
@@ -93,6 +132,7 @@ Global Options:
     launch_parser.add_argument("--clean", action="store_true", help="Wipe the app container before launching to simulate a fresh install.")
     launch_parser.add_argument("--args", help="Launch arguments to pass to the app (e.g., '-TakingScreenshots YES').")
     launch_parser.add_argument("--locale", help="Launch the app in a specific language/locale (e.g., es-MX).")
+    launch_parser.add_argument("--checkpoint", help="Restore a saved app-container checkpoint before launching (see 'pippin checkpoint').")
 
     stop_parser = subparsers.add_parser("stop", help="Terminate a running application.")
     stop_parser.add_argument("bundle_id", nargs="?", help="The Bundle ID of the app to stop. Uses last launched app if omitted.")
@@ -102,6 +142,12 @@ Global Options:
     relaunch_parser.add_argument("--clean", action="store_true", help="Wipe the app container before launching.")
     relaunch_parser.add_argument("--args", help="Launch arguments to pass to the app.")
     relaunch_parser.add_argument("--locale", help="Launch the app in a specific language/locale.")
+    relaunch_parser.add_argument("--checkpoint", help="Restore a saved app-container checkpoint before launching.")
+
+    checkpoint_parser = subparsers.add_parser("checkpoint", help="Save and restore snapshots of the app's data container.")
+    checkpoint_parser.add_argument("operation", choices=["save", "restore", "list", "delete"], help="The checkpoint operation.")
+    checkpoint_parser.add_argument("name", nargs="?", help="The checkpoint name. 'empty' is built in and restores a wiped container.")
+    checkpoint_parser.add_argument("--bundle-id", help="The app's Bundle ID. Uses last launched app if omitted.")
 
     open_parser = subparsers.add_parser("open", help="Open a URL scheme or Universal Link.")
     open_parser.add_argument("url", help="The URL to open (e.g., myapp://settings).")
@@ -119,8 +165,9 @@ Global Options:
 
     # Verification
     assert_parser = subparsers.add_parser("assert", help="Perform a quick boolean check on the UI state.")
-    assert_parser.add_argument("query", help="The element identifier or label to check.")
-    assert_parser.add_argument("state", help="The expected state: 'exists', 'visible', 'hidden', or 'text=value'.")
+    assert_parser.add_argument("query", nargs="?", help="The element identifier or label to check.")
+    assert_parser.add_argument("state", nargs="?", help="The expected state: 'exists', 'visible', 'hidden', or 'text=value'.")
+    assert_parser.add_argument("--file", help='JSON file of checks, e.g. [{"query": "Login", "state": "visible"}], or - for stdin. All are evaluated against one snapshot.')
     assert_parser.add_argument("--strict", action="store_true", help="Use strict matching.")
 
     wait_parser = subparsers.add_parser("wait", help="Wait for an element to reach a certain state.")
@@ -132,9 +179,37 @@ Global Options:
 
     logs_parser = subparsers.add_parser("logs", help="Fetch the tail of the system log for the target app.")
     logs_parser.add_argument("--crash-report", action="store_true", help="Check if a crash log was generated in the last session.")
+    logs_parser.add_argument("--collect", choices=["start", "stop", "status"], help="Manage a background collector that streams the app's logs into a ring buffer; while it runs, logs are served from the buffer.")
+    logs_parser.add_argument("--lines", type=int, help="Only return the last N buffered lines.")
+    logs_parser.add_argument("--full", action="store_true", help="Ignore the stored cursor and return the last 5 minutes of logs, not just entries since the previous call.")
+    logs_parser.add_argument("--raw", action="store_true", help="Print raw log lines instead of a deduplicated JSON summary.")
+    logs_parser.add_argument("--level", choices=["debug", "info", "default", "error", "fault"], help="Minimum level to include, in the summary or the raw lines.")
+    logs_parser.add_argument("--max-lines", type=int, default=100, help="Maximum number of distinct messages in the summary. Default: 100")
+    logs_parser.add_argument("--max-tokens", type=int, help="Approximate token budget for the summary.")
 
     tree_parser = subparsers.add_parser("tree", help="List files in the app's sandbox containers.")
     tree_parser.add_argument("directory", help="The directory to list: 'documents', 'caches', or 'tmp'.")
+    tree_parser.add_argument("--depth", type=int, help="Maximum directory depth to descend into.")
+    tree_parser.add_argument("--max-entries", type=int, help="Stop listing after this many entries.")
+    tree_parser.add_argument("--glob", dest="pattern", help="Only list files whose name or relative path matches this glob (e.g. '*.json').")
+    tree_parser.add_argument("--json", action="store_true", dest="as_json", help="Output JSON with sizes and modification times.")
+    tree_parser.add_argument("--since-last", action="store_true", help="Only report files added, removed or changed since the previous --since-last call.")
+
+    pool_parser = subparsers.add_parser("pool", help="Manage a pool of cloned simulators for parallel runs.")
+    pool_parser.add_argument("operation", choices=["create", "lease", "return", "status", "destroy"], help="The pool operation.")
+    pool_parser.add_argument("udid", nargs="?", help="The leased device to return.")
+    pool_parser.add_argument("--golden", help="With create: the simulator to clone (it will be shut down).")
+    pool_parser.add_argument("--size", type=int, help="With create: how many clones to make.")
+    pool_parser.add_argument("--isolated", action="store_true", help="With create: keep the clones in their own device set.")
+    pool_parser.add_argument("--no-reset", dest="reset", action="store_false", help="With return: skip re-cloning the device from golden.")
+    pool_parser.add_argument("--wait", type=float, default=0, help="With lease: seconds to wait for a free device. Default: 0")
+
+    shard_parser = subparsers.add_parser("shard", help="Run a directory of pippin scripts in parallel across simulators.")
+    shard_parser.add_argument("directory", help="Directory of scripts (one pippin command per line).")
+    shard_parser.add_argument("--devices", help="Comma-separated UDIDs to run on (each needs its own WDA, e.g. pool leases).")
+    shard_parser.add_argument("--pool", type=int, dest="pool_size", help="Lease up to N devices from the pool for the run.")
+    shard_parser.add_argument("--summary", default="shard_summary.json", help="Where to write the run summary. Default: shard_summary.json")
+    shard_parser.add_argument("--step-timeout", type=float, default=120, help="Seconds allowed per script line. Default: 120")
 
     subparsers.add_parser("doctor", help="Check if all dependencies are installed.")
     
@@ -154,7 +229,7 @@ Global Options:
         if arg == "--inspect":
             global_args.append(arg)
             i += 1
-        elif arg == "--device":
+        elif arg in ("--device", "--device-set", "--change-threshold"):
             global_args.append(arg)
             if i + 1 < len(raw_args):
                 global_args.append(raw_args[i+1])
@@ -170,21 +245,37 @@ Global Options:
 
     args = parser.parse_args()
     
+    if args.device_set:
+        from pippin.utils.executor import set_device_set
+        set_device_set(args.device_set)
+
     # Set global target device if provided
     if args.device:
         from pippin.utils.device import set_target_device
         set_target_device(args.device)
 
+        # A leased pool device has its own WDA port and possibly its own device set
+        from pippin.utils.pool import find_lease
+        lease = find_lease(args.device)
+        if lease:
+            from pippin.utils import wda
+            from pippin.utils.executor import set_device_set
+            wda.configure_port(lease["port"])
+            if lease["device_set"] and not args.device_set:
+                set_device_set(lease["device_set"])
+
     # Helper to run command and optionally inspect
     def run_command_with_feedback():
         # Dispatch logic
         if args.command == "inspect":
-            inspect_cmd(interactive_only=args.interactive_only, depth=args.depth, flat=args.flat, query=args.query)
+            inspect_cmd(interactive_only=args.interactive_only, depth=args.depth, flat=args.flat, query=args.query,
+                        viewport=args.viewport, page=args.page, stable_ids=args.stable_ids, candidates=args.candidates)
         elif args.command == "context":
             from pippin.commands.context import context_cmd
             context_cmd(include_logs=args.include_logs, screenshot_path=args.screenshot, brief=args.brief)
         elif args.command == "screenshot":
-            screenshot_cmd(args.filename, mask_text=args.mask_text)
+            screenshot_cmd(args.filename, mask_text=args.mask_text, max_dim=args.max_dim, crop=args.crop,
+                           grayscale=args.grayscale, fmt=args.fmt, quality=args.quality, as_base64=args.as_base64)
         elif args.command == "tap":
             query = None
             x, y = args.x, args.y
@@ -195,19 +286,25 @@ Global Options:
                     query = " ".join(args.args)
             elif len(args.args) >= 1:
                 query = " ".join(args.args)
-            tap_cmd(query=query, x=x, y=y, strict=args.strict, scroll=args.scroll)
+            tap_cmd(query=query, x=x, y=y, strict=args.strict, scroll=args.scroll, force=args.force)
+        elif args.command == "at":
+            at_cmd(args.x, args.y)
         elif args.command == "type":
-            type_cmd(args.text, submit=args.submit)
+            type_cmd(args.text, submit=args.submit, into=args.into, strategy=args.strategy)
+        elif args.command == "fill":
+            fill_cmd(args.fields, submit=args.submit, strategy=args.strategy)
         elif args.command == "scroll":
             scroll_cmd(args.direction, until_visible=args.until_visible)
         elif args.command == "gesture":
             gesture_cmd(args.type, args.args)
         elif args.command == "launch":
-            launch_cmd(args.bundle_id, clean=args.clean, args=args.args, locale=args.locale)
+            launch_cmd(args.bundle_id, clean=args.clean, args=args.args, locale=args.locale, checkpoint=args.checkpoint)
         elif args.command == "stop":
             stop_cmd(args.bundle_id)
         elif args.command == "relaunch":
-            relaunch_cmd(args.bundle_id, clean=args.clean, args=args.args, locale=args.locale)
+            relaunch_cmd(args.bundle_id, clean=args.clean, args=args.args, locale=args.locale, checkpoint=args.checkpoint)
+        elif args.command == "checkpoint":
+            checkpoint_cmd(args.operation, args.name, bundle_id=args.bundle_id)
         elif args.command == "open":
             open_cmd(args.url)
         elif args.command == "permission":
@@ -217,13 +314,29 @@ Global Options:
         elif args.command == "network":
             network_cmd(args.condition)
         elif args.command == "assert":
-            assert_cmd(args.query, args.state, strict=args.strict)
+            if args.file:
+                assert_file_cmd(args.file, strict=args.strict)
+            elif not args.query or not args.state:
+                from pippin.utils.errors import fail, ERR_INVALID_ARGS, EXIT_INVALID_ARGS
+                fail(ERR_INVALID_ARGS, "assert needs <query> <state> or --file.", EXIT_INVALID_ARGS)
+            else:
+                assert_cmd(args.query, args.state, strict=args.strict)
         elif args.command == "wait":
             wait_cmd(args.query, timeout=args.timeout, state=args.state, strict=args.strict, scroll=args.scroll)
         elif args.command == "logs":
-            logs_cmd(crash_report=args.crash_report)
+            logs_cmd(crash_report=args.crash_report, collect=args.collect, lines=args.lines, full=args.full,
+                     raw=args.raw, level=args.level, max_lines=args.max_lines, max_tokens=args.max_tokens)
         elif args.command == "tree":
-            tree_cmd(args.directory)
+            tree_cmd(args.directory, depth=args.depth, max_entries=args.max_entries, pattern=args.pattern,
+                     as_json=args.as_json, since_last=args.since_last)
+        elif args.command == "pool":
+            from pippin.commands.pool import pool_cmd
+            pool_cmd(args.operation, golden=args.golden, size=args.size, isolated=args.isolated,
+                     udid=args.udid, reset=args.reset, wait=args.wait)
+        elif args.command == "shard":
+            from pippin.commands.shard import shard_cmd
+            shard_cmd(args.directory, devices=args.devices, pool_size=args.pool_size,
+                      summary_path=args.summary, step_timeout=args.step_timeout)
         elif args.command == "doctor":
             doctor_cmd()
 
@@ -232,6 +345,9 @@ Global Options:
         import json
         from pippin.utils.capture import capture_output
         from pippin.utils.ui import get_ui_tree_hierarchical
+        from pippin.utils.tree import walk, SimplifyVisitor
+
+        action_started = time.time()
 
         # Capture command output
         with capture_output() as (out, err):
@@ -266,24 +382,40 @@ Global Options:
         # Wait for settle
         time.sleep(0.5)
 
-        # Inspect
-        # We need to manually call the logic from inspect_cmd because we want the object, not to print
-        # inspect_cmd prints.
-        # But we can reuse capture_output logic or just call get_ui_tree...
-        # Let's assume inspect_cmd logic is simple: get_ui_tree_hierarchical(interactive_only=True)
-        # We'll use interactive_only=True by default for feedback.
-        
-        ui_tree = []
+        combined = {"action": action_result}
+
+        # A cheap perceptual hash tells us whether the screen moved at all;
+        # if it did not, the tree fetch can be skipped entirely.
+        from pippin.utils.device import get_target_udid
+        from pippin.utils.imaging import detect_screen_change
+        changed = None
         try:
-             # Force interactive_only=True for feedback loop to be concise
-             ui_tree = get_ui_tree_hierarchical(interactive_only=True, depth=None)
-        except Exception as e:
-            ui_tree = {"error": str(e)}
-
-        combined = {
-            "action": action_result,
-            "ui": ui_tree
-        }
+            changed = detect_screen_change(get_target_udid(), threshold=args.change_threshold)
+        except (SystemExit, Exception):
+            pass
+        if changed is not None:
+            combined["screen_changed"] = changed
+
+        # The crash index only stats the reports directory, so this is cheap
+        from pippin.utils.state import get_last_bundle_id
+        from pippin.utils.crash import latest_crash
+        bundle_id = get_last_bundle_id()
+        crash = latest_crash(bundle_id, since=action_started) if bundle_id else None
+        if crash:
+            combined["crash"] = {"report": crash[0], "timestamp": crash[1].get("timestamp")}
+
+        if changed is not False:
+            # Force interactive_only=True for feedback loop to be concise
+            ui_tree = []
+            try:
+                tree = get_ui_tree_hierarchical(silent=True)
+                simplifier = SimplifyVisitor(interactive_only=True)
+                walk(tree, [simplifier])
+                ui_tree = simplifier.results
+            except Exception as e:
+                ui_tree = {"error": str(e)}
+            combined["ui"] = ui_tree
+
         print(json.dumps(combined, indent=2))
 
     else:
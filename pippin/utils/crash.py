@@ -0,0 +1,146 @@
+import os
+import json
+
+CRASH_DIR = os.path.expanduser("~/Library/Logs/DiagnosticReports")
+INDEX_FILE = "/tmp/pippin_crash_index.json"
+REPORT_EXTENSIONS = (".ips", ".crash")
+
+def _read_header(path: str):
+    """Parses only the first line of an .ips report, which is a JSON header."""
+    try:
+        with open(path, "r") as f:
+            header = json.loads(f.readline())
+    except (IOError, ValueError):
+        return None
+    if not isinstance(header, dict):
+        return None
+    return {
+        "bundle_id": header.get("bundleID"),
+        "process": header.get("app_name") or header.get("name"),
+        "timestamp": header.get("timestamp"),
+    }
+
+def _load_index():
+    try:
+        with open(INDEX_FILE, "r") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+def _save_index(index):
+    try:
+        with open(INDEX_FILE, "w") as f:
+            json.dump(index, f)
+    except IOError:
+        pass
+
+def update_index(directory: str = None) -> dict:
+    """Returns {filename: {mtime, bundle_id, process, timestamp}} for the reports in directory.
+
+    Reports whose mtime is unchanged since the last scan are not reopened, and
+    when the directory itself is unchanged only header-less .ips reports are
+    stat'ed. Reports without a JSON header (older .crash files, or one still
+    being written) are indexed with header False and matched by filename; a
+    report that is rewritten gets a new mtime and is parsed again.
+    """
+    directory = directory or CRASH_DIR
+    try:
+        dir_mtime = os.stat(directory).st_mtime
+    except OSError:
+        return {}
+
+    index = _load_index()
+    if index.get("directory") != directory:
+        index = {"directory": directory, "reports": {}}
+    if index.get("dir_mtime") == dir_mtime:
+        # Writing to a file does not change the directory's mtime, so a report
+        # first seen while still being written is checked again by itself
+        reports = index["reports"]
+        changed = False
+        for name, info in reports.items():
+            if info.get("header") is not False or not name.endswith(".ips"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if mtime != info.get("mtime"):
+                reports[name] = dict(_read_header(path) or {"header": False}, mtime=mtime)
+                changed = True
+        if changed:
+            _save_index(index)
+        return reports
+
+    old = index["reports"]
+    reports = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.name.endswith(REPORT_EXTENSIONS) or not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            cached = old.get(entry.name)
+            if cached and cached.get("mtime") == mtime:
+                reports[entry.name] = cached
+                continue
+            header = _read_header(entry.path) or {"header": False}
+            header["mtime"] = mtime
+            reports[entry.name] = header
+
+    _save_index({"directory": directory, "dir_mtime": dir_mtime, "reports": reports})
+    return reports
+
+def latest_crash(bundle_id: str, since: float = None, directory: str = None):
+    """Returns (path, info) for the newest report of bundle_id, or None.
+
+    Only reports modified after `since` (a Unix time) are considered.
+    """
+    directory = directory or CRASH_DIR
+    app_name = bundle_id.split(".")[-1]
+    best = None
+    for name, info in update_index(directory).items():
+        if info.get("header") is False:
+            # Header-less reports are named after the process, e.g. "MyApp-2026-01-01-101500.crash"
+            if app_name not in name:
+                continue
+        elif info.get("bundle_id"):
+            if info["bundle_id"] != bundle_id:
+                continue
+        elif info.get("process") != app_name:
+            continue
+        if since is not None and info["mtime"] <= since:
+            continue
+        if best is None or info["mtime"] > best[1]["mtime"]:
+            best = (os.path.join(directory, name), info)
+    return best
+
+def crash_details(path: str, max_frames: int = 30) -> dict:
+    """Parses the report body for the exception and the crashed thread's frames."""
+    with open(path, "r") as f:
+        f.readline()
+        body = json.loads(f.read())
+
+    details = {}
+    exception = body.get("exception") or {}
+    if exception:
+        details["exception"] = " ".join(str(exception[k]) for k in ("type", "signal") if exception.get(k))
+
+    images = body.get("usedImages", [])
+    for thread in body.get("threads", []):
+        if not thread.get("triggered"):
+            continue
+        frames = []
+        for frame in thread.get("frames", [])[:max_frames]:
+            image_index = frame.get("imageIndex")
+            image = "?"
+            if isinstance(image_index, int) and 0 <= image_index < len(images):
+                image = images[image_index].get("name", "?")
+            symbol = frame.get("symbol")
+            if symbol:
+                frames.append(f"{image} {symbol} + {frame.get('symbolLocation', 0)}")
+            else:
+                frames.append(f"{image} + {frame.get('imageOffset', 0)}")
+        details["thread"] = thread.get("name") or thread.get("queue")
+        details["frames"] = frames
+        break
+    return details
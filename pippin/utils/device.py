@@ -9,6 +9,10 @@ def set_target_device(udid: str):
     global _target_udid
     _target_udid = udid
 
+def selected_udid():
+    """Returns the udid chosen with --device or PIPPIN_DEVICE_UDID, without querying simctl."""
+    return _target_udid or os.environ.get("PIPPIN_DEVICE_UDID")
+
 def get_target_udid():
     """Return the target UDID, auto-selecting if only one is booted."""
     global _target_udid
@@ -65,3 +69,8 @@ def get_simctl_target():
         # But for simctl, "booted" is ambiguous if multiple are booted.
         # So strict mode is better.
         raise
+
+def get_app_container(bundle_id: str, container: str = "data"):
+    """Return the path of the app's container on the target simulator."""
+    udid = get_simctl_target()
+    return execute_command(["xcrun", "simctl", "get_app_container", udid, bundle_id, container]) or None
@@ -10,6 +10,7 @@ EXIT_INVALID_ARGS = 5
 
 # Structured error prefixes (for stderr)
 ERR_ELEMENT_NOT_FOUND = "ERR_ELEMENT_NOT_FOUND"
+ERR_ELEMENT_OCCLUDED = "ERR_ELEMENT_OCCLUDED"
 ERR_COORDINATES_NOT_FOUND = "ERR_COORDINATES_NOT_FOUND"
 ERR_TIMEOUT = "ERR_TIMEOUT"
 ERR_NO_TARGET_APP = "ERR_NO_TARGET_APP"
@@ -1,14 +1,42 @@
 import subprocess
 import shlex
 import sys
+import os
 
 _DRY_RUN = False
 _MOCK_RESPONSES = {} # cmd_str -> output
+_DEVICE_SET = None
 
 def set_dry_run(enabled: bool):
     global _DRY_RUN
     _DRY_RUN = enabled
 
+def set_device_set(path: str):
+    """Routes all simctl commands to a custom device set (e.g. an isolated pool).
+
+    The path is also exported as PIPPIN_DEVICE_SET so child processes follow it.
+    """
+    global _DEVICE_SET
+    _DEVICE_SET = path
+    if path:
+        os.environ["PIPPIN_DEVICE_SET"] = path
+    else:
+        os.environ.pop("PIPPIN_DEVICE_SET", None)
+
+def get_device_set():
+    return _DEVICE_SET or os.environ.get("PIPPIN_DEVICE_SET")
+
+def with_device_set(command: list[str], device_set: str = None) -> list[str]:
+    """Inserts `--set <path>` into simctl commands when a device set is configured.
+
+    An explicit device_set takes precedence over the configured one.
+    """
+    device_set = device_set or get_device_set()
+    if device_set and len(command) > 1 and os.path.basename(command[0]) == "xcrun" \
+            and command[1] == "simctl" and "--set" not in command:
+        return command[:2] + ["--set", device_set] + command[2:]
+    return command
+
 def clear_mock_responses():
     global _MOCK_RESPONSES
     _MOCK_RESPONSES = {}
@@ -18,7 +46,8 @@ def register_mock_response(cmd: list[str], output: str):
     cmd_str = " ".join(shlex.quote(arg) for arg in cmd)
     _MOCK_RESPONSES[cmd_str] = output
 
-def execute_command(command: list[str], check: bool = True, capture_output: bool = True) -> str:
+def execute_command(command: list[str], check: bool = True, capture_output: bool = True, input: str = None,
+                    binary: bool = False) -> str:
     """
     Executes a shell command.
 
@@ -26,6 +55,8 @@ def execute_command(command: list[str], check: bool = True, capture_output: bool
         command: List of command arguments.
         check: If True, raise CalledProcessError on non-zero exit code.
         capture_output: If True, return stdout.
+        input: Text to feed to the command's stdin.
+        binary: If True, return stdout as unstripped bytes (e.g. image data).
 
     Returns:
         The standard output of the command if capture_output is True.
@@ -46,15 +77,18 @@ def execute_command(command: list[str], check: bool = True, capture_output: bool
         # print(f"[DRY-RUN] Executing: {cmd_str}", file=sys.stderr)
         if cmd_str in _MOCK_RESPONSES:
             return _MOCK_RESPONSES[cmd_str]
-        return ""
+        return b"" if binary else ""
 
     try:
         result = subprocess.run(
-            command,
+            with_device_set(command),
             check=check,
             capture_output=capture_output,
-            text=True
+            text=not binary,
+            input=input
         )
+        if binary:
+            return result.stdout or b""
         if capture_output:
             return result.stdout.strip() if result.stdout else ""
         return ""
@@ -63,3 +97,24 @@ def execute_command(command: list[str], check: bool = True, capture_output: bool
         if capture_output:
             raise subprocess.CalledProcessError(e.returncode, e.cmd, output=e.stdout, stderr=e.stderr)
         raise e
+
+def stream_command(command: list[str]):
+    """
+    Executes a command and yields its stdout line by line (without newlines),
+    so large outputs are never held in memory at once.
+    """
+    cmd_str = " ".join(shlex.quote(arg) for arg in command)
+
+    if _DRY_RUN:
+        yield from _MOCK_RESPONSES.get(cmd_str, "").splitlines()
+        return
+
+    process = subprocess.Popen(with_device_set(command), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        for line in process.stdout:
+            yield line.rstrip("\n")
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
@@ -0,0 +1,124 @@
+"""Fuzzy label matching over one UI snapshot.
+
+Labels and identifiers are normalized (case, punctuation, spacing) and
+indexed by character trigrams once per snapshot. A query is scored only
+against the entries sharing the most trigrams with it, by edit distance,
+so typos and spacing variants ("Log in" vs "Login") match even on trees
+with thousands of elements. Numbers are never fuzzy: "Step 3 of 5" does not
+match "Step 2 of 5".
+
+Build one FuzzyIndex per snapshot and pass it to whatever searches it.
+"""
+import re
+
+# Entries scored by edit distance after the trigram prefilter
+PREFILTER_LIMIT = 50
+MIN_SCORE = 0.8
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_DIGITS = re.compile(r"\d+")
+
+def normalize(text) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", str(text or "").lower()).split())
+
+def _trigrams(squashed: str) -> set:
+    padded = f"  {squashed} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def levenshtein(a: str, b: str, limit: int = None) -> int:
+    """Edit distance between a and b; stops early once it exceeds limit (returning limit + 1)."""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def similarity(a: str, b: str, min_score: float = MIN_SCORE) -> float:
+    """1 - edit distance / length. Scores certain to be below min_score are not computed exactly."""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 0.0
+    limit = int(longest * (1 - min_score)) + 1
+    distance = levenshtein(a, b, limit)
+    return 0.0 if distance > limit else 1 - distance / longest
+
+def _windows(tokens: list, target_len: int):
+    """Runs of consecutive tokens, squashed, whose length is close to target_len."""
+    for start in range(len(tokens)):
+        run = ""
+        for token in tokens[start:]:
+            run += token
+            if len(run) >= target_len * 0.5:
+                yield run
+            if len(run) > target_len * 1.5:
+                break
+
+class FuzzyIndex:
+    def __init__(self, elements):
+        """elements is a flat list of raw nodes; each label and identifier becomes an entry."""
+        self.entries = []
+        self.grams = {}
+        for el in elements:
+            for text in {el.get("AXLabel"), el.get("AXIdentifier")}:
+                norm = normalize(text)
+                if not norm:
+                    continue
+                tokens = norm.split()
+                squashed = "".join(tokens)
+                index = len(self.entries)
+                self.entries.append((el, text, tokens, squashed))
+                for gram in _trigrams(squashed):
+                    self.grams.setdefault(gram, []).append(index)
+
+    def _prefilter(self, squashed: str, include=None) -> list:
+        """The entries sharing the most trigrams with squashed, among those whose element passes include."""
+        counts = {}
+        for gram in _trigrams(squashed):
+            for index in self.grams.get(gram, ()):
+                counts[index] = counts.get(index, 0) + 1
+        if include is not None:
+            # Filter before the cut, so excluded entries cannot take every slot
+            counts = {index: n for index, n in counts.items() if include(self.entries[index][0])}
+        return sorted(counts, key=counts.get, reverse=True)[:PREFILTER_LIMIT]
+
+    def score(self, query: str, entry, min_score: float = MIN_SCORE) -> float:
+        """1.0 for exact (normalized) matches, else the best similarity of the query to the
+        whole label or (discounted) to a run of its words, so a typo inside a longer
+        label still counts."""
+        el, text, tokens, squashed = entry
+        q = "".join(normalize(query).split())
+        if q == squashed:
+            return 1.0
+        digits = _DIGITS.findall(q)
+        best = 0.0
+        if _DIGITS.findall(squashed) == digits:
+            best = similarity(q, squashed, min_score)
+        if len(tokens) > 1:
+            for run in _windows(tokens, len(q)):
+                if _DIGITS.findall(run) != digits:
+                    continue
+                # Matching part of a label counts for less than matching all of it
+                best = max(best, similarity(q, run, min_score) * (0.8 + 0.2 * len(run) / len(squashed)))
+        return best
+
+    def search(self, query: str, k: int = 5, min_score: float = MIN_SCORE, include=None) -> list:
+        """Returns up to k (score, element, matched text) tuples, best first, one per element."""
+        q = "".join(normalize(query).split())
+        if not q:
+            return []
+        best = {}
+        for index in self._prefilter(q, include):
+            entry = self.entries[index]
+            el = entry[0]
+            score = self.score(query, entry, min_score)
+            if score >= min_score and score > best.get(id(el), (0,))[0]:
+                best[id(el)] = (score, el, entry[1])
+        return sorted(best.values(), key=lambda hit: hit[0], reverse=True)[:k]
@@ -0,0 +1,90 @@
+"""Screen geometry, resolved once per device and kept in the device state.
+
+Sources, cheapest first: the cached value (used only while WDA reports the
+orientation it was measured in), WDA's window size, a snapshot the caller
+already has, the simulator's device type profile, and finally a fresh
+snapshot.
+"""
+import json
+import plistlib
+import os
+from pippin.utils import wda
+from pippin.utils.executor import execute_command
+
+DEFAULT_SIZE = (375, 812)
+_STATE_KEY = "geometry"
+
+# Resolved sizes for this process, so repeated checks (e.g. in wait loops) cost nothing
+_resolved = {}
+
+def _udid():
+    try:
+        from pippin.utils.device import get_target_udid
+        return get_target_udid()
+    except (SystemExit, Exception):
+        return None
+
+def _is_landscape(orientation) -> bool:
+    return bool(orientation) and "LANDSCAPE" in str(orientation).upper()
+
+def device_type_size(udid: str):
+    """Returns the portrait (width, height) in points from the simulator's device type profile."""
+    try:
+        devices = json.loads(execute_command(["xcrun", "simctl", "list", "devices", "--json"]) or "{}")
+        type_id = next((d.get("deviceTypeIdentifier") for group in devices.get("devices", {}).values()
+                        for d in group if d.get("udid") == udid), None)
+        if not type_id:
+            return None
+        types = json.loads(execute_command(["xcrun", "simctl", "list", "devicetypes", "--json"]) or "{}")
+        bundle = next((t.get("bundlePath") for t in types.get("devicetypes", []) if t.get("identifier") == type_id), None)
+        if not bundle:
+            return None
+        with open(os.path.join(bundle, "Contents", "Resources", "profile.plist"), "rb") as f:
+            profile = plistlib.load(f)
+        scale = float(profile.get("mainScreenScale", 1)) or 1
+        return float(profile["mainScreenWidth"]) / scale, float(profile["mainScreenHeight"]) / scale
+    except Exception:
+        return None
+
+def get_screen_size(udid: str = None, tree=None, fetch_tree=None, default=DEFAULT_SIZE):
+    """Returns the device's (width, height) in points.
+
+    tree is a snapshot the caller already has; fetch_tree is a callable
+    used as the last resort. The result is persisted per device together
+    with the orientation it was measured in, and re-resolved after rotation
+    or when the orientation cannot be read.
+    """
+    from pippin.utils.state import get_device_state, set_device_state
+    from pippin.utils.ui import screen_size_from_tree
+
+    udid = udid or _udid()
+    if udid in _resolved:
+        return _resolved[udid]
+
+    orientation = wda.orientation()
+    if udid:
+        cached = get_device_state(udid, _STATE_KEY)
+        # Without a known orientation on both sides the device may have rotated
+        if cached and orientation is not None and cached.get("orientation") == orientation:
+            size = (cached["width"], cached["height"])
+            _resolved[udid] = size
+            return size
+
+    size, source = wda.window_size(), "wda"
+    if size is None and tree:
+        size, source = screen_size_from_tree(tree, default=None), "snapshot"
+    if size is None and udid:
+        size, source = device_type_size(udid), "device_type"
+        if size and _is_landscape(orientation):
+            size = (size[1], size[0])
+    if size is None and fetch_tree:
+        size, source = screen_size_from_tree(fetch_tree(), default=None), "snapshot"
+    if size is None:
+        return default
+
+    if udid:
+        if orientation is not None:
+            set_device_state(udid, _STATE_KEY, {"width": size[0], "height": size[1],
+                                                "orientation": orientation, "source": source})
+        _resolved[udid] = size
+    return size
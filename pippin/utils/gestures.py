@@ -0,0 +1,148 @@
+"""Multi-pointer W3C action chains, sent to WDA as a single /actions request.
+
+W3C actions run in ticks: tick n performs the n-th action of every pointer
+at once and lasts as long as the longest of them. Fingers that must move
+together (pinch, rotate) therefore get the same number of steps.
+
+A chain can also be written as a compact spec, one pointer per "|":
+
+    100,600 tap 200,600 tap            two taps with one finger
+    150,400 down 100,350@400 up | 225,400 down 275,450@400 up
+                                       two fingers spreading over 400 ms
+
+Tokens: "x,y" moves instantly, "x,y@MS" moves over MS milliseconds,
+"down", "up", "tap" (down and up at the current point) and "wait:MS".
+"""
+import math
+from pippin.utils import wda
+
+MAX_POINTERS = 5
+TAP_HOLD_MS = 50
+
+class Pointer:
+    def __init__(self, name: str):
+        self.name = name
+        self.steps = []
+        self.position = None
+
+    def move(self, x: float, y: float, duration_ms: int = 0):
+        self.steps.append({"type": "pointerMove", "duration": int(duration_ms), "x": int(round(x)), "y": int(round(y))})
+        self.position = (x, y)
+        return self
+
+    def down(self):
+        self.steps.append({"type": "pointerDown", "button": 0})
+        return self
+
+    def up(self):
+        self.steps.append({"type": "pointerUp", "button": 0})
+        return self
+
+    def pause(self, duration_ms: int):
+        self.steps.append({"type": "pause", "duration": int(duration_ms)})
+        return self
+
+    def tap(self, x: float = None, y: float = None):
+        if x is not None and y is not None:
+            self.move(x, y)
+        return self.down().pause(TAP_HOLD_MS).up()
+
+    def to_w3c(self) -> dict:
+        return {"type": "pointer", "id": self.name, "parameters": {"pointerType": "touch"}, "actions": self.steps}
+
+class ActionChain:
+    def __init__(self):
+        self.pointers = []
+
+    def pointer(self) -> Pointer:
+        if len(self.pointers) >= MAX_POINTERS:
+            raise ValueError(f"At most {MAX_POINTERS} pointers are supported.")
+        p = Pointer(f"finger{len(self.pointers) + 1}")
+        self.pointers.append(p)
+        return p
+
+    def to_w3c(self) -> list:
+        return [p.to_w3c() for p in self.pointers if p.steps]
+
+    def duration_ms(self) -> int:
+        """Total time the chain takes on the device (the sum of its ticks)."""
+        ticks = max((len(p.steps) for p in self.pointers), default=0)
+        total = 0
+        for n in range(ticks):
+            total += max((p.steps[n].get("duration", 0) for p in self.pointers if n < len(p.steps)), default=0)
+        return total
+
+    def perform(self):
+        if not self.to_w3c():
+            raise ValueError("The gesture has no actions.")
+        wda.perform_actions(self.to_w3c())
+
+def _point(text: str):
+    x, y = text.split(",")
+    return float(x), float(y)
+
+def parse_spec(spec: str) -> ActionChain:
+    """Builds an ActionChain from a compact spec (see the module docstring). Raises ValueError."""
+    chain = ActionChain()
+    for part in spec.split("|"):
+        tokens = part.split()
+        if not tokens:
+            continue
+        p = chain.pointer()
+        for token in tokens:
+            lowered = token.lower()
+            if lowered == "down":
+                p.down()
+            elif lowered == "up":
+                p.up()
+            elif lowered == "tap":
+                if p.position is None:
+                    raise ValueError(f"'tap' needs a point first in pointer {len(chain.pointers)}.")
+                p.tap()
+            elif lowered.startswith("wait:"):
+                p.pause(int(lowered[5:]))
+            elif "," in token:
+                point, _, ms = token.partition("@")
+                try:
+                    x, y = _point(point)
+                    p.move(x, y, int(ms) if ms else 0)
+                except ValueError:
+                    raise ValueError(f"Invalid point '{token}'.")
+            else:
+                raise ValueError(f"Unknown token '{token}'.")
+    if not chain.pointers:
+        raise ValueError("Empty gesture spec.")
+    return chain
+
+def pinch(cx: float, cy: float, scale: float, duration_ms: int = 500, distance: float = 100) -> ActionChain:
+    """Two fingers on a horizontal line through (cx, cy), distance apart, ending scale times as far apart.
+
+    scale > 1 spreads the fingers (zoom in), scale < 1 pinches them together.
+    """
+    if scale <= 0:
+        raise ValueError("Scale must be positive.")
+    chain = ActionChain()
+    start, end = distance / 2, distance * scale / 2
+    for sign in (-1, 1):
+        p = chain.pointer()
+        p.move(cx + sign * start, cy).down().move(cx + sign * end, cy, duration_ms).up()
+    return chain
+
+def rotate(cx: float, cy: float, degrees: float, duration_ms: int = 500, radius: float = 80,
+           steps: int = 8) -> ActionChain:
+    """Two fingers opposite each other around (cx, cy), turning by degrees (clockwise if positive).
+
+    The arc is split into steps straight moves, since a single move would cut the chord.
+    """
+    chain = ActionChain()
+    for offset in (180, 0):
+        p = chain.pointer()
+        for n in range(steps + 1):
+            angle = math.radians(offset + degrees * n / steps)
+            x, y = cx + radius * math.cos(angle), cy + radius * math.sin(angle)
+            if n == 0:
+                p.move(x, y).down()
+            else:
+                p.move(x, y, duration_ms / steps)
+        p.up()
+    return chain
@@ -0,0 +1,187 @@
+import re
+import sys
+from pippin.utils import wda
+
+HANDLE_PREFIX = "@"
+_STATE_KEY = "handles"
+_HANDLE = re.compile(r"@e\d+")
+
+def is_handle(query) -> bool:
+    """True only for handles such as "@e12"; other text starting with "@" is a normal query."""
+    return isinstance(query, str) and _HANDLE.fullmatch(query) is not None
+
+def _parse_frame(frame):
+    if isinstance(frame, dict):
+        return frame
+    try:
+        x, y, w, h = (float(v) for v in str(frame).split(","))
+    except ValueError:
+        return None
+    return {"x": x, "y": y, "width": w, "height": h}
+
+def assign_handles(elements):
+    """Returns (annotated, table): copies of the simplified elements with a "handle"
+    (e1, e2, ... in pre-order) and the table to store for resolving them.
+
+    Elements sharing an id (or role and label) also record their position
+    among those elements ("nth" of "count"), since WDA returns matches in
+    the same tree order. The input is not modified.
+    """
+    table = {}
+    # Lookup key -> handle names, in pre-order
+    shared = {}
+    annotated = []
+    # Each item: (source element, list to append its copy to)
+    stack = [(el, annotated) for el in reversed(elements)]
+    while stack:
+        el, siblings = stack.pop()
+        name = f"e{len(table) + 1}"
+        copy = {"handle": name}
+        copy.update(el)
+        siblings.append(copy)
+        table[name] = {
+            "role": el.get("type"),
+            "id": el.get("id") or None,
+            "label": el.get("label") or None,
+            "frame": _parse_frame(el.get("frame")),
+        }
+        key = _lookup_key(table[name])
+        if key:
+            shared.setdefault(key, []).append(name)
+        children = el.get("children")
+        if children:
+            copy["children"] = []
+            stack.extend((child, copy["children"]) for child in reversed(children))
+    for names in shared.values():
+        if len(names) > 1:
+            for nth, name in enumerate(names):
+                table[name].update({"nth": nth, "count": len(names)})
+    return annotated, table
+
+def _lookup_key(entry):
+    """What _locate searches WDA by: the accessibility id, else role and label."""
+    if entry.get("id"):
+        return ("id", entry["id"])
+    if entry.get("label"):
+        return ("label", entry.get("role"), entry["label"])
+    return None
+
+def save_handles(udid: str, table: dict):
+    from pippin.utils.state import set_device_state
+    set_device_state(udid, _STATE_KEY, table)
+
+def load_handles(udid: str) -> dict:
+    from pippin.utils.state import get_device_state
+    return get_device_state(udid, _STATE_KEY, {}) or {}
+
+def _predicate(entry):
+    clauses = []
+    if entry.get("role"):
+        clauses.append(f"type == 'XCUIElementType{entry['role']}'")
+    if entry.get("label"):
+        label = entry["label"].replace("\\", "\\\\").replace("'", "\\'")
+        clauses.append(f"label == '{label}'")
+    return " AND ".join(clauses)
+
+def _distance(a, b):
+    if not a or not b:
+        return float("inf")
+    return sum(abs(float(a.get(k, 0)) - float(b.get(k, 0))) for k in ("x", "y", "width", "height"))
+
+def _locate(entry):
+    """Finds the handle's element through WDA alone. Returns (wda_id, rect) or (None, None)."""
+    if entry.get("wda_id"):
+        rect = wda.element_rect(entry["wda_id"])
+        if rect:
+            return entry["wda_id"], rect
+
+    if entry.get("id"):
+        ids = wda.find_element_ids("accessibility id", entry["id"])
+    elif entry.get("label"):
+        ids = wda.find_element_ids("predicate string", _predicate(entry))
+    else:
+        return None, None
+
+    # Several elements may share an id or label. WDA lists them in tree
+    # order, so while their number is unchanged the inspected one is at the
+    # same position; otherwise the tree is needed to tell them apart.
+    if len(ids) == 1:
+        element_id = ids[0]
+    elif len(ids) > 1 and entry.get("count") == len(ids):
+        element_id = ids[entry["nth"]]
+    else:
+        return None, None
+    rect = wda.element_rect(element_id)
+    return (element_id, rect) if rect else (None, None)
+
+def _to_element(entry, frame):
+    el = {"role": entry.get("role") or "Unknown", "frame": dict(frame, w=frame.get("width"), h=frame.get("height"))}
+    if entry.get("id"):
+        el["AXIdentifier"] = entry["id"]
+    if entry.get("label"):
+        el["AXLabel"] = entry["label"]
+    return el
+
+def _refresh(entry, silent=False):
+    """Re-matches a stale handle against a fresh tree by role, id and label."""
+    from pippin.utils.ui import get_ui_tree
+    if not silent:
+        print("Handle is stale, refreshing from the UI tree...", file=sys.stderr)
+    candidates = []
+    for el in get_ui_tree(silent=True):
+        if el.get("role") != entry.get("role"):
+            continue
+        if (el.get("AXIdentifier") or None) != entry.get("id") or (el.get("AXLabel") or None) != entry.get("label"):
+            continue
+        candidates.append(el)
+    if not candidates:
+        return None
+    return min(candidates, key=lambda el: _distance(el.get("frame"), entry.get("frame")))
+
+def resolve_handle(query: str, udid: str = None, silent: bool = False, with_value: bool = False):
+    """Returns the element for an @handle from the last inspect, or None.
+
+    The element is located through WDA directly (by its cached WDA id, its
+    accessibility id or a label predicate) without fetching the tree. Only
+    if that fails is the tree fetched to re-match the element. Unlabelled
+    elements cannot be looked up and are served from the inspected frame.
+    With with_value, the element's current AXValue is fetched as well.
+    """
+    from pippin.utils.device import get_target_udid
+
+    udid = udid or get_target_udid()
+    name = query[len(HANDLE_PREFIX):]
+    table = load_handles(udid)
+    entry = table.get(name)
+    if entry is None:
+        if not silent:
+            print(f"Unknown handle '{query}'. Run 'pippin inspect' to get current handles.", file=sys.stderr)
+        return None
+
+    if not entry.get("id") and not entry.get("label"):
+        return _to_element(entry, entry["frame"]) if entry.get("frame") else None
+
+    element_id, rect = None, None
+    try:
+        element_id, rect = _locate(entry)
+    except Exception:
+        pass
+    if rect:
+        el = _to_element(entry, rect)
+    else:
+        el = _refresh(entry, silent)
+        if el is None:
+            return None
+        frame = el.get("frame") or {}
+        rect = {"x": frame.get("x", 0), "y": frame.get("y", 0),
+                "width": frame.get("width", frame.get("w", 0)), "height": frame.get("height", frame.get("h", 0))}
+
+    if with_value and element_id and "AXValue" not in el:
+        value = wda.element_attribute(element_id, "value")
+        if value:
+            el["AXValue"] = value
+
+    if (element_id, rect) != (entry.get("wda_id"), entry.get("frame")):
+        entry.update({"wda_id": element_id, "frame": rect})
+        save_handles(udid, table)
+    return el
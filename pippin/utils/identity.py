@@ -0,0 +1,153 @@
+"""Stable element identity across UI snapshots.
+
+A stable id is derived from what survives scrolling and re-rendering: the
+element's role, its accessibility identifier (or label when it has none)
+and the roles/identifiers of its ancestors. Frames are deliberately left
+out, except to order elements whose keys are otherwise identical.
+
+Between two snapshots, elements with equal ids are the same element. The
+rest (typically relabeled elements, whose key changed) are paired by an
+alignment pass over the document order, and inherit the old id.
+"""
+import hashlib
+from bisect import bisect_left
+from pippin.utils.tree import Visitor, walk
+from pippin.utils.ui import get_rect
+
+_STATE_KEY = "identity"
+
+class IdentityVisitor(Visitor):
+    """Records each node's identity key and ancestor path in pre-order."""
+    def __init__(self):
+        self.records = []
+        self._path = []
+
+    def enter(self, node, depth):
+        role = node.get("role", "")
+        identifier = node.get("AXIdentifier") or ""
+        path = "/".join(self._path)
+        self.records.append({
+            "node": node,
+            "role": role,
+            "id": identifier,
+            "label": node.get("AXLabel") or "",
+            "path": path,
+            "key": f"{path}/{role}:{identifier or node.get('AXLabel') or ''}",
+            "order": len(self.records),
+        })
+        self._path.append(f"{role}#{identifier}" if identifier else role)
+
+    def exit(self, node, depth):
+        self._path.pop()
+
+def _hash(key: str) -> str:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+def _position(record):
+    rect = get_rect(record["node"].get("frame")) or (0, 0, 0, 0)
+    return (rect[1], rect[0], record["order"])
+
+def compute_records(tree) -> list:
+    """Walks a tree and returns one record per node with its computed "sid"."""
+    visitor = IdentityVisitor()
+    walk(tree, [visitor])
+
+    # Grouped by hash rather than key, so two keys that collide still get distinct ids
+    groups = {}
+    for record in visitor.records:
+        groups.setdefault(_hash(record["key"]), []).append(record)
+    for base, members in groups.items():
+        # Identical keys (e.g. repeated unlabelled cells) are told apart by position
+        if len(members) > 1:
+            members = sorted(members, key=lambda record: (record["key"], _position(record)))
+        for n, record in enumerate(members):
+            record["sid"] = base if n == 0 else f"{base}-{n}"
+    return visitor.records
+
+def _anchors(previous: list, current: list, taken: set) -> list:
+    """(previous index, current index) pairs of exact matches in the same relative order.
+
+    This is the longest increasing run of previous positions over the
+    current order, so an element that moved does not cut the alignment.
+    """
+    position = {r["sid"]: i for i, r in enumerate(previous) if r["sid"] in taken}
+    pairs = [(position[r["sid"]], j) for j, r in enumerate(current) if r["sid"] in taken]
+    tails, tail_at, parent = [], [], [None] * len(pairs)
+    for k, (i, _) in enumerate(pairs):
+        n = bisect_left(tails, i)
+        parent[k] = tail_at[n - 1] if n else None
+        if n == len(tails):
+            tails.append(i)
+            tail_at.append(k)
+        else:
+            tails[n] = i
+            tail_at[n] = k
+    chain = []
+    k = tail_at[-1] if tail_at else None
+    while k is not None:
+        chain.append(pairs[k])
+        k = parent[k]
+    return chain[::-1]
+
+def match_records(previous: list, current: list) -> int:
+    """Carries ids over from the previous snapshot's records into current ones.
+
+    Exact id matches are kept and act as anchors. Between two consecutive
+    anchors, unmatched elements are paired in document order on (role,
+    ancestor path, identifier), so an unmatched element is only paired
+    with one in the same slot (e.g. a cell whose label changed, but not a
+    cell that scrolled away with one that scrolled in). This is linear in
+    the number of elements, apart from an n log n pass to order anchors.
+    Returns how many ids were carried over by alignment.
+    """
+    previous_sids = {r["sid"] for r in previous}
+    taken = {r["sid"] for r in current if r["sid"] in previous_sids}
+    if len(taken) == len(current):
+        return 0
+
+    def token(r):
+        return (r["role"], r["path"], r["id"])
+
+    carried = 0
+    bounds = [(-1, -1)] + _anchors(previous, current, taken) + [(len(previous), len(current))]
+    for (pa, ca), (pb, cb) in zip(bounds, bounds[1:]):
+        waiting = {}
+        for old in previous[pa + 1:pb]:
+            if old["sid"] not in taken:
+                waiting.setdefault(token(old), []).append(old)
+        if not waiting:
+            continue
+        for new in current[ca + 1:cb]:
+            candidates = waiting.get(token(new))
+            if new["sid"] in taken or not candidates:
+                continue
+            old = candidates.pop(0)
+            new["sid"] = old["sid"]
+            taken.add(old["sid"])
+            carried += 1
+    return carried
+
+def _stored(records):
+    return [{"sid": r["sid"], "role": r["role"], "id": r["id"], "label": r["label"], "path": r["path"]}
+            for r in records]
+
+def assign_stable_ids(tree, udid: str = None, previous: list = None) -> list:
+    """Sets "id_stable" on every node of tree and returns the records to keep.
+
+    With a udid, the previous snapshot's records are loaded from (and the
+    new ones saved to) the device state, so ids persist across commands.
+    """
+    from pippin.utils.state import get_device_state, set_device_state
+
+    records = compute_records(tree)
+    if previous is None and udid:
+        previous = get_device_state(udid, _STATE_KEY)
+    if previous:
+        match_records(previous, records)
+    for record in records:
+        record["node"]["id_stable"] = record["sid"]
+
+    stored = _stored(records)
+    if udid:
+        set_device_state(udid, _STATE_KEY, stored)
+    return stored
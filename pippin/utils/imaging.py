@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import io
+from pippin.utils import wda
+
+def capture_screenshot(udid: str) -> bytes:
+    """Returns the current screen as PNG bytes, without touching the disk.
+
+    WDA's screenshot endpoint is tried first since it is usually already
+    running; otherwise simctl streams the PNG to stdout.
+    """
+    try:
+        data = wda.screenshot()
+        if data:
+            return data
+    except Exception:
+        pass
+
+    from pippin.utils.executor import execute_command
+    return execute_command(["xcrun", "simctl", "io", udid, "screenshot", "--type=png", "-"], binary=True)
+
+def _require_pillow():
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("Image processing requires Pillow. Install it with: pip install 'pippin-ios[images]'")
+    return Image
+
+def load_image(data: bytes):
+    Image = _require_pillow()
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+def process_image(data: bytes, max_dim: int = None, crop: tuple = None, grayscale: bool = False,
+                  fmt: str = "png", quality: int = None, scale: float = 1.0):
+    """Crop, downscale and re-encode a PNG screenshot in memory.
+
+    crop is an (x, y, w, h) rect in points; scale converts points to pixels.
+    Returns (bytes, width, height). When no option applies, the original
+    PNG bytes are returned untouched and Pillow is not required.
+    """
+    if not (max_dim or crop or grayscale or fmt != "png" or quality):
+        return data, None, None
+
+    img = load_image(data)
+    if crop:
+        x, y, w, h = (v * scale for v in crop)
+        left = max(0, int(round(x)))
+        top = max(0, int(round(y)))
+        right = min(img.width, int(round(x + w)))
+        bottom = min(img.height, int(round(y + h)))
+        if right <= left or bottom <= top:
+            raise ValueError(f"Crop rect {crop} lies outside the screenshot.")
+        img = img.crop((left, top, right, bottom))
+
+    if grayscale:
+        img = img.convert("L")
+
+    if max_dim and max(img.width, img.height) > max_dim:
+        img.thumbnail((max_dim, max_dim))
+
+    out = io.BytesIO()
+    if fmt == "jpeg":
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(out, format="JPEG", quality=quality or 75)
+    else:
+        img.save(out, format="PNG", optimize=True)
+    return out.getvalue(), img.width, img.height
+
+def to_base64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Screen change detection requires numpy. Install it with: pip install 'pippin-ios[images]'")
+    return numpy
+
+def _dhash(img, hash_size: int):
+    np = _require_numpy()
+    Image = _require_pillow()
+    img = img.convert("L")
+    # reduce() is a cheap box filter; it gets us near the target before resizing
+    factor = max(1, min(img.width // (hash_size + 1), img.height // hash_size) // 4)
+    if factor > 1:
+        img = img.reduce(factor)
+    img = img.resize((hash_size + 1, hash_size), Image.BILINEAR)
+    px = np.asarray(img, dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def perceptual_hash(data: bytes, hash_size: int = 8) -> int:
+    """Difference hash of a screenshot: one bit per horizontal gradient sign.
+
+    The image is shrunk to (hash_size + 1) x hash_size grayscale pixels, so the
+    hash ignores compression noise and tiny changes but flips when content moves.
+    """
+    return _dhash(load_image(data), hash_size)
+
+def screen_signature(data: bytes, hash_size: int = 8):
+    """Returns (perceptual hash, digest of the exact pixels) from one decode."""
+    img = load_image(data)
+    return _dhash(img, hash_size), hashlib.blake2b(img.tobytes(), digest_size=16).hexdigest()
+
+def hash_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def detect_screen_change(udid: str, threshold: int = 2):
+    """Compare the screen with the last signature stored for the device.
+
+    A hash distance above threshold is a change. Below it the hash cannot
+    tell a small, localized change (a toggled switch, one edited digit)
+    from none, so the exact pixels decide.
+
+    Returns True/False, or None if the signature could not be computed
+    (missing optional dependencies or no screenshot). The new signature is
+    always stored.
+    """
+    from pippin.utils.state import get_device_state, set_device_state
+
+    try:
+        current, pixels = screen_signature(capture_screenshot(udid))
+    except Exception:
+        return None
+
+    previous = get_device_state(udid, "screen_hash")
+    previous_pixels = get_device_state(udid, "screen_pixels")
+    set_device_state(udid, "screen_hash", format(current, "x"))
+    set_device_state(udid, "screen_pixels", pixels)
+    if previous is None:
+        return True
+    if hash_distance(current, int(previous, 16)) > threshold:
+        return True
+    return pixels != previous_pixels
@@ -0,0 +1,299 @@
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+from collections import deque
+from pippin.utils.executor import execute_command, with_device_set
+
+DEFAULT_CAPACITY = 5000
+_FLUSH_INTERVAL = 0.5
+
+def _spool_file(udid: str) -> str:
+    return f"/tmp/pippin_logs_{udid}.log"
+
+def _pid_file(udid: str) -> str:
+    return f"/tmp/pippin_logs_{udid}.pid"
+
+def get_app_pid(udid: str, bundle_id: str):
+    """Returns the pid of the app's process in the simulator, or None."""
+    try:
+        output = execute_command(["xcrun", "simctl", "spawn", udid, "launchctl", "list"], check=False)
+    except Exception:
+        return None
+    marker = f"UIKitApplication:{bundle_id}["
+    for line in (output or "").splitlines():
+        parts = line.split("\t")
+        if len(parts) == 3 and parts[2].startswith(marker):
+            try:
+                return int(parts[0])
+            except ValueError:
+                return None
+    return None
+
+def log_predicate(bundle_id: str, pid: int = None) -> str:
+    predicate = f"subsystem == \"{bundle_id}\""
+    if pid:
+        # Plain print/NSLog output has no subsystem; the pid catches it
+        predicate = f"processID == {pid} OR {predicate}"
+    return predicate
+
+def _cursor_key(bundle_id: str) -> str:
+    return f"log_cursor:{bundle_id}"
+
+def get_log_cursor(udid: str, bundle_id: str):
+    """Returns the timestamp of the last log entry already returned, or None."""
+    from pippin.utils.state import get_device_state
+    return get_device_state(udid, _cursor_key(bundle_id))
+
+def set_log_cursor(udid: str, bundle_id: str, timestamp: str):
+    from pippin.utils.state import set_device_state
+    set_device_state(udid, _cursor_key(bundle_id), timestamp)
+
+def log_show_command(udid: str, bundle_id: str, pid: int = None, cursor: str = None, window: str = "5m"):
+    """Builds the `log show` invocation, starting at the cursor when there is one."""
+    cmd = ["xcrun", "simctl", "spawn", udid, "log", "show", "--style", "compact",
+           "--predicate", log_predicate(bundle_id, pid)]
+    if cursor:
+        # --start has one-second resolution; finer filtering happens in new_entries()
+        cmd.extend(["--start", cursor[:19]])
+    else:
+        cmd.extend(["--last", window])
+    return cmd
+
+def entry_timestamp(line: str):
+    """Returns the leading 'YYYY-MM-DD HH:MM:SS.fff' timestamp of a compact log line, or None."""
+    if len(line) >= 19 and line[4] == "-" and line[10] == " " and line[13] == ":":
+        date, time_of_day = line.split(" ", 2)[:2]
+        return f"{date} {time_of_day}"
+    return None
+
+def new_entries(lines, cursor: str = None, last_seen: dict = None):
+    """Yields lines newer than cursor, keeping continuation lines with their entry.
+
+    Header lines are dropped. If last_seen is a dict, the timestamp of the last
+    yielded entry is stored under "timestamp".
+    """
+    keep = False
+    for line in lines:
+        ts = entry_timestamp(line)
+        if ts is None:
+            # Continuation of a multi-line message, or the column header
+            if keep and not line.startswith("Timestamp"):
+                yield line
+            continue
+        keep = cursor is None or ts > cursor
+        if keep:
+            if last_seen is not None:
+                last_seen["timestamp"] = ts
+            yield line
+
+# Compact-style level codes, in increasing severity
+LEVELS = {"Db": "debug", "I": "info", "Df": "default", "A": "activity", "E": "error", "F": "fault"}
+LEVEL_ORDER = ["debug", "info", "default", "activity", "error", "fault"]
+
+def parse_compact_line(line: str):
+    """Parses one compact-style entry into {time, level, process, category, message}.
+
+    Returns None for lines that do not start an entry (headers, continuations).
+    """
+    ts = entry_timestamp(line)
+    if ts is None:
+        return None
+    parts = line[len(ts):].split(None, 2)
+    record = {"time": ts, "level": LEVELS.get(parts[0], parts[0]) if parts else "default"}
+    if len(parts) > 1:
+        record["process"] = parts[1].split("[", 1)[0]
+    rest = parts[2] if len(parts) > 2 else ""
+    if rest.startswith("[") and "]" in rest:
+        tag, rest = rest[1:].split("]", 1)
+        record["category"] = tag.split(":", 1)[-1]
+    record["message"] = rest.strip()
+    return record
+
+def _below(level: str, min_rank: int) -> bool:
+    return level in LEVEL_ORDER and LEVEL_ORDER.index(level) < min_rank
+
+def filter_level(lines, min_level: str = None):
+    """Yields the lines of entries at min_level or above, with their continuation lines."""
+    min_rank = LEVEL_ORDER.index(min_level) if min_level in LEVEL_ORDER else 0
+    keep = True
+    for line in lines:
+        record = parse_compact_line(line)
+        if record is not None:
+            keep = not _below(record["level"], min_rank)
+        if keep:
+            yield line
+
+def summarize_logs(lines, min_level: str = None, max_entries: int = None, max_tokens: int = None,
+                   last_seen: dict = None):
+    """Collapses a stream of compact log lines into deduplicated records.
+
+    Lines are consumed one at a time; memory grows only with the number of
+    distinct messages kept. Repeats of a kept message bump its count. Once
+    max_entries or max_tokens (estimated at 4 characters per token) is
+    reached, further new messages are counted as dropped.
+
+    If last_seen is a dict, the timestamp of the last entry read before the
+    first dropped one is stored under "timestamp", so a cursor set from it
+    never skips an entry that was not reported.
+    """
+    min_rank = LEVEL_ORDER.index(min_level) if min_level in LEVEL_ORDER else 0
+    kept = {}
+    summary = {"total": 0, "dropped": 0}
+    budget = {"tokens": 0}
+
+    def finish(record):
+        if record is None:
+            return
+        level = record["level"]
+        if _below(level, min_rank):
+            seen(record)
+            return
+        summary["total"] += 1
+        key = (level, record.get("category"), record["message"])
+        if key in kept:
+            kept[key]["count"] += 1
+            kept[key]["last"] = record["time"]
+            seen(record)
+            return
+        cost = len(record["message"]) // 4 + 8
+        if (max_entries is not None and len(kept) >= max_entries) or \
+                (max_tokens is not None and budget["tokens"] + cost > max_tokens):
+            summary["dropped"] += 1
+            return
+        budget["tokens"] += cost
+        record["count"] = 1
+        kept[key] = record
+        seen(record)
+
+    def seen(record):
+        if last_seen is not None and not summary["dropped"]:
+            last_seen["timestamp"] = record["time"]
+
+    pending = None
+    for line in lines:
+        record = parse_compact_line(line)
+        if record is not None:
+            finish(pending)
+            pending = record
+        elif pending is not None and line.strip() and not line.startswith("Timestamp"):
+            pending["message"] += "\n" + line.rstrip()
+    finish(pending)
+
+    entries = []
+    for record in kept.values():
+        if record["count"] == 1:
+            del record["count"]
+        elif record.get("last") == record["time"]:
+            del record["last"]
+        entries.append(record)
+    summary["entries"] = entries
+    return summary
+
+def collector_pid(udid: str):
+    """Returns the pid of the running log collector for udid, or None."""
+    try:
+        with open(_pid_file(udid), "r") as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (IOError, ValueError, OSError):
+        return None
+
+def start_collector(udid: str, bundle_id: str, capacity: int = DEFAULT_CAPACITY):
+    """Spawns a detached collector that streams the app's logs into a ring buffer."""
+    pid = collector_pid(udid)
+    if pid:
+        return pid
+    try:
+        os.unlink(_spool_file(udid))
+    except OSError:
+        pass
+    process = subprocess.Popen(
+        [sys.executable, "-m", "pippin.utils.logs", "collect", udid, bundle_id, str(capacity)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    with open(_pid_file(udid), "w") as f:
+        f.write(str(process.pid))
+    return process.pid
+
+def stop_collector(udid: str) -> bool:
+    pid = collector_pid(udid)
+    if pid:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+    for path in (_pid_file(udid), _spool_file(udid)):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return pid is not None
+
+def read_buffer(udid: str, lines: int = None):
+    """Returns the buffered log lines (the last `lines` of them), or None if no collector runs."""
+    if not collector_pid(udid):
+        return None
+    try:
+        with open(_spool_file(udid), "r") as f:
+            buffered = deque(f, maxlen=lines) if lines else list(f)
+    except IOError:
+        return []
+    return [line.rstrip("\n") for line in buffered]
+
+def _flush(buffer, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.writelines(line if line.endswith("\n") else line + "\n" for line in buffer)
+    os.replace(tmp, path)
+
+def run_collector(udid: str, bundle_id: str, capacity: int = DEFAULT_CAPACITY):
+    """Attach `log stream` and keep the newest `capacity` lines in the spool file."""
+    pid = get_app_pid(udid, bundle_id)
+    stream = subprocess.Popen(
+        with_device_set(["xcrun", "simctl", "spawn", udid, "log", "stream", "--style", "compact",
+                         "--predicate", log_predicate(bundle_id, pid)]),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+
+    def handle_term(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, handle_term)
+
+    buffer = deque(maxlen=capacity)
+    path = _spool_file(udid)
+    lock = threading.Lock()
+    state = {"dirty": False}
+
+    def flusher():
+        # Flush on a timer so a quiet stream still publishes its last lines
+        while True:
+            time.sleep(_FLUSH_INTERVAL)
+            with lock:
+                if state["dirty"]:
+                    _flush(buffer, path)
+                    state["dirty"] = False
+
+    threading.Thread(target=flusher, daemon=True).start()
+    try:
+        for line in stream.stdout:
+            with lock:
+                buffer.append(line)
+                state["dirty"] = True
+        # The stream ended on its own (e.g. simulator shut down): publish the tail
+        with lock:
+            _flush(buffer, path)
+    finally:
+        stream.terminate()
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "collect":
+        run_collector(sys.argv[2], sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_CAPACITY)
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import fcntl
+from contextlib import contextmanager
+from pathlib import Path
+from pippin.utils.executor import execute_command
+
+POOL_DIR = Path.home() / ".pippin"
+POOL_FILE = POOL_DIR / "pool.json"
+BASE_PORT = 8101
+
+FREE = "free"
+LEASED = "leased"
+RESETTING = "resetting"
+
+@contextmanager
+def locked_pool():
+    """Yields the pool dict under an exclusive lock and writes it back on exit.
+
+    Several pippin processes (e.g. parallel shard workers) lease devices at
+    the same time, so every read-modify-write goes through this lock.
+    """
+    POOL_DIR.mkdir(parents=True, exist_ok=True)
+    with open(str(POOL_FILE) + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            pool = load_pool()
+            yield pool
+            tmp = str(POOL_FILE) + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(pool, f, indent=2)
+            os.replace(tmp, POOL_FILE)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def load_pool() -> dict:
+    try:
+        with open(POOL_FILE, "r") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {"golden": None, "device_set": None, "devices": []}
+
+def _simctl(device_set, *args):
+    cmd = ["xcrun", "simctl"]
+    if device_set:
+        cmd += ["--set", device_set]
+    return cmd + list(args)
+
+def _clone(golden: str, name: str, device_set: str = None) -> str:
+    """Clones the golden simulator (which must be shut down) and returns the new udid."""
+    cmd = ["xcrun", "simctl", "clone", golden, name]
+    if device_set:
+        cmd.append(device_set)
+    return execute_command(cmd).strip()
+
+def _bring_up(udid: str, port: int, device_set: str = None):
+    """Boots a clone, waits for it to finish booting and starts WDA on port."""
+    from pippin.utils import wda
+
+    execute_command(_simctl(device_set, "boot", udid), check=False)
+    execute_command(_simctl(device_set, "bootstatus", udid, "-b"))
+    if not wda.start_wda(udid, port=port, device_set=device_set):
+        raise RuntimeError(f"WebDriverAgent did not start on {udid} (port {port}).")
+
+def _discard(udid: str, device_set: str = None):
+    """Shuts down and deletes a clone, ignoring failures (it may already be gone)."""
+    execute_command(_simctl(device_set, "shutdown", udid), check=False)
+    execute_command(_simctl(device_set, "delete", udid), check=False)
+
+def create_pool(golden: str, size: int, isolated: bool = False) -> dict:
+    """Clones golden `size` times, boots the clones and starts one WDA per clone.
+
+    With isolated=True the clones live in their own device set under
+    ~/.pippin/pool-set, so they do not contend with Xcode or other tools
+    for the default CoreSimulator set.
+    """
+    # The pool is claimed under the lock, but cloning and booting run
+    # unlocked so leases and status checks are not blocked meanwhile
+    with locked_pool() as pool:
+        if pool["devices"] or pool.get("creating"):
+            raise ValueError("A pool already exists. Destroy it first with: pippin pool destroy")
+        pool["creating"] = True
+
+    device_set = None
+    devices = []
+    try:
+        if isolated:
+            device_set = str(POOL_DIR / "pool-set")
+            os.makedirs(device_set, exist_ok=True)
+
+        # simctl clone requires the source to be shut down
+        execute_command(["xcrun", "simctl", "shutdown", golden], check=False)
+        for i in range(size):
+            udid = _clone(golden, f"pippin-pool-{i + 1}", device_set)
+            devices.append({"udid": udid, "name": f"pippin-pool-{i + 1}", "port": BASE_PORT + i,
+                            "status": FREE, "lease": None})
+
+        # Boots overlap: start them all first, then wait for each
+        for device in devices:
+            execute_command(_simctl(device_set, "boot", device["udid"]), check=False)
+        for device in devices:
+            _bring_up(device["udid"], device["port"], device_set)
+    except BaseException:
+        # The clones made so far are not in pool.json, so destroy_pool could never remove them
+        for device in devices:
+            _discard(device["udid"], device_set)
+        with locked_pool() as pool:
+            pool.pop("creating", None)
+        raise
+
+    with locked_pool() as pool:
+        pool.pop("creating", None)
+        pool.update({"golden": golden, "device_set": device_set, "devices": devices})
+        return pool
+
+def lease_device(owner: str = None, timeout: float = 0) -> dict:
+    """Marks a free device as leased and returns it, waiting up to timeout seconds.
+
+    Returns None when the pool has no free device in time.
+    """
+    deadline = time.time() + timeout
+    while True:
+        with locked_pool() as pool:
+            if not pool["devices"]:
+                raise ValueError("No pool exists. Create one with: pippin pool create --golden <udid> --size N")
+            for device in pool["devices"]:
+                if device["status"] == FREE:
+                    device["status"] = LEASED
+                    device["lease"] = {"owner": owner, "since": time.time()}
+                    return _lease_info(device, pool)
+        if time.time() >= deadline:
+            return None
+        time.sleep(1)
+
+def _lease_info(device: dict, pool: dict) -> dict:
+    return {"udid": device["udid"], "port": device["port"], "device_set": pool.get("device_set"),
+            "wda_url": f"http://localhost:{device['port']}"}
+
+def return_device(udid: str, reset: bool = True) -> dict:
+    """Releases a lease. With reset, the clone is replaced by a fresh clone of golden.
+
+    Re-cloning (rather than erasing) keeps whatever was baked into the golden
+    simulator; the device gets a new udid but keeps its WDA port. If the
+    fresh clone cannot be made or brought up, the device leaves the pool.
+    """
+    with locked_pool() as pool:
+        device = _find(pool, udid)
+        if device is None:
+            raise ValueError(f"{udid} is not part of the pool.")
+        device_set = pool.get("device_set")
+        golden = pool["golden"]
+        if not reset:
+            device["status"] = FREE
+            device["lease"] = None
+            return _lease_info(device, pool)
+        device["status"] = RESETTING
+
+    # The slow part runs unlocked so other leases are not blocked
+    _discard(udid, device_set)
+    new_udid = None
+    try:
+        new_udid = _clone(golden, device["name"], device_set)
+        _bring_up(new_udid, device["port"], device_set)
+    except BaseException:
+        if new_udid:
+            _discard(new_udid, device_set)
+        # The old udid no longer exists, so the entry could never be leased again
+        with locked_pool() as pool:
+            pool["devices"] = [d for d in pool["devices"] if d["udid"] != udid]
+        raise
+
+    with locked_pool() as pool:
+        device = _find(pool, udid)
+        if device is None:
+            # The pool was destroyed while the clone was being made
+            _discard(new_udid, device_set)
+            raise ValueError(f"{udid} left the pool while it was being reset.")
+        device.update({"udid": new_udid, "status": FREE, "lease": None})
+        return _lease_info(device, pool)
+
+def destroy_pool() -> int:
+    with locked_pool() as pool:
+        device_set = pool.get("device_set")
+        for device in pool["devices"]:
+            _discard(device["udid"], device_set)
+        count = len(pool["devices"])
+        pool.pop("creating", None)
+        pool.update({"golden": None, "device_set": None, "devices": []})
+        return count
+
+def _find(pool: dict, udid: str):
+    for device in pool["devices"]:
+        if device["udid"] == udid:
+            return device
+    return None
+
+def find_lease(udid: str):
+    """Returns the lease info for a pool device, or None if udid is not in the pool."""
+    pool = load_pool()
+    device = _find(pool, udid)
+    return _lease_info(device, pool) if device else None
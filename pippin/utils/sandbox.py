@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+from fnmatch import fnmatch
+
+def walk(root: str, max_depth: int = None, max_entries: int = None, pattern: str = None):
+    """Lists a directory tree in-process with os.scandir.
+
+    Returns (entries, truncated). Each entry is {path, type, size, mtime} with
+    path relative to root. Directories deeper than max_depth are not opened.
+    With a glob pattern (matched against the name or the relative path), only
+    matching files are returned, but all directories are still searched.
+    """
+    entries = []
+    stack = _children(root, "", 0)
+    while stack:
+        rel, item, depth = stack.pop()
+        try:
+            is_dir = item.is_dir(follow_symlinks=False)
+            st = item.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir and (max_depth is None or depth < max_depth):
+            stack.extend(_children(root, rel, depth + 1))
+        if pattern and (is_dir or not (fnmatch(item.name, pattern) or fnmatch(rel, pattern))):
+            continue
+        if max_entries is not None and len(entries) >= max_entries:
+            return entries, True
+        entries.append({
+            "path": rel + "/" if is_dir else rel,
+            "type": "dir" if is_dir else "file",
+            "size": 0 if is_dir else st.st_size,
+            "mtime": st.st_mtime,
+        })
+    return entries, False
+
+def _children(root: str, rel_dir: str, depth: int):
+    """Returns a directory's entries as stack items, reversed so they pop in name order."""
+    try:
+        with os.scandir(os.path.join(root, rel_dir)) as it:
+            items = sorted(it, key=lambda e: e.name, reverse=True)
+    except OSError:
+        return []
+    return [(os.path.join(rel_dir, item.name) if rel_dir else item.name, item, depth) for item in items]
+
+def fingerprints(entries) -> dict:
+    """Maps each file path to [size, mtime] for snapshot comparison."""
+    return {e["path"]: [e["size"], e["mtime"]] for e in entries if e["type"] == "file"}
+
+def diff_fingerprints(old: dict, new: dict) -> dict:
+    return {
+        "added": sorted(p for p in new if p not in old),
+        "removed": sorted(p for p in old if p not in new),
+        "changed": sorted(p for p in new if p in old and new[p] != old[p]),
+    }
+
+def _snapshot_file(udid: str, key: str) -> str:
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return f"/tmp/pippin_tree_{udid}_{digest}.json"
+
+def load_snapshot(udid: str, key: str):
+    try:
+        with open(_snapshot_file(udid, key), "r") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+def save_snapshot(udid: str, key: str, prints: dict):
+    try:
+        with open(_snapshot_file(udid, key), "w") as f:
+            json.dump(prints, f)
+    except IOError:
+        pass
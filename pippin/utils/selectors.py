@@ -0,0 +1,242 @@
+"""A small selector language for scoping element queries.
+
+Queries starting with "sel:" are selectors rather than label/id text:
+
+    sel:Button#login                     role and accessibility id
+    sel:NavigationBar Button             a Button anywhere inside a NavigationBar
+    sel:Cell > StaticText[label*=total]  a StaticText that is a direct child of a Cell
+    sel:Cell[label=~^Order \\d+$]:nth(2)  the third matching Cell (0-based, -1 is the last)
+
+A compound is an optional role ("*" for any), an optional "#id" and any
+number of [attr op value] filters on label, id, value or role. Operators:
+"=" exact (case-insensitive except for id), "*=" contains and "^=" prefix
+(both case-insensitive), "=~" regular expression. Values may be quoted
+(and must be when they contain "]").
+Whitespace between compounds means descendant, ">" means child.
+
+Selectors compile once into matcher functions, cached by selector string.
+"""
+import re
+from functools import lru_cache
+from pippin.utils.tree import Visitor, walk
+
+SELECTOR_PREFIX = "sel:"
+
+_ATTRIBUTES = {
+    "label": "AXLabel",
+    "id": "AXIdentifier",
+    "value": "AXValue",
+    "role": "role",
+    "type": "role",
+}
+_OPERATORS = ("*=", "^=", "=~", "=")
+_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_NTH = re.compile(r":nth\(\s*(-?\d+)\s*\)\s*$")
+
+class SelectorError(ValueError):
+    pass
+
+def is_selector(query) -> bool:
+    return isinstance(query, str) and query.startswith(SELECTOR_PREFIX)
+
+def _norm_role(role):
+    return (role or "").lower().replace("ax", "")
+
+def _attribute_test(attr, op, value):
+    key = _ATTRIBUTES[attr]
+    if key == "role":
+        def get(node):
+            return _norm_role(node.get("role") or node.get("type"))
+        value = _norm_role(value)
+    else:
+        def get(node):
+            return str(node.get(key) or "")
+
+    if op == "=~":
+        try:
+            pattern = re.compile(value)
+        except re.error as e:
+            raise SelectorError(f"Invalid regular expression '{value}': {e}")
+        return lambda node: pattern.search(get(node)) is not None
+    if op == "=" and key == "AXIdentifier":
+        return lambda node: get(node) == value
+    lowered = value.lower()
+    if op == "=":
+        return lambda node: get(node).lower() == lowered
+    if op == "*=":
+        return lambda node: lowered in get(node).lower()
+    return lambda node: get(node).lower().startswith(lowered)
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def error(self, message):
+        return SelectorError(f"{message} at position {self.pos} in selector '{self.text}'")
+
+    def peek(self):
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def skip_space(self):
+        start = self.pos
+        while self.peek().isspace():
+            self.pos += 1
+        return self.pos > start
+
+    def name(self):
+        m = _NAME.match(self.text, self.pos)
+        if not m:
+            raise self.error("Expected a name")
+        self.pos = m.end()
+        return m.group(0)
+
+    def until(self, stops):
+        start = self.pos
+        while self.peek() and self.peek() not in stops:
+            self.pos += 1
+        return self.text[start:self.pos]
+
+    def value(self):
+        quote = self.peek()
+        if quote in ("'", '"'):
+            end = self.text.find(quote, self.pos + 1)
+            if end < 0:
+                raise self.error("Unterminated string")
+            value = self.text[self.pos + 1:end]
+            self.pos = end + 1
+            return value
+        return self.until("]").strip()
+
+    def compound(self):
+        tests = []
+        if self.peek() == "*":
+            self.pos += 1
+            tests.append(lambda node: True)
+        elif _NAME.match(self.text, self.pos):
+            role = _norm_role(self.name())
+            tests.append(lambda node: _norm_role(node.get("role") or node.get("type")) == role)
+        if self.peek() == "#":
+            self.pos += 1
+            identifier = self.until(" \t>[:#")
+            if not identifier:
+                raise self.error("Expected an id after '#'")
+            tests.append(lambda node: node.get("AXIdentifier") == identifier)
+        while self.peek() == "[":
+            self.pos += 1
+            self.skip_space()
+            attr = self.name().lower()
+            if attr not in _ATTRIBUTES:
+                raise self.error(f"Unknown attribute '{attr}'")
+            self.skip_space()
+            op = next((o for o in _OPERATORS if self.text.startswith(o, self.pos)), None)
+            if op is None:
+                raise self.error("Expected one of " + ", ".join(_OPERATORS))
+            self.pos += len(op)
+            self.skip_space()
+            tests.append(_attribute_test(attr, op, self.value()))
+            self.skip_space()
+            if self.peek() != "]":
+                raise self.error("Expected ']'")
+            self.pos += 1
+        if not tests:
+            raise self.error("Expected a role, '*', '#id' or '[...]'")
+        if len(tests) == 1:
+            return tests[0]
+        return lambda node: all(test(node) for test in tests)
+
+    def parse(self):
+        compounds, combinators = [], []
+        self.skip_space()
+        compounds.append(self.compound())
+        while self.pos < len(self.text):
+            spaced = self.skip_space()
+            if not self.peek():
+                break
+            if self.peek() == ">":
+                self.pos += 1
+                self.skip_space()
+                combinators.append(">")
+            elif spaced:
+                combinators.append(" ")
+            else:
+                raise self.error(f"Unexpected '{self.peek()}'")
+            compounds.append(self.compound())
+        return compounds, combinators
+
+class Selector:
+    def __init__(self, text: str, compounds: list, combinators: list, nth: int = None):
+        self.text = text
+        self.compounds = compounds
+        self.combinators = combinators
+        self.nth = nth
+
+    def matches(self, node, ancestors) -> bool:
+        """True if node (whose ancestors are listed root first) matches, ignoring :nth."""
+        if not self.compounds[-1](node):
+            return False
+        return self._match_ancestors(len(self.compounds) - 2, len(ancestors), ancestors)
+
+    def _match_ancestors(self, ci, limit, ancestors):
+        # compounds[ci] must match an ancestor above index limit, as its combinator requires
+        if ci < 0:
+            return True
+        test = self.compounds[ci]
+        if self.combinators[ci] == ">":
+            k = limit - 1
+            return k >= 0 and test(ancestors[k]) and self._match_ancestors(ci - 1, k, ancestors)
+        for k in range(limit - 1, -1, -1):
+            if test(ancestors[k]) and self._match_ancestors(ci - 1, k, ancestors):
+                return True
+        return False
+
+    def pick(self, matches: list) -> list:
+        """Applies :nth to the matches (in document order)."""
+        if self.nth is None:
+            return matches
+        try:
+            return [matches[self.nth]]
+        except IndexError:
+            return []
+
+@lru_cache(maxsize=256)
+def compile_selector(text: str) -> Selector:
+    """Compiles a selector (with or without the "sel:" prefix). Raises SelectorError."""
+    body = text[len(SELECTOR_PREFIX):] if text.startswith(SELECTOR_PREFIX) else text
+    nth = None
+    m = _NTH.search(body)
+    if m:
+        nth = int(m.group(1))
+        body = body[:m.start()]
+    if not body.strip():
+        raise SelectorError(f"Empty selector '{text}'")
+    compounds, combinators = _Parser(body).parse()
+    return Selector(text, compounds, combinators, nth)
+
+class SelectVisitor(Visitor):
+    """Collects the nodes matching a selector, tracking each node's ancestors."""
+    def __init__(self, selector: Selector):
+        self.selector = selector
+        self.matches = []
+        self._path = []
+
+    def enter(self, node, depth):
+        if self.selector.matches(node, self._path):
+            self.matches.append(node)
+        self._path.append(node)
+
+    def exit(self, node, depth):
+        self._path.pop()
+
+def select(tree, query, include=None) -> list:
+    """Returns the nodes of tree (nested or flat) matching a selector, in document order.
+
+    include filters the matches before :nth picks among them.
+    """
+    selector = compile_selector(query) if isinstance(query, str) else query
+    visitor = SelectVisitor(selector)
+    walk(tree, [visitor])
+    matches = visitor.matches
+    if include is not None:
+        matches = [node for node in matches if include(node)]
+    return selector.pick(matches)
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import time
+import queue
+import shlex
+import threading
+import subprocess
+
+SCRIPT_EXTENSIONS = (".pippin", ".txt")
+
+def load_scenarios(directory: str) -> list:
+    """Returns the script files in directory, sorted by name."""
+    names = sorted(n for n in os.listdir(directory) if n.endswith(SCRIPT_EXTENSIONS))
+    return [os.path.join(directory, n) for n in names]
+
+def parse_script(path: str) -> list:
+    """Returns the steps of a script: one pippin command per line, '#' starts a comment.
+
+    A leading 'pippin' word is optional, so scripts can be run by hand too.
+    """
+    steps = []
+    with open(path, "r") as f:
+        for number, line in enumerate(f, 1):
+            words = shlex.split(line, comments=True)
+            if words and words[0] == "pippin":
+                words = words[1:]
+            if words:
+                steps.append((number, words))
+    return steps
+
+def order_longest_first(scenarios: list, history: dict) -> list:
+    """Sorts scenarios by their previous duration, longest first, unknown ones first of all.
+
+    Starting long scenarios early keeps one straggler from dominating the
+    wall time; the queue then hands short ones to whichever device frees up.
+    """
+    return sorted(scenarios, key=lambda p: -history.get(os.path.basename(p), float("inf")))
+
+def run_scenario(path: str, udid: str, step_timeout: float = 120) -> dict:
+    """Runs a script's steps in order against udid, stopping at the first failure."""
+    name = os.path.basename(path)
+    result = {"scenario": name, "device": udid, "status": "passed", "steps": 0}
+    start = time.time()
+    for number, words in parse_script(path):
+        cmd = [sys.executable, "-m", "pippin.main", "--device", udid] + words
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=step_timeout)
+            code, error = proc.returncode, proc.stderr.strip()
+        except subprocess.TimeoutExpired:
+            code, error = None, f"Step timed out after {step_timeout}s"
+        result["steps"] += 1
+        if code != 0:
+            result.update({"status": "failed", "line": number, "command": " ".join(words),
+                           "exit_code": code, "error": error.splitlines()[-1] if error else ""})
+            break
+    result["duration"] = round(time.time() - start, 2)
+    return result
+
+def run_shards(scenarios: list, devices: list, on_result=None, step_timeout: float = 120) -> dict:
+    """Runs scenarios across devices with one worker thread per device.
+
+    Workers pull from a shared queue, so a device that finishes early takes
+    the next scenario instead of idling (work stealing). on_result is called
+    with each scenario's result as soon as it finishes.
+    """
+    work = queue.Queue()
+    for path in scenarios:
+        work.put(path)
+    results = []
+    busy = {udid: 0.0 for udid in devices}
+    lock = threading.Lock()
+
+    def worker(udid):
+        while True:
+            try:
+                path = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                result = run_scenario(path, udid, step_timeout)
+            except Exception as e:
+                # e.g. an unbalanced quote in the script; the run goes on without it
+                result = {"scenario": os.path.basename(path), "device": udid, "status": "failed",
+                          "steps": 0, "error": f"Could not run script: {e}", "duration": 0.0}
+            with lock:
+                busy[udid] += result["duration"]
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+    start = time.time()
+    threads = [threading.Thread(target=worker, args=(udid,), daemon=True) for udid in devices]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.time() - start
+
+    return summarize(results, busy, wall)
+
+def summarize(results: list, busy: dict, wall: float, slowest: int = 5) -> dict:
+    failed = [r["scenario"] for r in results if r["status"] != "passed"]
+    return {
+        "scenarios": len(results),
+        "passed": len(results) - len(failed),
+        "failed": failed,
+        "wall_time": round(wall, 2),
+        "utilization": {udid: round(t / wall, 2) if wall else 0 for udid, t in busy.items()},
+        "slowest": [{"scenario": r["scenario"], "duration": r["duration"]}
+                    for r in sorted(results, key=lambda r: -r["duration"])[:slowest]],
+        "durations": {r["scenario"]: r["duration"] for r in results},
+    }
+
+def load_history(summary_path: str) -> dict:
+    """Returns the per-scenario durations recorded by the previous run, if any."""
+    try:
+        with open(summary_path, "r") as f:
+            return json.load(f).get("durations", {})
+    except (IOError, ValueError):
+        return {}
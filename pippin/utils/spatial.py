@@ -0,0 +1,116 @@
+"""Spatial index over one UI snapshot, for hit-testing and occlusion checks.
+
+Element frames are bucketed into a uniform grid, so point and rectangle
+queries only look at the elements in the touched cells. Z-order follows
+tree order: in UIKit later siblings draw above earlier ones and children
+above their parents, which is exactly pre-order.
+"""
+from pippin.utils.tree import Visitor, walk
+from pippin.utils.ui import get_rect, rects_intersect
+
+CELL_SIZE = 64
+
+# Roles that take the touch when they lie on top of something. Plain
+# containers ("Other", "Window") are often transparent to touches, so they
+# never count as occluding.
+OCCLUDING_ROLES = {
+    "alert", "sheet", "popover", "keyboard", "key", "button", "cell", "textfield",
+    "securetextfield", "searchfield", "switch", "slider", "link",
+    "navigationbar", "tabbar", "toolbar",
+}
+
+class _IndexVisitor(Visitor):
+    """Records every node in pre-order with the end of its subtree."""
+    def __init__(self):
+        self.nodes = []
+        self.ends = []
+        self._open = []
+
+    def enter(self, node, depth):
+        self._open.append(len(self.nodes))
+        self.nodes.append(node)
+        self.ends.append(None)
+
+    def exit(self, node, depth):
+        index = self._open.pop()
+        self.ends[index] = len(self.nodes) - 1
+
+def _norm_role(el):
+    return (el.get("role") or el.get("type") or "").lower().replace("ax", "")
+
+def takes_touches(el) -> bool:
+    return _norm_role(el) in OCCLUDING_ROLES
+
+class SpatialIndex:
+    def __init__(self, tree, cell_size: int = CELL_SIZE):
+        """tree is a nested tree or the flat pre-order list from get_ui_tree."""
+        visitor = _IndexVisitor()
+        walk(tree, [visitor])
+        self.nodes = visitor.nodes
+        self.ends = visitor.ends
+        self.cell = cell_size
+        self.rects = [None] * len(self.nodes)
+        self._z = {}
+        self.grid = {}
+        for z, node in enumerate(self.nodes):
+            self._z[id(node)] = z
+            if node.get("visible") is False:
+                continue
+            rect = get_rect(node.get("frame"))
+            if not rect or rect[2] <= 0 or rect[3] <= 0:
+                continue
+            self.rects[z] = rect
+            for key in self._cells(rect):
+                self.grid.setdefault(key, []).append(z)
+
+    def _cells(self, rect):
+        x, y, w, h = rect
+        c = self.cell
+        for cx in range(int(x // c), int((x + w) // c) + 1):
+            for cy in range(int(y // c), int((y + h) // c) + 1):
+                yield (cx, cy)
+
+    def z_of(self, el):
+        return self._z.get(id(el))
+
+    def is_related(self, a: int, b: int) -> bool:
+        """True if one of the two indices is an ancestor of (or equal to) the other."""
+        lo, hi = min(a, b), max(a, b)
+        return hi <= self.ends[lo]
+
+    def at(self, x: float, y: float) -> list:
+        """Elements containing the point, topmost first."""
+        hits = []
+        for z in self.grid.get((int(x // self.cell), int(y // self.cell)), []):
+            rx, ry, rw, rh = self.rects[z]
+            if rx <= x < rx + rw and ry <= y < ry + rh:
+                hits.append(z)
+        return [self.nodes[z] for z in sorted(hits, reverse=True)]
+
+    def in_rect(self, rect) -> list:
+        """Elements intersecting rect, topmost first."""
+        found = set()
+        for key in self._cells(rect):
+            for z in self.grid.get(key, []):
+                if z not in found and rects_intersect(self.rects[z], rect):
+                    found.add(z)
+        return [self.nodes[z] for z in sorted(found, reverse=True)]
+
+    def occluder(self, el, point=None):
+        """Returns the element that would take a tap aimed at el (by default at
+        its center), or None if el itself (or one of its own descendants) would.
+        """
+        z = self.z_of(el)
+        rect = get_rect(el.get("frame"))
+        if z is None or not rect:
+            return None
+        x, y = point if point else (rect[0] + rect[2] / 2, rect[1] + rect[3] / 2)
+        for other in self.at(x, y):
+            oz = self._z[id(other)]
+            if oz <= z:
+                break
+            if self.is_related(z, oz):
+                continue
+            if takes_touches(other):
+                return other
+        return None
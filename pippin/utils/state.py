@@ -1,8 +1,24 @@
 import os
+import json
 
 STATE_FILE = "/tmp/pippin_last_bundle_id"
+_BUNDLE_KEY = "last_bundle_id"
+
+def _selected_udid():
+    from pippin.utils.device import selected_udid
+    return selected_udid()
 
 def get_last_bundle_id() -> str | None:
+    """Returns the app last launched on the selected device, else the last one launched anywhere.
+
+    Parallel runs (e.g. shards) each select a device, so they never see
+    each other's apps.
+    """
+    udid = _selected_udid()
+    if udid:
+        bundle_id = get_device_state(udid, _BUNDLE_KEY)
+        if bundle_id:
+            return bundle_id
     if os.path.exists(STATE_FILE):
         try:
             with open(STATE_FILE, "r") as f:
@@ -12,8 +28,45 @@ def get_last_bundle_id() -> str | None:
     return None
 
 def set_last_bundle_id(bundle_id: str):
+    udid = _selected_udid()
+    if udid:
+        set_device_state(udid, _BUNDLE_KEY, bundle_id)
     try:
         with open(STATE_FILE, "w") as f:
             f.write(bundle_id)
     except IOError:
         pass
+
+def _device_state_file(udid: str) -> str:
+    return f"/tmp/pippin_device_{udid}.json"
+
+def get_device_state(udid: str, key: str, default=None):
+    """Read a value from the per-device state file."""
+    path = _device_state_file(udid)
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f).get(key, default)
+        except (IOError, ValueError):
+            return default
+    return default
+
+def set_device_state(udid: str, key: str, value):
+    """Persist a value in the per-device state file (None removes the key)."""
+    path = _device_state_file(udid)
+    data = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            data = {}
+    if value is None:
+        data.pop(key, None)
+    else:
+        data[key] = value
+    try:
+        with open(path, "w") as f:
+            json.dump(data, f)
+    except IOError:
+        pass
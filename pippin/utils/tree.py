@@ -0,0 +1,385 @@
+"""Single-pass analysis of UI trees.
+
+Every consumer of a UI snapshot (screen detection, simplification, query
+filtering, flattening, geometry) is written as a Visitor, and walk() runs any
+number of them in one iterative traversal. Deep trees (e.g. web views) cannot
+hit Python's recursion limit, and a command that needs several analyses pays
+for one walk.
+"""
+import hashlib
+from pippin.utils.ui import get_rect, rects_intersect
+
+_ENTER = 0
+_EXIT = 1
+
+WINDOW_ROLES = ["Window", "AXWindow", "AXApplication"]
+
+# Scroll containers hold content beyond their own frame, so viewport culling descends into them
+SCROLL_CONTAINER_ROLES = {
+    "application", "window", "scrollview", "table", "collectionview", "webview",
+}
+
+INTERACTIVE_ROLES = {
+    "button", "textfield", "cell", "switch", "statictext",
+    "link", "image", "searchfield", "slider", "toggle",
+}
+
+# Structural roles worth keeping as containers in interactive_only mode
+STRUCTURAL_ROLES = {
+    "navigationbar", "tabbar", "table", "scrollview",
+    "alert", "sheet", "toolbar", "window",
+}
+
+# Roles that are never collapsed into their only child
+MEANINGFUL_ROLES = INTERACTIVE_ROLES | STRUCTURAL_ROLES | {"application"}
+
+FLAT_INTERACTIVE_ROLES = [
+    "button", "textfield", "cell", "switch", "statictext", "link", "image", "searchfield",
+    "axbutton", "axtextfield", "axcell", "axswitch", "axstatictext", "axlink", "aximage", "axsearchfield"
+]
+
+class Visitor:
+    """Base class for analyzers run by walk().
+
+    enter() is called in pre-order; returning False skips the node's
+    descendants for this visitor only. exit() is called in post-order for
+    each node this visitor entered. A visitor sets done once it has its
+    answer, and the walk stops early when every visitor is done.
+    """
+    done = False
+
+    def enter(self, node, depth):
+        return True
+
+    def exit(self, node, depth):
+        pass
+
+def walk(roots, visitors):
+    """Runs visitors over a tree (or list of root nodes) in a single pass.
+
+    Nodes are visited at most once, so a flat list (which already contains
+    every descendant, in pre-order) is walked in its own order as well.
+    """
+    if isinstance(roots, dict):
+        roots = [roots]
+    elif not isinstance(roots, list):
+        return visitors
+
+    seen = set()
+    stack = [(_ENTER, node, 0, visitors) for node in reversed(roots)]
+    while stack:
+        phase, node, depth, active = stack.pop()
+        if phase == _EXIT:
+            for visitor in active:
+                visitor.exit(node, depth)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+
+        entered = [v for v in active if not v.done and v.enter(node, depth) is not False]
+        if entered:
+            stack.append((_EXIT, node, depth, entered))
+            for child in reversed(node.get("nodes") or []):
+                stack.append((_ENTER, child, depth + 1, entered))
+        if all(v.done for v in visitors):
+            break
+    return visitors
+
+def _norm_role(role):
+    return (role or "").lower().replace("ax", "")
+
+def format_frame(frame):
+    return f"{frame.get('x',0)},{frame.get('y',0)},{frame.get('width', frame.get('w', 0))},{frame.get('height', frame.get('h', 0))}"
+
+def _culled_direction(rect, viewport):
+    x, y, w, h = rect
+    vx, vy, vw, vh = viewport
+    if y >= vy + vh:
+        return "below"
+    if y + h <= vy:
+        return "above"
+    return "beside"
+
+def count_culled(rect, viewport, culled):
+    direction = _culled_direction(rect, viewport)
+    culled[direction] = culled.get(direction, 0) + 1
+
+def _outside(node, viewport):
+    """Returns the node's rect if it lies entirely outside viewport, else None."""
+    rect = get_rect(node.get("frame"))
+    # Zero-sized frames are usually layout wrappers; descend into them
+    if rect and rect[2] > 0 and rect[3] > 0 and not rects_intersect(rect, viewport):
+        return rect
+    return None
+
+def _resolve(viewport):
+    return viewport() if callable(viewport) else viewport
+
+class FlattenVisitor(Visitor):
+    """Collects every node in pre-order."""
+    def __init__(self):
+        self.nodes = []
+
+    def enter(self, node, depth):
+        self.nodes.append(node)
+
+class DigestVisitor(Visitor):
+    """Hashes what a snapshot shows (roles, ids, labels, values and frames), in pre-order."""
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=12)
+
+    def enter(self, node, depth):
+        parts = (depth, node.get("role"), node.get("AXIdentifier"), node.get("AXLabel"), node.get("AXValue"),
+                 node.get("visible"), format_frame(node["frame"]) if isinstance(node.get("frame"), dict) else None)
+        self._hash.update("\x1f".join(str(p) for p in parts).encode("utf-8") + b"\x1e")
+
+    @property
+    def digest(self):
+        return self._hash.hexdigest()
+
+class GeometryVisitor(Visitor):
+    """Finds the screen size from the first Window with a real frame."""
+    def __init__(self):
+        self.rect = None
+
+    def enter(self, node, depth):
+        if node.get("role") in WINDOW_ROLES:
+            rect = get_rect(node.get("frame"))
+            if rect and rect[2] > 0 and rect[3] > 0:
+                self.rect = rect
+                self.done = True
+
+    def size(self, default=(375, 812)):
+        return (self.rect[2], self.rect[3]) if self.rect else default
+
+class ScreenIdVisitor(Visitor):
+    """Finds the node that names the screen: the first Window, else the first Heading."""
+    def __init__(self, max_depth=None, headings=True):
+        self.max_depth = max_depth
+        self.headings = headings
+        self.window = None
+        self.heading = None
+
+    def enter(self, node, depth):
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        role = node.get("role", "")
+        if role in WINDOW_ROLES:
+            self.window = node
+            self.done = True
+        elif self.headings and self.heading is None and role in ["Heading", "AXHeading"]:
+            self.heading = node
+
+    def screen_id(self, default="unknown"):
+        if self.window is not None:
+            return self.window.get("AXLabel") or self.window.get("AXIdentifier") or "MainScreen"
+        if self.heading is not None:
+            return self.heading.get("AXLabel") or "MainScreen"
+        return default
+
+class ScreenInfoVisitor(Visitor):
+    """Extracts the title, back-navigation breadcrumb and any alert on screen."""
+    def __init__(self):
+        self.info = {
+            "title": None,
+            "breadcrumb": [],
+            "focused_element": None,
+            "alert": None,
+        }
+
+    def enter(self, node, depth):
+        info = self.info
+        role = node.get("role", "")
+        label = node.get("AXLabel", "")
+        identifier = node.get("AXIdentifier", "")
+
+        # Breadcrumbs & Title from NavigationBar
+        if role == "NavigationBar":
+            # usually identifier is the title
+            if identifier:
+                info["title"] = identifier
+            elif label:
+                info["title"] = label
+
+            # Non-title buttons in the bar are navigation mechanics, e.g. back buttons
+            for child in node.get("nodes", []):
+                child_label = child.get("AXLabel", "")
+                if child.get("role", "") == "Button" and child_label:
+                    if child_label not in [info["title"], "Edit", "Done", "Add"]:
+                        info["breadcrumb"].append(child_label)
+
+        if role in ["Alert", "Sheet"]:
+            info["alert"] = {
+                "title": label,
+                "message": next((c.get("AXLabel") for c in node.get("nodes", []) if c.get("role") == "StaticText"), "")
+            }
+
+def simplify_one(node, children, outside=False, interactive_only=False, include_hidden=False):
+    """Simplifies one node given its already simplified children.
+
+    Returns None to drop the node, the only child to collapse a wrapper, or
+    a new {type, id, label, value, frame, children} dict.
+    """
+    if outside and not children:
+        return None
+
+    # Prune non-visible leaf nodes unless include_hidden is set
+    if not include_hidden and node.get("visible") is False and not children:
+        return None
+
+    role = node.get("role", "Unknown")
+    norm = _norm_role(role)
+
+    # In interactive_only mode, skip non-interactive nodes that have no
+    # interactive descendants
+    if interactive_only and norm not in INTERACTIVE_ROLES and norm not in STRUCTURAL_ROLES and not children:
+        return None
+
+    label = node.get("AXLabel", "")
+    identifier = node.get("AXIdentifier", "")
+    value = node.get("AXValue", "")
+
+    # Collapse pure wrapper nodes: if a node has no label/id/value, is not
+    # a meaningful role, and has exactly one child, promote that child.
+    if (not label and not identifier and not value
+            and len(children) == 1 and norm not in MEANINGFUL_ROLES):
+        return children[0]
+
+    result = {"type": role}
+    if identifier:
+        result["id"] = identifier
+    if label:
+        result["label"] = label
+    if value:
+        result["value"] = value
+    frame = node.get("frame", {})
+    if isinstance(frame, dict):
+        result["frame"] = format_frame(frame)
+    if children:
+        result["children"] = children
+    return result
+
+def _matches_query(result, q):
+    return any(q in str(result.get(key, "")).lower() for key in ("id", "label", "value"))
+
+class SimplifyVisitor(Visitor):
+    """Builds the simplified, nested output tree, optionally culled and query-filtered.
+
+    viewport is an (x, y, w, h) rect or a callable returning one (so it can
+    depend on geometry found earlier in the same walk). Subtrees entirely
+    outside it are skipped, and the directions they lie in are counted in
+    culled. With a query, only nodes matching it (or with matching
+    descendants) are kept; selected (a set of raw node ids, e.g. from a
+    selector) filters the same way. With stable_ids, the "id_stable" set on
+    raw nodes by pippin.utils.identity is copied into the output.
+
+    Results are not memoized across snapshots. Every pippin command runs in
+    its own process, so an in-memory cache never hits, and a cache persisted
+    per device would need every subtree hashed and the cache file loaded and
+    written on each call, which costs about as much as simplifying.
+    """
+    def __init__(self, interactive_only=False, depth=None, include_hidden=False,
+                 viewport=None, culled=None, query=None, stable_ids=False, selected=None):
+        self.interactive_only = interactive_only
+        self.stable_ids = stable_ids
+        self.selected = selected
+        self.depth = depth
+        self.include_hidden = include_hidden
+        self.viewport = viewport
+        self.culled = culled
+        self.query = query.lower() if query else None
+        self._roots = []
+        # One [children, outside] frame per entered node still open
+        self._frames = []
+
+    def enter(self, node, depth):
+        if self.depth is not None and depth > self.depth:
+            return False
+
+        outside = False
+        viewport = _resolve(self.viewport)
+        if viewport is not None:
+            rect = _outside(node, viewport)
+            if rect:
+                if _norm_role(node.get("role")) not in SCROLL_CONTAINER_ROLES:
+                    if self.culled is not None:
+                        count_culled(rect, viewport, self.culled)
+                    return False
+                outside = True
+
+        self._frames.append(([], outside))
+
+    def _siblings(self):
+        return self._frames[-1][0] if self._frames else self._roots
+
+    def exit(self, node, depth):
+        kids, outside = self._frames.pop()
+        result = simplify_one(node, [k[0] for k in kids], outside, self.interactive_only, self.include_hidden)
+        if result is None:
+            return
+
+        collapsed = bool(kids) and result is kids[0][0]
+        if self.stable_ids and not collapsed and "id_stable" in node:
+            result["id_stable"] = node["id_stable"]
+
+        matched = True
+        if self.query is not None or self.selected is not None:
+            if collapsed:
+                # A collapsed wrapper is its child, already filtered
+                matched = kids[0][1]
+            else:
+                kept = [child for child, child_matched in kids if child_matched]
+                if kept:
+                    result["children"] = kept
+                else:
+                    result.pop("children", None)
+                matched = bool(kept) or self._matches(node, result)
+
+        self._siblings().append((result, matched))
+
+    def _matches(self, node, result):
+        if self.selected is not None:
+            return id(node) in self.selected
+        return _matches_query(result, self.query)
+
+    @property
+    def results(self):
+        return [result for result, matched in self._roots if matched]
+
+class FlatListVisitor(Visitor):
+    """Maps every node to a flat {id, label, type, frame, value} entry."""
+    def __init__(self, interactive_only=False, viewport=None, culled=None, query=None, selected=None):
+        self.interactive_only = interactive_only
+        self.selected = selected
+        self.viewport = viewport
+        self.culled = culled
+        self.query = query.lower() if query else None
+        self.elements = []
+
+    def enter(self, node, depth):
+        role = node.get("role", "Unknown")
+        viewport = _resolve(self.viewport)
+        if viewport is not None:
+            rect = _outside(node, viewport)
+            if rect:
+                count_culled(rect, viewport, self.culled if self.culled is not None else {})
+                return
+        if self.interactive_only and role.lower() not in FLAT_INTERACTIVE_ROLES:
+            return
+
+        frame = node.get("frame", {})
+        mapped = {
+            "id": node.get("AXIdentifier", ""),
+            "label": node.get("AXLabel", ""),
+            "type": role,
+            "frame": format_frame(frame) if isinstance(frame, dict) else str(frame),
+            "value": node.get("AXValue", "")
+        }
+        if "id_stable" in node:
+            mapped["id_stable"] = node["id_stable"]
+        if self.selected is not None:
+            if id(node) in self.selected:
+                self.elements.append(mapped)
+        elif self.query is None or _matches_query(mapped, self.query):
+            self.elements.append(mapped)
@@ -2,14 +2,13 @@ import sys
 from pippin.utils import wda
 
 def flatten_tree(nodes):
-    flat_list = []
+    from pippin.utils.tree import walk, FlattenVisitor
+
     if not isinstance(nodes, list):
-        return flat_list
-    for node in nodes:
-        flat_list.append(node)
-        if "nodes" in node:
-            flat_list.extend(flatten_tree(node["nodes"]))
-    return flat_list
+        return []
+    flattener = FlattenVisitor()
+    walk(nodes, [flattener])
+    return flattener.nodes
 
 from pippin.utils.device import get_target_udid
 
@@ -49,11 +48,41 @@ def get_ui_tree_hierarchical(silent=False):
             print(f"Error fetching UI tree: {e}", file=sys.stderr)
         return []
 
-def find_element(query: str, silent=False, strict=False):
-    elements = get_ui_tree(silent=silent)
+def find_element(query: str, silent=False, strict=False, elements=None, fuzzy=False):
+    """Find the best element matching query.
+
+    Pass elements (a flat list from get_ui_tree) to match against a snapshot
+    that was already fetched instead of fetching a new one. A query like
+    "@e12" refers to a handle from the last inspect (see pippin.utils.handles),
+    and one starting with "sel:" is a selector (see pippin.utils.selectors).
+    With fuzzy, a query matching nothing exactly or as a substring may match
+    a label with a typo; only commands that target an element (tap, type,
+    fill) ask for that, never verification.
+    """
+    return match_element(query, silent, strict, elements, fuzzy)[0]
+
+def match_element(query: str, silent=False, strict=False, elements=None, fuzzy=False):
+    """Like find_element, but returns (element, snapshot) so the caller can run
+    further checks (e.g. occlusion) on the snapshot that was matched against.
+
+    The snapshot is None for handles, which are resolved without the tree.
+    """
+    from pippin.utils.handles import is_handle, resolve_handle
+    if is_handle(query):
+        return resolve_handle(query, silent=silent), None
+
+    if elements is None:
+        elements = get_ui_tree(silent=silent)
+    return _match(query, silent, strict, elements, fuzzy), elements
+
+def _match(query, silent, strict, elements, fuzzy=False):
+    from pippin.utils.selectors import is_selector
     if not elements:
         return None
 
+    if is_selector(query):
+        return _find_selected(query, elements, silent)
+
     query_lower = query.lower()
     
     # Check for type:label syntax
@@ -159,41 +188,121 @@ def find_element(query: str, silent=False, strict=False):
             print(f"WARN: {len(substring_label)} elements contain '{query_val}' in label, picking best.", file=sys.stderr)
         return pick_best(substring_label)
 
+    # Tier 4: Fuzzy match for typos and spacing variants (opt-in, skipped in strict mode)
+    if fuzzy and not strict:
+        from pippin.utils.fuzzy import FuzzyIndex
+
+        def include(el):
+            if el.get("visible") is False:
+                return False
+            return not element_type or (el.get("role") or el.get("type") or "").lower().replace("ax", "") == element_type
+
+        hits = FuzzyIndex(elements).search(query_val, k=2, include=include)
+        if hits:
+            if len(hits) > 1 and hits[1][0] == hits[0][0] and not silent:
+                print(f"WARN: Several elements are equally close to '{query_val}', picking best. "
+                      f"Use 'inspect --query \"{query}\" --candidates 5' to choose.", file=sys.stderr)
+            return hits[0][1]
+
     return None
 
+def find_candidates(query: str, elements, k: int = 5, index=None) -> list:
+    """Returns up to k (score, element) pairs for query, best first, so the caller can choose.
+
+    Exact id or label matches score 1.0, label substrings score by how much
+    of the label they cover, and the rest come from the fuzzy index (built
+    from elements unless the caller already has one).
+    """
+    from pippin.utils.fuzzy import FuzzyIndex
+    from pippin.utils.selectors import is_selector, select
+
+    visible = [el for el in elements if el.get("visible") is not False]
+    if is_selector(query):
+        return [(1.0, el) for el in select(elements, query, include=lambda el: el.get("visible") is not False)][:k]
+
+    scores = {}
+    q = query.lower()
+    for el in visible:
+        label = (el.get("AXLabel") or "").lower()
+        if el.get("AXIdentifier") == query or label == q:
+            scores[id(el)] = (1.0, el)
+        elif q and q in label:
+            scores[id(el)] = (0.8 + 0.2 * len(q) / len(label), el)
+    # A lower bar than find_element's, since the caller picks among the results
+    index = index or FuzzyIndex(elements)
+    for score, el, _ in index.search(query, k=k, min_score=0.5, include=lambda el: el.get("visible") is not False):
+        if score > scores.get(id(el), (0,))[0]:
+            scores[id(el)] = (score, el)
+    return sorted(scores.values(), key=lambda hit: hit[0], reverse=True)[:k]
+
+def suggest(query: str, elements, k: int = 3, index=None) -> str:
+    """A " Did you mean ...?" hint for a query that matched nothing, or ""."""
+    from pippin.utils.fuzzy import FuzzyIndex
+    from pippin.utils.selectors import is_selector
+
+    if not elements or is_selector(query):
+        return ""
+    index = index or FuzzyIndex(elements)
+    hits = index.search(query, k=k, min_score=0.5, include=lambda el: el.get("visible") is not False)
+    labels = list(dict.fromkeys(f"'{text}'" for _, _, text in hits))
+    return f" Did you mean: {', '.join(labels)}?" if labels else ""
+
+def _find_selected(query, elements, silent=False):
+    from pippin.utils.errors import fail, ERR_INVALID_ARGS, EXIT_INVALID_ARGS
+    from pippin.utils.selectors import select, SelectorError
+
+    try:
+        # Like other queries, only elements on screen are candidates
+        matches = select(elements, query, include=lambda el: el.get("visible") is not False)
+    except SelectorError as e:
+        fail(ERR_INVALID_ARGS, str(e), EXIT_INVALID_ARGS)
+    if len(matches) > 1 and not silent:
+        print(f"WARN: {len(matches)} elements matched '{query}', picking the first (use :nth(N) to choose).",
+              file=sys.stderr)
+    return matches[0] if matches else None
+
+def get_rect(frame):
+    """Returns (x, y, w, h) floats for a frame dict, or None if unparseable."""
+    if not isinstance(frame, dict):
+        return None
+    try:
+        return (
+            float(frame.get("x", 0)),
+            float(frame.get("y", 0)),
+            float(frame.get("width", frame.get("w", 0))),
+            float(frame.get("height", frame.get("h", 0))),
+        )
+    except (ValueError, TypeError):
+        return None
+
+def rects_intersect(a, b):
+    """True if two (x, y, w, h) rects overlap."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    if ax + aw <= bx or ax >= bx + bw:
+        return False
+    if ay + ah <= by or ay >= by + bh:
+        return False
+    return True
+
+def screen_size_from_tree(nodes, default=(375, 812)):
+    """Returns the (w, h) of the first Window found in a tree or flat list."""
+    from pippin.utils.tree import walk, GeometryVisitor
+
+    geometry = GeometryVisitor()
+    walk(nodes if isinstance(nodes, list) else [], [geometry])
+    return geometry.size(default)
+
 def is_onscreen(el):
     """Checks if an element's frame intersects with the device screen."""
-    f = el.get("frame")
     if getattr(is_onscreen, "screen_w", None) is None:
-        tree = get_ui_tree(silent=True)
-        is_onscreen.screen_w = 375
-        is_onscreen.screen_h = 812
-        if tree:
-            for node in tree:
-                if node.get("role") in ["Window", "AXWindow", "AXApplication"]:
-                    wf = node.get("frame", {})
-                    try:
-                        is_onscreen.screen_w = float(wf.get("width", wf.get("w", is_onscreen.screen_w)))
-                        is_onscreen.screen_h = float(wf.get("height", wf.get("h", is_onscreen.screen_h)))
-                    except:
-                        pass
-                    break
-
-    if not isinstance(f, dict):
-        return False
-    try:
-        x = float(f.get("x", 0))
-        y = float(f.get("y", 0))
-        w = float(f.get("width", f.get("w", 0)))
-        h = float(f.get("height", f.get("h", 0)))
-        
-        if x + w <= 0 or x >= is_onscreen.screen_w:
-            return False
-        if y + h <= 0 or y >= is_onscreen.screen_h:
-            return False
-        return True
-    except:
+        from pippin.utils.geometry import get_screen_size
+        is_onscreen.screen_w, is_onscreen.screen_h = get_screen_size(fetch_tree=lambda: get_ui_tree(silent=True))
+
+    rect = get_rect(el.get("frame"))
+    if rect is None:
         return False
+    return rects_intersect(rect, (0, 0, is_onscreen.screen_w, is_onscreen.screen_h))
 
 def get_center(frame):
     if isinstance(frame, dict):
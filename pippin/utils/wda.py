@@ -1,15 +1,25 @@
 import json
 import os
 import subprocess
+import sys
 import time
 import urllib.request
 import urllib.error
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
-WDA_URL = "http://localhost:8100"
+DEFAULT_PORT = 8100
+WDA_URL = f"http://localhost:{os.environ.get('PIPPIN_WDA_PORT', DEFAULT_PORT)}"
 _session_id = None
 
+def configure_port(port: int):
+    """Point the client at the WDA instance listening on port (e.g. a leased pool device)."""
+    global WDA_URL, _session_id
+    url = f"http://localhost:{port}"
+    if url != WDA_URL:
+        WDA_URL = url
+        _session_id = None
+
 def _wda_request(method, path, body=None, parse_json=True):
     url = f"{WDA_URL}{path}"
     req = urllib.request.Request(url, method=method)
@@ -80,7 +90,19 @@ def get_source_tree():
     except Exception as e:
         raise Exception(f"Failed to parse source tree: {e}")
 
-def _xml_to_element(node):
+def _xml_to_element(root):
+    """Converts the WDA XML source into nested dicts, iteratively so deep trees are safe."""
+    result = _xml_attributes(root)
+    stack = [(root, result)]
+    while stack:
+        node, el = stack.pop()
+        children = [(child, _xml_attributes(child)) for child in node]
+        if children:
+            el["nodes"] = [converted for _, converted in children]
+            stack.extend(children)
+    return result
+
+def _xml_attributes(node):
     el = {}
     
     node_type = node.get("type", "")
@@ -120,12 +142,6 @@ def _xml_to_element(node):
     except ValueError:
         pass
     
-    children = []
-    for child in node:
-        children.append(_xml_to_element(child))
-    if children:
-        el["nodes"] = children
-
     return el
 
 @_with_session
@@ -144,6 +160,11 @@ def tap(x, y):
         }]
     })
 
+@_with_session
+def perform_actions(actions):
+    """Sends a list of W3C input sources (see pippin.utils.gestures) as one request."""
+    _wda_request("POST", f"/session/{_session_id}/actions", {"actions": actions})
+
 @_with_session
 def type_text(text):
     _wda_request("POST", f"/session/{_session_id}/wda/keys", {"value": list(text)})
@@ -174,6 +195,104 @@ def swipe(x1, y1, x2, y2, duration):
         }]
     })
 
+_ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+def _element_ref(value):
+    if isinstance(value, dict):
+        return value.get("ELEMENT") or value.get(_ELEMENT_KEY)
+    return None
+
+def find_element_ids(using, value):
+    """Returns the WDA ids of all elements matching a locator, e.g. ("accessibility id", "login").
+
+    Lookup failures (including "no such element") return an empty list
+    rather than raising, since callers fall back to a tree fetch.
+    """
+    try:
+        get_session()
+        resp = _wda_request("POST", f"/session/{_session_id}/elements", {"using": using, "value": value})
+    except Exception:
+        return []
+    return [ref for ref in (_element_ref(v) for v in resp.get("value") or []) if ref]
+
+def element_rect(element_id):
+    """Returns the current {x, y, width, height} of a WDA element, or None if it is gone."""
+    try:
+        get_session()
+        resp = _wda_request("GET", f"/session/{_session_id}/element/{element_id}/rect")
+    except Exception:
+        return None
+    rect = resp.get("value")
+    return rect if isinstance(rect, dict) and "x" in rect else None
+
+def scroll_to_visible(element_id):
+    """Asks WDA to scroll the element's container until it is visible. Returns True on success."""
+    try:
+        get_session()
+        _wda_request("POST", f"/session/{_session_id}/wda/element/{element_id}/scroll", {"toVisible": True})
+    except Exception:
+        return False
+    return True
+
+def active_element():
+    """Returns the WDA id of the element with keyboard focus, or None."""
+    try:
+        get_session()
+        resp = _wda_request("GET", f"/session/{_session_id}/element/active")
+    except Exception:
+        return None
+    return _element_ref(resp.get("value"))
+
+@_with_session
+def set_element_value(element_id, text):
+    _wda_request("POST", f"/session/{_session_id}/element/{element_id}/value", {"value": list(text), "text": text})
+
+def dismiss_keyboard():
+    """Hides the software keyboard. Returns False if WDA could not."""
+    try:
+        get_session()
+        _wda_request("POST", f"/session/{_session_id}/wda/keyboard/dismiss", {})
+    except Exception:
+        return False
+    return True
+
+def window_size():
+    """Returns (width, height) in points from WDA, or None."""
+    try:
+        get_session()
+        resp = _wda_request("GET", f"/session/{_session_id}/window/size")
+    except Exception:
+        return None
+    size = resp.get("value") or {}
+    if size.get("width") and size.get("height"):
+        return float(size["width"]), float(size["height"])
+    return None
+
+def orientation():
+    """Returns WDA's orientation string (e.g. "PORTRAIT"), or None."""
+    try:
+        get_session()
+        return _wda_request("GET", f"/session/{_session_id}/orientation").get("value")
+    except Exception:
+        return None
+
+def element_attribute(element_id, name):
+    try:
+        get_session()
+        resp = _wda_request("GET", f"/session/{_session_id}/element/{element_id}/attribute/{name}")
+    except Exception:
+        return None
+    return resp.get("value")
+
+def screenshot():
+    """Returns the screen as PNG bytes from WDA's session-less endpoint."""
+    import base64
+    resp = _wda_request("GET", "/screenshot")
+    encoded = resp.get("value") if isinstance(resp, dict) else None
+    if not encoded:
+        return None
+    return base64.b64decode(encoded)
+
 def _get_wda_bundle_path():
     wda_dir = Path.home() / ".pippin" / "wda"
     if wda_dir.exists():
@@ -233,21 +352,25 @@ def install_wda():
         # It's fine if this fails during install_wda, user might not have a booted simulator.
         pass
 
-def start_wda(udid):
+def start_wda(udid, port: int = None, device_set: str = None):
+    from pippin.utils.executor import with_device_set
+
+    if port:
+        configure_port(port)
     if ensure_wda_running():
         return True
         
     app_path = _get_wda_bundle_path()
     if app_path:
         # Make sure it's installed to the target simulator first
-        subprocess.run(["xcrun", "simctl", "install", udid, str(app_path)], check=False, capture_output=True)
+        subprocess.run(with_device_set(["xcrun", "simctl", "install", udid, str(app_path)], device_set), check=False, capture_output=True)
 
-    print("Starting WebDriverAgent...")
+    print("Starting WebDriverAgent...", file=sys.stderr)
     env = os.environ.copy()
-    env["SIMCTL_CHILD_USE_PORT"] = "8100"
+    env["SIMCTL_CHILD_USE_PORT"] = WDA_URL.rsplit(":", 1)[1]
     
     process = subprocess.Popen(
-        ["xcrun", "simctl", "launch", "--terminate-running-process", udid, "com.facebook.WebDriverAgentRunner.xctrunner"],
+        with_device_set(["xcrun", "simctl", "launch", "--terminate-running-process", udid, "com.facebook.WebDriverAgentRunner.xctrunner"], device_set),
         env=env,
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL
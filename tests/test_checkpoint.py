@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from pippin.utils import checkpoint
+from pippin.utils.checkpoint import save_checkpoint, restore_checkpoint, list_checkpoints, delete_checkpoint, EMPTY
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.container = os.path.join(self.tmp.name, "container")
+        os.makedirs(os.path.join(self.container, "Documents"))
+        with open(os.path.join(self.container, "Documents", "db.sqlite"), "w") as f:
+            f.write("logged-in")
+        with open(os.path.join(self.container, ".hidden"), "w") as f:
+            f.write("x")
+        self.root_patch = patch.object(checkpoint, "CHECKPOINT_ROOT", Path(self.tmp.name) / "checkpoints")
+        self.root_patch.start()
+        # No clonefile(2) here; exercise the copy fallback
+        self.cp_patch = patch("pippin.utils.checkpoint.execute_command", side_effect=Exception("cp -c unsupported"))
+        self.cp_patch.start()
+
+    def tearDown(self):
+        self.cp_patch.stop()
+        self.root_patch.stop()
+        self.tmp.cleanup()
+
+    def test_save_and_restore_roundtrip(self):
+        meta = save_checkpoint("UDID", "com.example", self.container, "login")
+        self.assertEqual(meta["method"], "copy")
+
+        db = os.path.join(self.container, "Documents", "db.sqlite")
+        with open(db, "w") as f:
+            f.write("modified")
+        with open(os.path.join(self.container, "extra"), "w") as f:
+            f.write("new")
+
+        restore_checkpoint("UDID", "com.example", self.container, "login")
+        with open(db) as f:
+            self.assertEqual(f.read(), "logged-in")
+        self.assertEqual(sorted(os.listdir(self.container)), [".hidden", "Documents"])
+
+        # The checkpoint itself must not have been affected by the write
+        restore_checkpoint("UDID", "com.example", self.container, "login")
+        with open(db) as f:
+            self.assertEqual(f.read(), "logged-in")
+
+    def test_empty_wipes_container(self):
+        result = restore_checkpoint("UDID", "com.example", self.container, EMPTY)
+        self.assertEqual(result["method"], "clear")
+        self.assertEqual(os.listdir(self.container), [])
+
+    def test_list_and_delete(self):
+        save_checkpoint("UDID", "com.example", self.container, "login")
+        names = [c["name"] for c in list_checkpoints("UDID", "com.example")]
+        self.assertEqual(names, [EMPTY, "login"])
+        self.assertTrue(delete_checkpoint("UDID", "com.example", "login"))
+        self.assertFalse(delete_checkpoint("UDID", "com.example", "login"))
+        with self.assertRaises(FileNotFoundError):
+            restore_checkpoint("UDID", "com.example", self.container, "login")
+        with self.assertRaises(ValueError):
+            save_checkpoint("UDID", "com.example", self.container, EMPTY)
+
+    def test_names_cannot_escape_the_root(self):
+        victim = os.path.join(self.tmp.name, "checkpoints", "UDID", "victim")
+        os.makedirs(victim)
+        for name in ("", "../victim", "..", ".hidden", "a/b", "../../../../etc"):
+            with self.assertRaises(ValueError, msg=name):
+                save_checkpoint("UDID", "com.example", self.container, name)
+            with self.assertRaises(ValueError, msg=name):
+                delete_checkpoint("UDID", "com.example", name)
+            with self.assertRaises(ValueError, msg=name):
+                restore_checkpoint("UDID", "com.example", self.container, name)
+        with self.assertRaises(ValueError):
+            checkpoint.checkpoint_dir("UDID", "../../..", "victim")
+        self.assertTrue(os.path.isdir(victim))
+
+if __name__ == '__main__':
+    unittest.main()
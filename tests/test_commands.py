@@ -9,6 +9,7 @@ import pippin.commands.vision as vision
 import pippin.commands.interaction as interaction
 import pippin.commands.system as system
 import pippin.commands.verification as verification
+from pippin.utils.errors import EXIT_ELEMENT_NOT_FOUND
 
 class TestCommands(unittest.TestCase):
 
@@ -166,11 +167,18 @@ class TestCommands(unittest.TestCase):
         mock_data_1 = []
         mock_data_2 = [{"role": "Button", "AXIdentifier": "btn1", "frame": {"x": 10, "y": 20, "w": 100, "h": 50}}]
         mock_get_tree.side_effect = [mock_data_1, mock_data_2]
-        
-        interaction.tap_cmd(query="btn1", scroll=True)
-        
+        mock_scroll_cmd.return_value = "native"
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            interaction.tap_cmd(query="btn1", scroll=True)
+        finally:
+            sys.stdout = sys.__stdout__
+
         mock_scroll_cmd.assert_called_once_with("down", until_visible="btn1", silent=True)
         mock_tap.assert_called_once()
+        self.assertEqual(json.loads(captured_output.getvalue())["scroll_strategy"], "native")
 
     @patch('pippin.utils.ui.get_ui_tree_hierarchical')
     @patch('os.path.exists', return_value=True)
@@ -201,10 +209,114 @@ class TestCommands(unittest.TestCase):
         self.assertIn("LoginBtn", output)
         self.assertNotIn("BackBtn", output)
 
+    def _paged_tree(self):
+        return [
+            {
+                "role": "Window",
+                "frame": {"x": 0, "y": 0, "w": 375, "h": 812},
+                "nodes": [
+                    {
+                        "role": "Table",
+                        "frame": {"x": 0, "y": 0, "w": 375, "h": 812},
+                        "nodes": [
+                            {"role": "Cell", "AXLabel": "Row 1", "frame": {"x": 0, "y": 100, "w": 375, "h": 44}},
+                            {"role": "Cell", "AXLabel": "Row 40", "visible": False, "frame": {"x": 0, "y": 1000, "w": 375, "h": 44}},
+                        ]
+                    }
+                ]
+            }
+        ]
+
+    @patch('pippin.utils.geometry.get_screen_size', return_value=(375, 812))
+    @patch('pippin.utils.ui.get_ui_tree_hierarchical')
+    @patch('os.path.exists', return_value=False)
+    def test_inspect_viewport(self, mock_exists, mock_get_tree, mock_size):
+        mock_get_tree.return_value = self._paged_tree()
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            vision.inspect_cmd(viewport=True)
+        finally:
+            sys.stdout = sys.__stdout__
+
+        output = captured_output.getvalue()
+        self.assertIn("Row 1", output)
+        self.assertNotIn("Row 40", output)
+
+    @patch('pippin.utils.geometry.get_screen_size', return_value=(375, 812))
+    @patch('pippin.commands.vision._resolve_page', return_value=1)
+    @patch('pippin.utils.ui.get_ui_tree_hierarchical')
+    @patch('os.path.exists', return_value=False)
+    def test_inspect_page_next(self, mock_exists, mock_get_tree, mock_page, mock_size):
+        mock_get_tree.return_value = self._paged_tree()
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            vision.inspect_cmd(page="next")
+        finally:
+            sys.stdout = sys.__stdout__
+
+        data = json.loads(captured_output.getvalue())
+        output = json.dumps(data)
+        self.assertIn("Row 40", output)
+        self.assertNotIn("Row 1\"", output)
+        self.assertEqual(data["page"], {"index": 1, "has_prev": True, "has_next": False})
+
+    @patch('pippin.utils.device.get_target_udid', return_value="UDID-1")
+    def test_resolve_page_clamps_and_resets(self, mock_udid):
+        state = {}
+        tree = self._paged_tree()
+        with patch('pippin.utils.state.get_device_state', side_effect=lambda u, k, d=None: state.get(k, d)), \
+             patch('pippin.utils.state.set_device_state', side_effect=lambda u, k, v: state.__setitem__(k, v)):
+            # The content spans two screens: pages 0 and 1
+            self.assertEqual(vision._resolve_page("prev", tree, 812), 0)
+            self.assertEqual(vision._resolve_page("next", tree, 812), 1)
+            self.assertEqual(vision._resolve_page("next", tree, 812), 1)
+            self.assertEqual(vision._resolve_page("99", tree, 812), 1)
+
+            # A different screen starts over from the first page
+            tree[0]["nodes"][0]["nodes"][0]["AXLabel"] = "Other"
+            self.assertEqual(vision._resolve_page("next", tree, 812), 1)
+            tree[0]["nodes"][0]["nodes"][0]["AXLabel"] = "Changed"
+            self.assertEqual(vision._resolve_page("prev", tree, 812), 0)
+
+    @patch('pippin.utils.imaging.capture_screenshot', return_value=b"\x89PNGdata")
+    @patch('pippin.commands.vision.get_simctl_target', return_value="UDID-1")
+    def test_screenshot_base64(self, mock_target, mock_capture):
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            vision.screenshot_cmd(as_base64=True)
+        finally:
+            sys.stdout = sys.__stdout__
+
+        data = json.loads(captured_output.getvalue())
+        mock_capture.assert_called_once_with("UDID-1")
+        self.assertEqual(data["format"], "png")
+        self.assertEqual(data["data"], "iVBOR2RhdGE=")
+        self.assertNotIn("file", data)
+
+    @patch('pippin.utils.geometry.get_screen_size', return_value=(390, 844))
+    @patch('pippin.commands.vision.get_ui_tree')
+    def test_parse_crop_rect_skips_tree(self, mock_tree, mock_size):
+        self.assertEqual(vision._parse_crop("0, 10, 100, 50"), ((0.0, 10.0, 100.0, 50.0), 390))
+        mock_tree.assert_not_called()
+
+    @patch('pippin.utils.geometry.get_screen_size', return_value=(390, 844))
+    @patch('pippin.commands.vision.get_ui_tree')
+    def test_parse_crop_element(self, mock_tree, mock_size):
+        mock_tree.return_value = [{"role": "Button", "AXLabel": "Login", "frame": {"x": 10, "y": 20, "w": 100, "h": 44}}]
+        self.assertEqual(vision._parse_crop("Login"), ((10, 20, 100, 44), 390))
+        mock_size.assert_called_once_with(tree=mock_tree.return_value)
+
+    @patch('pippin.commands.system.restore_checkpoint')
     @patch('pippin.commands.system.get_simctl_target', return_value="booted")
     @patch('pippin.commands.system.execute_command')
-    def test_launch(self, mock_exec, mock_target):
+    def test_launch(self, mock_exec, mock_target, mock_restore):
         system.launch_cmd("com.test.app", clean=True, args="-flag val", locale="en_US")
+        mock_restore.assert_called_once_with("booted", "com.test.app", mock_exec.return_value, "empty")
 
         # Check terminate call
         mock_exec.assert_any_call(["xcrun", "simctl", "terminate", "booted", "com.test.app"], check=False)
@@ -213,6 +325,23 @@ class TestCommands(unittest.TestCase):
         expected_launch = ["xcrun", "simctl", "launch", "booted", "com.test.app", "-AppleLanguages", "(en_US)", "-AppleLocale", "en_US", "-flag", "val"]
         mock_exec.assert_any_call(expected_launch)
 
+    @patch('pippin.commands.system.get_simctl_target', return_value="booted")
+    @patch('pippin.commands.system.execute_command', return_value="/data")
+    def test_launch_fails_when_restore_fails(self, mock_exec, mock_target):
+        failures = [
+            patch('pippin.commands.system.restore_checkpoint', side_effect=ValueError("Invalid checkpoint name '../x'.")),
+            patch('pippin.commands.system.restore_checkpoint', side_effect=OSError("copy failed")),
+            patch('pippin.commands.system._get_app_container', return_value=None),
+        ]
+        sys.stderr = StringIO()
+        try:
+            for failure in failures:
+                with failure, self.assertRaises(SystemExit):
+                    system.launch_cmd("com.test.app", checkpoint="../x")
+        finally:
+            sys.stderr = sys.__stderr__
+        self.assertNotIn(["xcrun", "simctl", "launch", "booted", "com.test.app"], [c.args[0] for c in mock_exec.call_args_list])
+
     @patch('pippin.utils.ui.is_onscreen', return_value=True)
     @patch('pippin.utils.ui.get_ui_tree')
     def test_assert_exists(self, mock_get_tree, mock_is_onscreen):
@@ -232,13 +361,10 @@ class TestCommands(unittest.TestCase):
         self.assertIn('"status": "success"', output)
         self.assertIn('"action": "assert"', output)
 
-    @patch('pippin.commands.interaction.get_ui_tree')
-    def test_scroll_dynamic_dimensions(self, mock_get_tree):
-        # Mock a large window (e.g. iPad)
-        mock_data = [
-            {"role": "Window", "frame": {"x": 0, "y": 0, "w": 1024, "h": 1366}}
-        ]
-        mock_get_tree.return_value = mock_data
+    @patch('pippin.commands.interaction.get_screen_size')
+    def test_scroll_dynamic_dimensions(self, mock_size):
+        # Mock a large screen (e.g. iPad)
+        mock_size.return_value = (1024, 1366)
 
         with patch('pippin.utils.wda.swipe') as mock_swipe:
             interaction.scroll_cmd("down")
@@ -267,35 +393,40 @@ class TestCommands(unittest.TestCase):
         output = captured_output.getvalue()
         self.assertIn("ERR_ELEMENT_NOT_FOUND", output)
 
-    @patch('os.path.exists')
-    @patch('os.listdir')
-    @patch('os.path.getmtime')
-    @patch('builtins.open', new_callable=unittest.mock.mock_open, read_data="Crash content")
-    def test_logs_crash_report(self, mock_file, mock_mtime, mock_listdir, mock_exists):
-        # Mock STATE_FILE exists and contains bundle_id
-        # We need to handle multiple open calls
-        mock_exists.side_effect = lambda p: p == "/tmp/pippin_last_bundle_id" or p == "/Users/acrollet/Library/Logs/DiagnosticReports"
-        
-        # First call to open is for STATE_FILE
-        # Second call is for the crash report
-        mock_file.side_effect = [
-            unittest.mock.mock_open(read_data="com.test.app").return_value,
-            unittest.mock.mock_open(read_data="Header\nStack trace line 1").return_value
-        ]
-        
-        mock_listdir.return_value = ["app-2026-02-16.ips", "other-app.ips"]
-        mock_mtime.return_value = 123456789
-
-        captured_output = StringIO()
-        sys.stdout = captured_output
-        try:
-            verification.logs_cmd(crash_report=True)
-        finally:
-            sys.stdout = sys.__stdout__
+    @patch('pippin.commands.verification.get_last_bundle_id', return_value="com.test.app")
+    def test_logs_crash_report(self, mock_bundle):
+        import os
+        import tempfile
+        header = json.dumps({"app_name": "app", "bundleID": "com.test.app", "timestamp": "2026-02-16 10:00:00"})
+        body = json.dumps({
+            "exception": {"type": "EXC_BAD_ACCESS", "signal": "SIGSEGV"},
+            "usedImages": [{"name": "app"}],
+            "threads": [
+                {"frames": []},
+                {"triggered": True, "queue": "com.apple.main-thread",
+                 "frames": [{"imageIndex": 0, "symbol": "crashyFunction", "symbolLocation": 12}]},
+            ],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "app-2026-02-16.ips"), "w") as f:
+                f.write(header + "\n" + body)
+            with open(os.path.join(tmp, "other-app.ips"), "w") as f:
+                f.write(json.dumps({"bundleID": "com.other.app"}) + "\n{}")
+
+            with patch('pippin.utils.crash.CRASH_DIR', tmp), \
+                 patch('pippin.utils.crash.INDEX_FILE', os.path.join(tmp, "index.json")):
+                captured_output = StringIO()
+                sys.stdout = captured_output
+                try:
+                    verification.logs_cmd(crash_report=True)
+                finally:
+                    sys.stdout = sys.__stdout__
 
         output = captured_output.getvalue()
         self.assertIn("CRASH_REPORT_FOUND", output)
-        self.assertIn("Stack trace line 1", output)
+        self.assertIn("app-2026-02-16.ips", output)
+        self.assertIn("Exception: EXC_BAD_ACCESS SIGSEGV", output)
+        self.assertIn("app crashyFunction + 12", output)
 
     @patch('pippin.commands.doctor.wda._get_wda_bundle_path', return_value=None)
     @patch('builtins.input', return_value='n')
@@ -378,7 +509,8 @@ class TestCommands(unittest.TestCase):
     @patch('pippin.commands.system.execute_command')
     @patch('os.path.exists', return_value=True)
     @patch('builtins.open', new_callable=unittest.mock.mock_open, read_data="com.test.app")
-    def test_relaunch(self, mock_file, mock_exists, mock_exec, mock_target):
+    @patch('pippin.commands.system.restore_checkpoint')
+    def test_relaunch(self, mock_restore, mock_file, mock_exists, mock_exec, mock_target):
         system.relaunch_cmd(clean=True)
         # Verify stop (terminate)
         mock_exec.assert_any_call(["xcrun", "simctl", "terminate", "booted", "com.test.app"], check=False)
@@ -386,5 +518,269 @@ class TestCommands(unittest.TestCase):
         expected_launch = ["xcrun", "simctl", "launch", "booted", "com.test.app"]
         mock_exec.assert_any_call(expected_launch)
 
+class TestAdaptiveScroll(unittest.TestCase):
+    def setUp(self):
+        self.patches = [
+            patch('pippin.commands.interaction.get_screen_size', return_value=(375, 812)),
+            patch('pippin.commands.interaction.time.sleep'),
+            patch('pippin.utils.wda.find_element_ids', return_value=[]),
+        ]
+        for p in self.patches:
+            p.start()
+        self.stdout, self.stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+
+    def tearDown(self):
+        sys.stdout, sys.stderr = self.stdout, self.stderr
+        for p in self.patches:
+            p.stop()
+
+    @staticmethod
+    def snapshot(content, y=None, visible=True):
+        # Snapshots with different content values differ, as if the list had moved
+        tree = [{"role": "Window", "AXValue": content, "frame": {"x": 0, "y": 0, "w": 375, "h": 812}}]
+        if y is not None:
+            tree.append({"role": "Button", "AXLabel": "Submit", "visible": visible,
+                         "frame": {"x": 100, "y": y, "w": 100, "h": 50}})
+        return tree
+
+    @patch('pippin.utils.wda.swipe')
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_known_offscreen_target_scrolls_exact_distance(self, mock_tree, mock_swipe):
+        mock_tree.side_effect = [self.snapshot("a", y=700, visible=False), self.snapshot("b", y=400)]
+        interaction.scroll_cmd("down", until_visible="Submit")
+        # Center 725 is 319pt below mid-screen (406): one slow swipe of that length
+        mock_swipe.assert_called_once_with(188, 566, 188, 246, 1.0)
+        result = json.loads(sys.stdout.getvalue())
+        self.assertEqual((result["found"], result["swipes"]), ("Submit", 1))
+
+    @patch('pippin.utils.wda.swipe')
+    @patch('pippin.utils.wda.scroll_to_visible', return_value=True)
+    @patch('pippin.utils.wda.find_element_ids', return_value=["E1"])
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_native_scroll_first(self, mock_tree, mock_ids, mock_native, mock_swipe):
+        mock_tree.side_effect = [self.snapshot("a"), self.snapshot("b", y=400)]
+        interaction.scroll_cmd("down", until_visible="Submit")
+        mock_native.assert_called_once_with("E1")
+        mock_swipe.assert_not_called()
+        result = json.loads(sys.stdout.getvalue())
+        self.assertEqual((result["strategy"], result["swipes"]), ("native", 0))
+
+    @patch('pippin.utils.wda.swipe')
+    @patch('pippin.utils.wda.scroll_to_visible')
+    @patch('pippin.utils.wda.find_element_ids')
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_falls_back_to_swipes(self, mock_tree, mock_ids, mock_native, mock_swipe):
+        mock_ids.side_effect = [[], []]
+        mock_tree.side_effect = [self.snapshot("a"), self.snapshot("b", y=400)]
+        interaction.scroll_cmd("down", until_visible="button:Submit")
+        self.assertEqual(mock_ids.call_args_list[1].args,
+                         ("predicate string", "type ==[c] 'XCUIElementTypebutton' AND label ==[c] 'Submit'"))
+        mock_native.assert_not_called()
+        self.assertEqual(json.loads(sys.stdout.getvalue())["strategy"], "swipe")
+
+    @patch('pippin.utils.wda.swipe')
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_stops_at_end_of_content(self, mock_tree, mock_swipe):
+        mock_tree.side_effect = [self.snapshot("a"), self.snapshot("b"), self.snapshot("b")]
+        with self.assertRaises(SystemExit):
+            interaction.scroll_cmd("down", until_visible="Missing")
+        self.assertEqual(mock_swipe.call_count, 2)
+        self.assertIn("end of the content after 2 swipe(s)", sys.stderr.getvalue())
+
+    @patch('pippin.utils.wda.swipe')
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_unknown_target_swipes_grow(self, mock_tree, mock_swipe):
+        mock_tree.side_effect = [self.snapshot(str(i)) for i in range(interaction.MAX_SWIPES + 1)]
+        with self.assertRaises(SystemExit):
+            interaction.scroll_cmd("down", until_visible="Missing")
+        lengths = [c.args[1] - c.args[3] for c in mock_swipe.call_args_list]
+        self.assertEqual(len(lengths), interaction.MAX_SWIPES)
+        self.assertEqual(lengths[:3], [324, 488, 568])
+        self.assertEqual(lengths[-1], 568)
+
+class TestTypeStrategies(unittest.TestCase):
+    def run_type(self, *args, **kwargs):
+        captured = StringIO()
+        sys.stdout, sys.stderr = captured, StringIO()
+        try:
+            interaction.type_cmd(*args, **kwargs)
+        finally:
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        return json.loads(captured.getvalue())
+
+    @patch('pippin.utils.wda.type_text')
+    @patch('pippin.utils.wda.active_element')
+    def test_auto_types_short_text(self, mock_active, mock_type):
+        result = self.run_type("hello")
+        mock_type.assert_called_once_with("hello")
+        mock_active.assert_not_called()
+        self.assertEqual(result["strategy"], "keys")
+        self.assertIn("chars_per_sec", result)
+
+    @patch('pippin.commands.interaction._paste_text')
+    @patch('pippin.utils.wda.element_attribute', return_value="XCUIElementTypeTextView")
+    @patch('pippin.utils.wda.active_element', return_value="E1")
+    def test_auto_pastes_long_text(self, mock_active, mock_attr, mock_paste):
+        text = "x" * 500
+        result = self.run_type(text)
+        mock_paste.assert_called_once_with(text, "E1")
+        self.assertEqual(result["strategy"], "paste")
+
+    @patch('pippin.utils.wda.set_element_value')
+    @patch('pippin.commands.interaction._paste_text', side_effect=Exception("The Paste menu did not appear."))
+    @patch('pippin.utils.wda.element_attribute', return_value="XCUIElementTypeTextField")
+    @patch('pippin.utils.wda.active_element', return_value="E1")
+    def test_auto_falls_back_to_set_value(self, mock_active, mock_attr, mock_paste, mock_set):
+        result = self.run_type("y" * 100)
+        mock_set.assert_called_once_with("E1", "y" * 100)
+        self.assertEqual(result["strategy"], "set-value")
+
+    @patch('pippin.commands.interaction._paste_text')
+    @patch('pippin.utils.wda.set_element_value')
+    @patch('pippin.utils.wda.element_attribute', return_value="XCUIElementTypeSecureTextField")
+    @patch('pippin.utils.wda.active_element', return_value="E1")
+    def test_secure_field_skips_paste(self, mock_active, mock_attr, mock_set, mock_paste):
+        self.assertEqual(self.run_type("p" * 100)["strategy"], "set-value")
+        mock_paste.assert_not_called()
+
+    @patch('pippin.utils.wda.active_element', return_value=None)
+    def test_set_value_needs_focus(self, _):
+        with self.assertRaises(SystemExit):
+            self.run_type("text", strategy="set-value")
+
+class TestFill(unittest.TestCase):
+    EMAIL = {"role": "TextField", "AXLabel": "Email", "frame": {"x": 20, "y": 200, "width": 300, "height": 40}}
+    PASSWORD = {"role": "SecureTextField", "AXLabel": "Password", "frame": {"x": 20, "y": 260, "width": 300, "height": 40}}
+
+    def setUp(self):
+        self.patches = [
+            patch('pippin.commands.interaction.time.sleep'),
+            patch('pippin.utils.wda.tap'),
+            patch('pippin.utils.wda.element_attribute', return_value="XCUIElementTypeTextField"),
+            patch('pippin.utils.wda.type_text'),
+            patch('pippin.utils.wda.dismiss_keyboard', return_value=True),
+            patch('pippin.utils.wda.press_key'),
+        ]
+        self.mocks = [p.start() for p in self.patches]
+        self.tap, self.type_text = self.mocks[1], self.mocks[3]
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def run_fill(self, fields, **kwargs):
+        captured = StringIO()
+        sys.stdout, sys.stderr = captured, StringIO()
+        try:
+            interaction.fill_cmd(json.dumps(fields), **kwargs)
+        finally:
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        return json.loads(captured.getvalue())
+
+    @patch('pippin.utils.wda.element_rect')
+    @patch('pippin.utils.wda.active_element')
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_one_snapshot_for_all_fields(self, mock_tree, mock_active, mock_rect):
+        mock_tree.return_value = [self.EMAIL, self.PASSWORD]
+        mock_active.side_effect = ["E1", "E2"]
+        mock_rect.side_effect = [self.EMAIL["frame"], self.PASSWORD["frame"]]
+        result = self.run_fill({"Email": "a@b.c", "Password": "secret"})
+        mock_tree.assert_called_once()
+        self.assertEqual([c.args for c in self.type_text.call_args_list], [("a@b.c",), ("secret",)])
+        self.assertEqual(result["refetches"], 0)
+        self.assertEqual([f["field"] for f in result["fields"]], ["Email", "Password"])
+
+    @patch('pippin.utils.wda.element_rect')
+    @patch('pippin.utils.wda.active_element')
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_refetches_when_field_moved(self, mock_tree, mock_active, mock_rect):
+        moved = dict(self.PASSWORD, frame={"x": 20, "y": 120, "width": 300, "height": 40})
+        mock_tree.side_effect = [[self.EMAIL, self.PASSWORD], [self.EMAIL, moved]]
+        mock_active.side_effect = ["E1", "E1", "E2"]
+        mock_rect.side_effect = [self.EMAIL["frame"], self.EMAIL["frame"], moved["frame"]]
+        result = self.run_fill({"Email": "a@b.c", "Password": "secret"}, submit=True)
+        self.assertEqual(result["refetches"], 1)
+        self.assertEqual(self.tap.call_args_list[-1].args, (170, 140))
+
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_missing_field_fails_before_typing(self, mock_tree):
+        mock_tree.return_value = [self.EMAIL]
+        with self.assertRaises(SystemExit):
+            self.run_fill({"Email": "a@b.c", "Phone": "555"})
+        self.tap.assert_not_called()
+
+    @patch('pippin.utils.wda.element_rect')
+    @patch('pippin.utils.wda.active_element')
+    @patch('pippin.commands.interaction.get_ui_tree')
+    def test_field_missing_after_refetch_fails(self, mock_tree, mock_active, mock_rect):
+        # The email tap missed, and the fresh snapshot no longer has the password field
+        mock_tree.side_effect = [[self.EMAIL, self.PASSWORD], [self.EMAIL]]
+        mock_active.return_value = None
+        captured = StringIO()
+        sys.stderr = captured
+        try:
+            with self.assertRaises(SystemExit) as ctx:
+                interaction.fill_cmd(json.dumps({"Email": "a@b.c", "Password": "secret"}))
+        finally:
+            sys.stderr = sys.__stderr__
+        self.assertEqual(ctx.exception.code, EXIT_ELEMENT_NOT_FOUND)
+        self.assertIn("Password", captured.getvalue())
+        self.type_text.assert_not_called()
+
+class TestAssertFile(unittest.TestCase):
+    TREE = [
+        {"role": "StaticText", "AXLabel": "Welcome", "frame": {"x": 0, "y": 100, "w": 200, "h": 20}},
+        {"role": "StaticText", "AXIdentifier": "balance", "AXLabel": "Balance", "AXValue": "$0.00",
+         "frame": {"x": 0, "y": 140, "w": 200, "h": 20}},
+    ]
+
+    def run_file(self, checks):
+        captured = StringIO()
+        sys.stdout, sys.stderr = captured, StringIO()
+        sys.stdin = StringIO(json.dumps(checks))
+        exit_code = 0
+        try:
+            verification.assert_file_cmd("-")
+        except SystemExit as e:
+            exit_code = e.code
+        finally:
+            sys.stdout, sys.stderr, sys.stdin = sys.__stdout__, sys.__stderr__, sys.__stdin__
+        return json.loads(captured.getvalue()), exit_code
+
+    @patch('pippin.utils.ui.is_onscreen', return_value=True)
+    @patch('pippin.utils.ui.get_ui_tree')
+    def test_all_checks_one_snapshot(self, mock_get_tree, _):
+        mock_get_tree.return_value = self.TREE
+        report, code = self.run_file([
+            {"query": "Welcome", "state": "visible"},
+            {"query": "balance", "state": "text=$0.00"},
+            {"query": "Spinner", "state": "hidden"},
+        ])
+        mock_get_tree.assert_called_once()
+        self.assertEqual((report["passed"], report["failed"], code), (3, 0, 0))
+
+    @patch('pippin.utils.ui.is_onscreen', return_value=True)
+    @patch('pippin.utils.ui.get_ui_tree')
+    def test_failures_reported_per_check(self, mock_get_tree, _):
+        mock_get_tree.return_value = self.TREE
+        report, code = self.run_file({"Welcome": ["exists", "hidden"], "balance": "text=$5.00", "Missing": "exists"})
+        self.assertEqual([c["passed"] for c in report["checks"]], [True, False, False, False])
+        self.assertEqual(report["checks"][2]["error"], "ERR_TEXT_MISMATCH")
+        self.assertEqual(code, 4)
+
+    @patch('pippin.utils.ui.get_ui_tree')
+    def test_invalid_checks(self, mock_get_tree):
+        for checks in ('[{"query": "x"}]', '{"Welcome": ["exists", "visibel"]}'):
+            with self.assertRaises(SystemExit):
+                sys.stdin = StringIO(checks)
+                sys.stderr = StringIO()
+                try:
+                    verification.assert_file_cmd("-")
+                finally:
+                    sys.stdin, sys.stderr = sys.__stdin__, sys.__stderr__
+        # Typos fail before the UI is read
+        mock_get_tree.assert_not_called()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,79 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+from pippin.utils import crash
+
+class TestCrashIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.index_patch = patch('pippin.utils.crash.INDEX_FILE', os.path.join(self.dir, "index.json"))
+        self.index_patch.start()
+
+    def tearDown(self):
+        self.index_patch.stop()
+        self.tmp.cleanup()
+
+    def _write(self, name, header, mtime):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(json.dumps(header) + "\n{}")
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_latest_crash_by_bundle_and_since(self):
+        self._write("a.ips", {"bundleID": "com.test.app"}, 1000)
+        newest = self._write("b.ips", {"bundleID": "com.test.app"}, 2000)
+        self._write("c.ips", {"bundleID": "com.other.app"}, 3000)
+
+        path, info = crash.latest_crash("com.test.app", directory=self.dir)
+        self.assertEqual(path, newest)
+        self.assertIsNone(crash.latest_crash("com.test.app", since=2500, directory=self.dir))
+
+    def test_unchanged_reports_are_not_reparsed(self):
+        self._write("a.ips", {"bundleID": "com.test.app"}, 1000)
+        crash.update_index(self.dir)
+        self._write("b.ips", {"bundleID": "com.test.app"}, 2000)
+        with patch('pippin.utils.crash._read_header', wraps=crash._read_header) as mock_read:
+            reports = crash.update_index(self.dir)
+        self.assertEqual(set(reports), {"a.ips", "b.ips"})
+        mock_read.assert_called_once_with(os.path.join(self.dir, "b.ips"))
+
+    def test_report_finished_in_place_is_parsed_again(self):
+        path = os.path.join(self.dir, "a.ips")
+        with open(path, "w") as f:
+            f.write('{"bundleID": "com.te')
+        os.utime(path, (1000, 1000))
+        os.utime(self.dir, (5000, 5000))
+        self.assertIs(crash.update_index(self.dir)["a.ips"]["header"], False)
+
+        # Finishing the write changes the report's mtime but not the directory's
+        self._write("a.ips", {"bundleID": "com.test.app"}, 2000)
+        os.utime(self.dir, (5000, 5000))
+        self.assertEqual(crash.update_index(self.dir)["a.ips"]["bundle_id"], "com.test.app")
+        self.assertEqual(crash.latest_crash("com.test.app", directory=self.dir)[0], path)
+
+    def test_headerless_reports_match_by_filename(self):
+        path = os.path.join(self.dir, "MyApp-2026-01-01-101500.crash")
+        with open(path, "w") as f:
+            f.write("Process: MyApp [123]\nIdentifier: com.test.MyApp\n")
+        os.utime(path, (1000, 1000))
+        found, info = crash.latest_crash("com.test.MyApp", directory=self.dir)
+        self.assertEqual(found, path)
+        self.assertIs(info["header"], False)
+        self.assertIsNone(crash.latest_crash("com.other.app", directory=self.dir))
+
+    def test_unreadable_reports_do_not_force_rescans(self):
+        self._write("a.ips", {"bundleID": "com.test.app"}, 1000)
+        with open(os.path.join(self.dir, "partial.ips"), "w") as f:
+            f.write("{\"bundleID\": ")
+        crash.update_index(self.dir)
+        with patch('pippin.utils.crash._read_header') as mock_read:
+            reports = crash.update_index(self.dir)
+        mock_read.assert_not_called()
+        self.assertIn("partial.ips", reports)
+
+if __name__ == "__main__":
+    unittest.main()
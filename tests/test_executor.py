@@ -1,5 +1,5 @@
 import unittest
-from pippin.utils.executor import execute_command, set_dry_run, register_mock_response, clear_mock_responses
+from pippin.utils.executor import execute_command, stream_command, set_dry_run, register_mock_response, clear_mock_responses, set_device_set, with_device_set
 import subprocess
 
 class TestExecutor(unittest.TestCase):
@@ -16,5 +16,19 @@ class TestExecutor(unittest.TestCase):
         output = execute_command(["echo", "hello"])
         self.assertEqual(output, "")
 
+    def test_stream_mock_response(self):
+        register_mock_response(["log", "show"], "a\nb")
+        self.assertEqual(list(stream_command(["log", "show"])), ["a", "b"])
+
+    def test_device_set_inserted_for_simctl(self):
+        set_device_set("/tmp/set")
+        try:
+            self.assertEqual(with_device_set(["xcrun", "simctl", "boot", "X"]),
+                             ["xcrun", "simctl", "--set", "/tmp/set", "boot", "X"])
+            self.assertEqual(with_device_set(["ls"]), ["ls"])
+        finally:
+            set_device_set(None)
+        self.assertEqual(with_device_set(["xcrun", "simctl", "boot", "X"]), ["xcrun", "simctl", "boot", "X"])
+
 if __name__ == '__main__':
     unittest.main()
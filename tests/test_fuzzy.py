@@ -0,0 +1,68 @@
+import unittest
+from pippin.utils import fuzzy
+from pippin.utils.ui import find_element, find_candidates, suggest
+
+def el(label, identifier=None, role="Button", visible=True):
+    node = {"role": role, "AXLabel": label, "frame": {"x": 0, "y": 0, "width": 10, "height": 10}}
+    if identifier:
+        node["AXIdentifier"] = identifier
+    if not visible:
+        node["visible"] = False
+    return node
+
+class TestFuzzy(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(fuzzy.normalize("  Log-In!  Now "), "log in now")
+
+    def test_levenshtein(self):
+        self.assertEqual(fuzzy.levenshtein("kitten", "sitting"), 3)
+        self.assertEqual(fuzzy.levenshtein("abc", "abcdefgh", limit=2), 3)
+
+    def test_spacing_and_typos(self):
+        index = fuzzy.FuzzyIndex([el("Log in"), el("Settings"), el("Open account settings")])
+        self.assertEqual(index.search("Login")[0][1]["AXLabel"], "Log in")
+        self.assertEqual(index.search("Setings")[0][1]["AXLabel"], "Settings")
+        # A typo in one word of a longer label
+        self.assertEqual(index.search("acount setings")[0][1]["AXLabel"], "Open account settings")
+        self.assertEqual(index.search("Profile"), [])
+        # One letter off in a short word is a different word
+        self.assertEqual(fuzzy.FuzzyIndex([el("Safe")]).search("Save"), [])
+
+    def test_numbers_must_match(self):
+        index = fuzzy.FuzzyIndex([el("Step 2 of 5"), el("Item 12")])
+        self.assertEqual(index.search("Step 3 of 5"), [])
+        self.assertEqual(index.search("Item 1"), [])
+        self.assertEqual(index.search("Stepp 2 of 5")[0][1]["AXLabel"], "Step 2 of 5")
+
+    def test_large_tree(self):
+        elements = [el(f"Item number {i}") for i in range(10000)] + [el("Checkout")]
+        index = fuzzy.FuzzyIndex(elements)
+        self.assertEqual(index.search("Chekout")[0][1]["AXLabel"], "Checkout")
+
+    def test_excluded_entries_do_not_fill_the_prefilter(self):
+        # Hidden labels sharing more trigrams than the visible one would take every slot
+        hidden = [el("Checkout", visible=False) for _ in range(fuzzy.PREFILTER_LIMIT * 2)]
+        index = fuzzy.FuzzyIndex(hidden + [el("Chekcout now")])
+        hits = index.search("Checkout", min_score=0.5, include=lambda el: el.get("visible") is not False)
+        self.assertEqual([hit[1]["AXLabel"] for hit in hits], ["Chekcout now"])
+
+    def test_find_element_fuzzy_tier(self):
+        elements = [el("Log in"), el("Logout", visible=False)]
+        self.assertEqual(find_element("Login", silent=True, elements=elements, fuzzy=True)["AXLabel"], "Log in")
+        self.assertIsNone(find_element("Login", silent=True, strict=True, elements=elements, fuzzy=True))
+        # Verification does not ask for fuzzy matches
+        self.assertIsNone(find_element("Login", silent=True, elements=elements))
+
+    def test_candidates_ranked(self):
+        elements = [el("Sign in with Apple"), el("Sign in"), el("Sign up")]
+        ranked = [(round(score, 2), e["AXLabel"]) for score, e in find_candidates("Sign in", elements, 3)]
+        self.assertEqual(ranked[0], (1.0, "Sign in"))
+        self.assertEqual([label for _, label in ranked], ["Sign in", "Sign in with Apple", "Sign up"])
+
+    def test_suggest(self):
+        elements = [el("Continue"), el("Cancel")]
+        self.assertIn("'Continue'", suggest("Contnue now", elements))
+        self.assertEqual(suggest("zzz", elements), "")
+
+if __name__ == "__main__":
+    unittest.main()
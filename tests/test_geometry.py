@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from pippin.utils import geometry
+from pippin.utils.state import get_device_state, set_device_state
+
+WINDOW = [{"role": "Window", "frame": {"x": 0, "y": 0, "w": 390, "h": 844}}]
+
+class TestGeometry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "state.json")
+        geometry._resolved.clear()
+        # No real state files, WDA requests or simctl calls
+        self.patches = [
+            patch("pippin.utils.state._device_state_file", return_value=path),
+            patch("pippin.utils.wda.orientation", return_value="PORTRAIT"),
+            patch("pippin.utils.wda.window_size", return_value=None),
+            patch.object(geometry, "device_type_size", return_value=None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        geometry._resolved.clear()
+        self.tmp.cleanup()
+
+    def test_resolves_once_and_persists(self):
+        with patch("pippin.utils.wda.window_size", return_value=(390.0, 844.0)) as mock_window:
+            self.assertEqual(geometry.get_screen_size("UDID"), (390.0, 844.0))
+            self.assertEqual(geometry.get_screen_size("UDID"), (390.0, 844.0))
+        self.assertEqual(mock_window.call_count, 1)
+        stored = get_device_state("UDID", "geometry")
+        self.assertEqual((stored["width"], stored["orientation"], stored["source"]), (390.0, "PORTRAIT", "wda"))
+
+    def test_snapshot_before_device_type(self):
+        self.assertEqual(geometry.get_screen_size("UDID", tree=WINDOW), (390, 844))
+        geometry.device_type_size.assert_not_called()
+
+    def test_device_type_swapped_in_landscape(self):
+        with patch.object(geometry, "device_type_size", return_value=(390.0, 844.0)), \
+             patch("pippin.utils.wda.orientation", return_value="LANDSCAPE"):
+            self.assertEqual(geometry.get_screen_size("UDID"), (844.0, 390.0))
+
+    def test_rotation_invalidates_cache(self):
+        with patch("pippin.utils.wda.window_size", return_value=(390.0, 844.0)):
+            geometry.get_screen_size("UDID")
+        geometry._resolved.clear()  # new process
+        with patch("pippin.utils.wda.orientation", return_value="LANDSCAPE"), \
+             patch("pippin.utils.wda.window_size", return_value=(844.0, 390.0)) as mock_window:
+            self.assertEqual(geometry.get_screen_size("UDID"), (844.0, 390.0))
+            mock_window.assert_called_once()
+
+    def test_unknown_orientation_is_stale(self):
+        set_device_state("UDID", "geometry", {"width": 390.0, "height": 844.0, "orientation": None})
+        with patch("pippin.utils.wda.window_size", return_value=(844.0, 390.0)):
+            self.assertEqual(geometry.get_screen_size("UDID"), (844.0, 390.0))
+
+        # WDA down: the cached portrait size cannot be trusted and is not overwritten
+        geometry._resolved.clear()
+        set_device_state("UDID", "geometry", {"width": 390.0, "height": 844.0, "orientation": "PORTRAIT"})
+        with patch("pippin.utils.wda.orientation", return_value=None):
+            self.assertEqual(geometry.get_screen_size("UDID", tree=[{"role": "Window", "frame": {"x": 0, "y": 0, "w": 844, "h": 390}}]),
+                             (844, 390))
+        self.assertEqual(get_device_state("UDID", "geometry")["orientation"], "PORTRAIT")
+
+    def test_fallback_not_persisted(self):
+        self.assertEqual(geometry.get_screen_size("UDID", fetch_tree=lambda: []), geometry.DEFAULT_SIZE)
+        self.assertIsNone(get_device_state("UDID", "geometry"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import sys
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from pippin.utils import gestures
+from pippin.commands import interaction
+
+class TestGestures(unittest.TestCase):
+    def test_parse_spec_taps(self):
+        chain = gestures.parse_spec("100,600 tap 200,600 tap")
+        actions = chain.to_w3c()
+        self.assertEqual(len(actions), 1)
+        types = [a["type"] for a in actions[0]["actions"]]
+        self.assertEqual(types, ["pointerMove", "pointerDown", "pause", "pointerUp"] * 2)
+
+    def test_parse_spec_two_pointers(self):
+        chain = gestures.parse_spec("150,400 down 100,350@400 up | 225,400 down 275,450@400 wait:100 up")
+        first, second = chain.to_w3c()
+        self.assertEqual((first["id"], second["id"]), ("finger1", "finger2"))
+        self.assertEqual(first["actions"][2], {"type": "pointerMove", "duration": 400, "x": 100, "y": 350})
+        # Ticks run in parallel: the 400 ms moves overlap, then the 100 ms wait
+        self.assertEqual(chain.duration_ms(), 500)
+
+    def test_parse_spec_errors(self):
+        for spec in ("", "tap", "1,2 jump", "1,x down", " | ".join(["1,1 tap"] * 6)):
+            with self.assertRaises(ValueError):
+                gestures.parse_spec(spec)
+
+    def test_pinch_symmetric(self):
+        left, right = gestures.pinch(200, 400, 2.0, 300).to_w3c()
+        self.assertEqual((left["actions"][0]["x"], right["actions"][0]["x"]), (150, 250))
+        self.assertEqual((left["actions"][2]["x"], right["actions"][2]["x"]), (100, 300))
+
+    def test_rotate_ends_turned(self):
+        first, second = gestures.rotate(200, 400, 90, 800, radius=100, steps=4).to_w3c()
+        start, end = first["actions"][0], first["actions"][-2]
+        self.assertEqual((start["x"], start["y"]), (100, 400))
+        self.assertEqual((end["x"], end["y"]), (200, 300))
+        self.assertEqual(len(first["actions"]), len(second["actions"]))
+
+    @patch("pippin.utils.wda.perform_actions")
+    def test_chain_is_one_request(self, mock_perform):
+        captured = StringIO()
+        sys.stdout = captured
+        try:
+            interaction.gesture_cmd("chain", ["100,600 tap", "|", "200,600 tap"])
+        finally:
+            sys.stdout = sys.__stdout__
+        mock_perform.assert_called_once()
+        self.assertEqual(len(mock_perform.call_args.args[0]), 2)
+        self.assertEqual(json.loads(captured.getvalue())["pointers"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+from pippin.utils import handles
+from pippin.utils.handles import assign_handles, resolve_handle
+
+class TestHandles(unittest.TestCase):
+    def test_assign_handles_copies_in_preorder(self):
+        elements = [{"type": "Window", "frame": "0,0,375,812", "children": [
+            {"type": "Button", "id": "login", "label": "Log In", "frame": "10,20,100,50"},
+            {"type": "StaticText", "label": "Hi", "frame": "0,100,50,20"},
+        ]}]
+        annotated, table = assign_handles(elements)
+        self.assertEqual(annotated[0]["handle"], "e1")
+        self.assertEqual([c["handle"] for c in annotated[0]["children"]], ["e2", "e3"])
+        self.assertNotIn("handle", elements[0])
+        self.assertEqual(table["e2"], {"role": "Button", "id": "login", "label": "Log In",
+                                       "frame": {"x": 10.0, "y": 20.0, "width": 100.0, "height": 50.0}})
+
+    def _table(self, **extra):
+        entry = {"role": "Button", "id": "login", "label": "Log In",
+                 "frame": {"x": 10.0, "y": 20.0, "width": 100.0, "height": 50.0}}
+        entry.update(extra)
+        return {"e2": entry}
+
+    @patch("pippin.utils.handles.save_handles")
+    @patch("pippin.utils.ui.get_ui_tree")
+    @patch("pippin.utils.wda.element_rect")
+    @patch("pippin.utils.wda.find_element_ids")
+    def test_resolve_through_wda_without_tree(self, mock_find, mock_rect, mock_tree, mock_save):
+        mock_find.return_value = ["A", "B"]
+        # Two elements share the id; the inspected one was the second in tree order
+        mock_rect.side_effect = lambda eid: {"x": 10, "y": 20, "width": 100, "height": 50} if eid == "B" \
+            else {"x": 10, "y": 400, "width": 100, "height": 50}
+        with patch.object(handles, "load_handles", return_value=self._table(nth=1, count=2)):
+            el = resolve_handle("@e2", udid="U")
+        self.assertEqual(el["AXIdentifier"], "login")
+        self.assertEqual(el["frame"]["y"], 20)
+        mock_rect.assert_called_once_with("B")
+        mock_tree.assert_not_called()
+        self.assertEqual(mock_save.call_args[0][1]["e2"]["wda_id"], "B")
+
+    @patch("pippin.utils.handles.save_handles")
+    @patch("pippin.utils.ui.get_ui_tree")
+    @patch("pippin.utils.wda.element_rect")
+    @patch("pippin.utils.wda.find_element_ids", return_value=["A", "B", "C"])
+    def test_ambiguous_matches_use_one_tree_fetch(self, mock_find, mock_rect, mock_tree, mock_save):
+        mock_tree.return_value = [
+            {"role": "Button", "AXIdentifier": "login", "AXLabel": "Log In", "frame": {"x": 10, "y": 400, "width": 100, "height": 50}},
+            {"role": "Button", "AXIdentifier": "login", "AXLabel": "Log In", "frame": {"x": 10, "y": 30, "width": 100, "height": 50}},
+        ]
+        with patch.object(handles, "load_handles", return_value=self._table(nth=1, count=2)):
+            el = resolve_handle("@e2", udid="U", silent=True)
+        self.assertEqual(el["frame"]["y"], 30)
+        mock_rect.assert_not_called()
+        mock_tree.assert_called_once()
+
+    def test_assign_handles_records_position_of_duplicates(self):
+        _, table = assign_handles([{"type": "Cell", "label": "Row"}, {"type": "Cell", "label": "Row"},
+                                   {"type": "Cell", "label": "Other"}])
+        self.assertEqual((table["e1"]["nth"], table["e2"]["nth"], table["e2"]["count"]), (0, 1, 2))
+        self.assertNotIn("nth", table["e3"])
+
+    def test_is_handle_is_strict(self):
+        self.assertTrue(handles.is_handle("@e12"))
+        for query in ("@username", "@e", "@e12x", "e12", "@E1"):
+            self.assertFalse(handles.is_handle(query), query)
+
+    @patch("pippin.utils.handles.save_handles")
+    @patch("pippin.utils.ui.get_ui_tree")
+    @patch("pippin.utils.wda.element_rect", return_value=None)
+    @patch("pippin.utils.wda.find_element_ids", return_value=[])
+    def test_stale_handle_refreshes_from_tree(self, mock_find, mock_rect, mock_tree, mock_save):
+        mock_tree.return_value = [
+            {"role": "Button", "AXIdentifier": "login", "AXLabel": "Log In",
+             "frame": {"x": 10, "y": 300, "width": 100, "height": 50}},
+        ]
+        with patch.object(handles, "load_handles", return_value=self._table(wda_id="OLD")):
+            el = resolve_handle("@e2", udid="U", silent=True)
+        self.assertEqual(el["frame"]["y"], 300)
+        self.assertIsNone(mock_save.call_args[0][1]["e2"]["wda_id"])
+
+    def test_unknown_handle(self):
+        with patch.object(handles, "load_handles", return_value={}):
+            self.assertIsNone(resolve_handle("@e9", udid="U", silent=True))
+
+if __name__ == '__main__':
+    unittest.main()
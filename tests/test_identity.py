@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import patch
+from pippin.utils.identity import compute_records, match_records, assign_stable_ids
+
+def _screen(offset=0, labels=("Inbox", "Sent", "Drafts")):
+    cells = [{"role": "Cell", "AXLabel": label,
+              "frame": {"x": 0, "y": 100 + i * 44 - offset, "width": 375, "height": 44}}
+             for i, label in enumerate(labels)]
+    return [{"role": "Window", "nodes": [
+        {"role": "Button", "AXIdentifier": "compose", "frame": {"x": 300, "y": 40, "width": 44, "height": 44}},
+        {"role": "Table", "nodes": cells},
+    ]}]
+
+def _ids(tree):
+    assign_stable_ids(tree)
+    table = tree[0]["nodes"][1]
+    return [c["id_stable"] for c in table["nodes"]], tree[0]["nodes"][0]["id_stable"]
+
+class TestIdentity(unittest.TestCase):
+    def test_ids_survive_scrolling(self):
+        before, compose_before = _ids(_screen())
+        after, compose_after = _ids(_screen(offset=60))
+        self.assertEqual(before, after)
+        self.assertEqual(compose_before, compose_after)
+        self.assertEqual(len(set(before)), 3)
+
+    def test_duplicate_keys_ordered_by_frame(self):
+        records = compute_records(_screen(labels=("Same", "Same")))
+        sids = [r["sid"] for r in records if r["role"] == "Cell"]
+        self.assertEqual(sids[1], sids[0] + "-1")
+
+    def test_relabeled_element_keeps_id(self):
+        previous = assign_stable_ids(_screen())
+        tree = _screen(labels=("Inbox (3)", "Sent", "Drafts"))
+        assign_stable_ids(tree, previous=previous)
+        old_ids, _ = _ids(_screen())
+        self.assertEqual(tree[0]["nodes"][1]["nodes"][0]["id_stable"], old_ids[0])
+
+    def test_replaced_rows_do_not_inherit_out_of_place(self):
+        # "Inbox" scrolled away at the top, "Archive" appeared at the bottom
+        previous = compute_records(_screen())
+        current = compute_records(_screen(labels=("Sent", "Drafts", "Archive")))
+        carried = match_records(previous, current)
+        self.assertEqual(carried, 0)
+
+    def test_colliding_hashes_get_distinct_ids(self):
+        with patch("pippin.utils.identity._hash", return_value="same"):
+            records = compute_records(_screen())
+        self.assertEqual(len({r["sid"] for r in records}), len(records))
+
+    def test_moved_element_does_not_cut_alignment(self):
+        # "compose" moved below the table, and "Sent" was relabeled
+        previous = compute_records(_screen())
+        tree = _screen(labels=("Inbox", "Sent (1)", "Drafts"))
+        tree[0]["nodes"].reverse()
+        current = compute_records(tree)
+        sent = previous[4]["sid"]
+        self.assertEqual(match_records(previous, current), 1)
+        self.assertEqual([r["sid"] for r in current if r["label"] == "Sent (1)"], [sent])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import patch
+from pippin.utils import imaging
+
+try:
+    import numpy  # noqa: F401
+    from PIL import Image
+    HAS_IMAGING = True
+except ImportError:
+    HAS_IMAGING = False
+
+def _png(img):
+    import io
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+class TestCapture(unittest.TestCase):
+    @patch('pippin.utils.executor.execute_command', return_value=b"\x89PNGsimctl")
+    @patch('pippin.utils.wda.screenshot', return_value=None)
+    def test_capture_falls_back_to_simctl(self, mock_wda, mock_exec):
+        self.assertEqual(imaging.capture_screenshot("UDID-1"), b"\x89PNGsimctl")
+        mock_exec.assert_called_once_with(
+            ["xcrun", "simctl", "io", "UDID-1", "screenshot", "--type=png", "-"], binary=True)
+
+    def test_process_image_passthrough(self):
+        self.assertEqual(imaging.process_image(b"png"), (b"png", None, None))
+
+    @unittest.skipUnless(HAS_IMAGING, "numpy and Pillow are required")
+    def test_process_image_resize(self):
+        data = _png(Image.new("RGB", (750, 1624), "white"))
+        out, width, height = imaging.process_image(data, max_dim=406)
+        self.assertEqual((width, height), (188, 406))
+        self.assertEqual(Image.open(__import__("io").BytesIO(out)).size, (188, 406))
+
+    @unittest.skipUnless(HAS_IMAGING, "numpy and Pillow are required")
+    def test_process_image_crop_scales_points(self):
+        data = _png(Image.new("RGB", (750, 1624), "white"))
+        _, width, height = imaging.process_image(data, crop=(10, 20, 100, 50), scale=2.0)
+        self.assertEqual((width, height), (200, 100))
+        with self.assertRaises(ValueError):
+            imaging.process_image(data, crop=(1000, 2000, 10, 10), scale=2.0)
+
+class TestScreenChange(unittest.TestCase):
+    def test_hash_distance(self):
+        self.assertEqual(imaging.hash_distance(0b1010, 0b1010), 0)
+        self.assertEqual(imaging.hash_distance(0b1010, 0b0101), 4)
+
+    @patch('pippin.utils.state.set_device_state')
+    @patch('pippin.utils.state.get_device_state')
+    @patch('pippin.utils.imaging.capture_screenshot', return_value=b"png")
+    @patch('pippin.utils.imaging.screen_signature')
+    def test_detect_screen_change(self, mock_signature, mock_capture, mock_get, mock_set):
+        state = {}
+        mock_get.side_effect = lambda udid, key: state.get(key)
+        mock_set.side_effect = lambda udid, key, value: state.__setitem__(key, value)
+
+        mock_signature.return_value = (0b1111, "aa")
+        self.assertTrue(imaging.detect_screen_change("UDID"))
+        self.assertEqual(state, {"screen_hash": "f", "screen_pixels": "aa"})
+        self.assertFalse(imaging.detect_screen_change("UDID"))
+
+        # One bit away: within the threshold the exact pixels decide
+        mock_signature.return_value = (0b0111, "aa")
+        self.assertFalse(imaging.detect_screen_change("UDID", threshold=2))
+        mock_signature.return_value = (0b0111, "bb")
+        self.assertTrue(imaging.detect_screen_change("UDID", threshold=2))
+        mock_signature.return_value = (0b1111, "bb")
+        self.assertTrue(imaging.detect_screen_change("UDID", threshold=0))
+
+    @patch('pippin.utils.imaging.capture_screenshot', side_effect=Exception("no device"))
+    def test_detect_screen_change_unavailable(self, mock_capture):
+        self.assertIsNone(imaging.detect_screen_change("UDID"))
+
+    @unittest.skipUnless(HAS_IMAGING, "numpy and Pillow are required")
+    def test_perceptual_hash_is_stable(self):
+        img = Image.new("L", (390, 844), 255)
+        for x in range(0, 390, 40):
+            img.paste(0, (x, 0, x + 20, 844))
+        data = _png(img)
+        self.assertEqual(imaging.perceptual_hash(data), imaging.perceptual_hash(data))
+
+    @unittest.skipUnless(HAS_IMAGING, "numpy and Pillow are required")
+    def test_small_change_is_detected(self):
+        state = {}
+        img = Image.new("L", (390, 844), 255)
+        for x in range(0, 390, 40):
+            img.paste(0, (x, 0, x + 20, 844))
+        before = _png(img)
+        # A switch-sized patch flips in one corner
+        img.paste(128, (340, 800, 350, 810))
+        after = _png(img)
+        self.assertLessEqual(imaging.hash_distance(imaging.perceptual_hash(before), imaging.perceptual_hash(after)), 2)
+
+        with patch('pippin.utils.state.get_device_state', side_effect=lambda u, k: state.get(k)), \
+             patch('pippin.utils.state.set_device_state', side_effect=lambda u, k, v: state.__setitem__(k, v)), \
+             patch('pippin.utils.imaging.capture_screenshot', side_effect=[before, before, after]):
+            self.assertTrue(imaging.detect_screen_change("UDID"))
+            self.assertFalse(imaging.detect_screen_change("UDID"))
+            self.assertTrue(imaging.detect_screen_change("UDID"))
+
+if __name__ == "__main__":
+    unittest.main()
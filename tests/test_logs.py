@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from pippin.utils import logs
+
+class TestLogCollector(unittest.TestCase):
+    @patch('pippin.utils.logs.execute_command')
+    def test_get_app_pid(self, mock_exec):
+        mock_exec.return_value = (
+            "PID\tStatus\tLabel\n"
+            "-\t0\tcom.apple.something\n"
+            "4242\t0\tUIKitApplication:com.test.app[1a2b][rb-legacy]\n"
+        )
+        self.assertEqual(logs.get_app_pid("UDID", "com.test.app"), 4242)
+        self.assertIsNone(logs.get_app_pid("UDID", "com.other.app"))
+
+    def test_log_predicate(self):
+        self.assertEqual(logs.log_predicate("com.test.app"), 'subsystem == "com.test.app"')
+        self.assertEqual(logs.log_predicate("com.test.app", 12),
+                         'processID == 12 OR subsystem == "com.test.app"')
+
+    @patch('pippin.utils.logs.collector_pid', return_value=None)
+    def test_read_buffer_without_collector(self, mock_pid):
+        self.assertIsNone(logs.read_buffer("UDID"))
+
+    @patch('pippin.utils.logs.collector_pid', return_value=123)
+    def test_read_buffer_tail(self, mock_pid):
+        with tempfile.TemporaryDirectory() as tmp:
+            spool = os.path.join(tmp, "spool.log")
+            with patch('pippin.utils.logs._spool_file', return_value=spool):
+                logs._flush([f"line {i}\n" for i in range(10)], spool)
+                self.assertEqual(logs.read_buffer("UDID", lines=2), ["line 8", "line 9"])
+                self.assertEqual(len(logs.read_buffer("UDID")), 10)
+
+    def test_log_show_command_uses_cursor(self):
+        cmd = logs.log_show_command("UDID", "com.test.app", cursor="2026-01-01 10:00:05.250")
+        self.assertIn("--start", cmd)
+        self.assertEqual(cmd[cmd.index("--start") + 1], "2026-01-01 10:00:05")
+        self.assertNotIn("--last", cmd)
+
+        cmd = logs.log_show_command("UDID", "com.test.app")
+        self.assertEqual(cmd[-2:], ["--last", "5m"])
+
+    def test_new_entries_after_cursor(self):
+        lines = [
+            "Timestamp               Ty Process[PID:TID]",
+            "2026-01-01 10:00:05.100 Df App[1:2] old",
+            "2026-01-01 10:00:05.300 E  App[1:2] new",
+            "  continued",
+            "2026-01-01 10:00:06.000 Df App[1:2] newer",
+        ]
+        last_seen = {}
+        out = list(logs.new_entries(lines, "2026-01-01 10:00:05.250", last_seen))
+        self.assertEqual(out, [lines[2], lines[3], lines[4]])
+        self.assertEqual(last_seen["timestamp"], "2026-01-01 10:00:06.000")
+
+    def test_parse_compact_line(self):
+        rec = logs.parse_compact_line("2026-01-01 10:00:05.100 E  MyApp[12:34] [com.test.app:network] Request failed")
+        self.assertEqual(rec, {
+            "time": "2026-01-01 10:00:05.100",
+            "level": "error",
+            "process": "MyApp",
+            "category": "network",
+            "message": "Request failed",
+        })
+        self.assertIsNone(logs.parse_compact_line("  continuation"))
+
+    def test_summarize_logs_dedup_and_caps(self):
+        lines = [
+            "2026-01-01 10:00:01.000 Df MyApp[1:2] tick",
+            "2026-01-01 10:00:02.000 Df MyApp[1:2] tick",
+            "2026-01-01 10:00:03.000 E  MyApp[1:2] boom",
+            "  at line 3",
+            "2026-01-01 10:00:04.000 I  MyApp[1:2] chatter",
+            "2026-01-01 10:00:05.000 F  MyApp[1:2] fatal",
+        ]
+        summary = logs.summarize_logs(iter(lines), min_level="default")
+        self.assertEqual(summary["total"], 4)
+        tick = summary["entries"][0]
+        self.assertEqual(tick["count"], 2)
+        self.assertEqual(tick["last"], "2026-01-01 10:00:02.000")
+        self.assertEqual(summary["entries"][1]["message"], "boom\n  at line 3")
+
+        capped = logs.summarize_logs(iter(lines), max_entries=2)
+        self.assertEqual(len(capped["entries"]), 2)
+        self.assertEqual(capped["dropped"], 2)
+
+    def test_summarize_logs_last_seen_stops_at_first_drop(self):
+        lines = [
+            "2026-01-01 10:00:01.000 Df MyApp[1:2] one",
+            "2026-01-01 10:00:02.000 Df MyApp[1:2] two",
+            "2026-01-01 10:00:03.000 Df MyApp[1:2] three",
+            "2026-01-01 10:00:04.000 Df MyApp[1:2] one",
+        ]
+        last_seen = {}
+        logs.summarize_logs(iter(lines), max_entries=2, last_seen=last_seen)
+        self.assertEqual(last_seen["timestamp"], "2026-01-01 10:00:02.000")
+
+        last_seen = {}
+        logs.summarize_logs(iter(lines), last_seen=last_seen)
+        self.assertEqual(last_seen["timestamp"], "2026-01-01 10:00:04.000")
+
+    def test_filter_level_keeps_continuations(self):
+        lines = [
+            "2026-01-01 10:00:01.000 I  MyApp[1:2] chatter",
+            "  more chatter",
+            "2026-01-01 10:00:03.000 E  MyApp[1:2] boom",
+            "  at line 3",
+        ]
+        self.assertEqual(list(logs.filter_level(lines, "error")), lines[2:])
+        self.assertEqual(list(logs.filter_level(lines)), lines)
+
+class TestLogsCommand(unittest.TestCase):
+    LINES = [
+        "2026-01-01 10:00:01.000 Df MyApp[1:2] one",
+        "2026-01-01 10:00:02.000 E  MyApp[1:2] two",
+        "2026-01-01 10:00:03.000 Df MyApp[1:2] three",
+    ]
+
+    def setUp(self):
+        for target, value in (("get_simctl_target", "UDID"), ("get_last_bundle_id", "com.test.app"),
+                              ("read_buffer", None), ("get_log_cursor", None), ("get_app_pid", None)):
+            patcher = patch(f'pippin.commands.verification.{target}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch('pippin.commands.verification.stream_command', side_effect=lambda cmd: iter(self.LINES))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, **kwargs):
+        from pippin.commands import verification
+        out = StringIO()
+        with patch('sys.stdout', out):
+            verification.logs_cmd(**kwargs)
+        return out.getvalue()
+
+    @patch('pippin.commands.verification.set_log_cursor')
+    def test_truncated_summary_keeps_dropped_entries_after_cursor(self, mock_cursor):
+        data = json.loads(self._run(max_lines=1))
+        self.assertTrue(data["truncated"])
+        mock_cursor.assert_called_once_with("UDID", "com.test.app", "2026-01-01 10:00:01.000")
+
+    @patch('pippin.commands.verification.set_log_cursor')
+    def test_raw_applies_level(self, mock_cursor):
+        out = self._run(raw=True, level="error")
+        self.assertEqual(out.splitlines(), [self.LINES[1]])
+        mock_cursor.assert_called_once_with("UDID", "com.test.app", "2026-01-01 10:00:03.000")
+
+    @patch('pippin.commands.verification.stop_collector', return_value=True)
+    def test_collect_stop_without_bundle(self, mock_stop):
+        with patch('pippin.commands.verification.get_last_bundle_id', return_value=None):
+            data = json.loads(self._run(collect="stop"))
+        self.assertEqual(data["collector"], "stopped")
+        mock_stop.assert_called_once_with("UDID")
+
+if __name__ == "__main__":
+    unittest.main()
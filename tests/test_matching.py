@@ -69,8 +69,9 @@ class TestElementMatching(unittest.TestCase):
         self.assertIn("WARN", mock_stderr.getvalue())
         self.assertIn("matched label 'Duplicate'", mock_stderr.getvalue())
 
+    @patch('pippin.utils.geometry.get_screen_size', return_value=(375, 812))
     @patch('pippin.utils.ui.get_ui_tree')
-    def test_is_onscreen(self, mock_get_tree):
+    def test_is_onscreen(self, mock_get_tree, mock_size):
         from pippin.utils.ui import is_onscreen
         if hasattr(is_onscreen, "screen_w"):
             delattr(is_onscreen, "screen_w")
@@ -0,0 +1,115 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from pippin.utils import pool
+
+class TestPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.patches = [patch.object(pool, "POOL_DIR", root), patch.object(pool, "POOL_FILE", root / "pool.json")]
+        for p in self.patches:
+            p.start()
+        with pool.locked_pool() as state:
+            state.update({"golden": "GOLDEN", "device_set": None, "devices": [
+                {"udid": "A", "name": "pippin-pool-1", "port": 8101, "status": pool.FREE, "lease": None},
+                {"udid": "B", "name": "pippin-pool-2", "port": 8102, "status": pool.FREE, "lease": None},
+            ]})
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_lease_until_exhausted(self):
+        first = pool.lease_device(owner="t")
+        second = pool.lease_device(owner="t")
+        self.assertEqual((first["udid"], first["port"]), ("A", 8101))
+        self.assertEqual((second["udid"], second["port"]), ("B", 8102))
+        self.assertIsNone(pool.lease_device())
+
+    def test_return_with_reset_reclones(self):
+        pool.lease_device()
+        with patch("pippin.utils.pool.execute_command", return_value="NEW") as mock_exec, \
+                patch("pippin.utils.pool._bring_up") as mock_up:
+            device = pool.return_device("A")
+        self.assertEqual(device["udid"], "NEW")
+        self.assertIn(["xcrun", "simctl", "clone", "GOLDEN", "pippin-pool-1"], [c.args[0] for c in mock_exec.call_args_list])
+        mock_up.assert_called_once_with("NEW", 8101, None)
+        self.assertEqual(pool.find_lease("NEW")["port"], 8101)
+        self.assertEqual(pool.lease_device()["udid"], "NEW")
+
+    def test_return_without_reset(self):
+        pool.lease_device()
+        pool.return_device("A", reset=False)
+        self.assertEqual(pool.lease_device()["udid"], "A")
+        self.assertIsNone(pool.find_lease("Z"))
+
+    def test_create_locks_only_around_pool_file(self):
+        with patch("pippin.utils.pool.execute_command", return_value=""):
+            pool.destroy_pool()
+
+        def bring_up(udid, port, device_set):
+            # Another process can read and lease while clones boot
+            self.assertTrue(pool.load_pool()["creating"])
+            with self.assertRaises(ValueError):
+                pool.lease_device()
+
+        udids = iter(["C1", "C2"])
+        with patch("pippin.utils.pool.execute_command", side_effect=lambda cmd, **kw: next(udids) if "clone" in cmd else ""), \
+                patch("pippin.utils.pool._bring_up", side_effect=bring_up) as mock_up, \
+                patch("pippin.utils.executor.set_device_set") as mock_set:
+            state = pool.create_pool("GOLDEN", 2)
+        self.assertEqual([d["udid"] for d in state["devices"]], ["C1", "C2"])
+        self.assertNotIn("creating", pool.load_pool())
+        self.assertEqual(mock_up.call_count, 2)
+        mock_set.assert_not_called()
+
+    def test_failed_create_deletes_its_clones(self):
+        with patch("pippin.utils.pool.execute_command", return_value=""):
+            pool.destroy_pool()
+        udids = iter(["C1", "C2"])
+        with patch("pippin.utils.pool.execute_command", side_effect=lambda cmd, **kw: next(udids) if "clone" in cmd else "") as mock_exec, \
+                patch("pippin.utils.pool._bring_up", side_effect=RuntimeError("WDA did not start")):
+            with self.assertRaises(RuntimeError):
+                pool.create_pool("GOLDEN", 2)
+        commands = [c.args[0] for c in mock_exec.call_args_list]
+        self.assertIn(["xcrun", "simctl", "delete", "C1"], commands)
+        self.assertIn(["xcrun", "simctl", "delete", "C2"], commands)
+        self.assertEqual(pool.load_pool()["devices"], [])
+        self.assertNotIn("creating", pool.load_pool())
+
+    def test_failed_reset_removes_the_device(self):
+        pool.lease_device()
+        with patch("pippin.utils.pool.execute_command", return_value="NEW") as mock_exec, \
+                patch("pippin.utils.pool._bring_up", side_effect=RuntimeError("WDA did not start")):
+            with self.assertRaises(RuntimeError):
+                pool.return_device("A")
+        self.assertIn(["xcrun", "simctl", "delete", "NEW"], [c.args[0] for c in mock_exec.call_args_list])
+        self.assertEqual([d["udid"] for d in pool.load_pool()["devices"]], ["B"])
+
+    def test_reset_after_destroy(self):
+        pool.lease_device()
+
+        def bring_up(udid, port, device_set):
+            with patch("pippin.utils.pool.execute_command", return_value=""):
+                pool.destroy_pool()
+
+        with patch("pippin.utils.pool.execute_command", return_value="NEW") as mock_exec, \
+                patch("pippin.utils.pool._bring_up", side_effect=bring_up):
+            with self.assertRaises(ValueError):
+                pool.return_device("A")
+        self.assertIn(["xcrun", "simctl", "delete", "NEW"], [c.args[0] for c in mock_exec.call_args_list])
+
+    def test_bring_up_passes_device_set_per_command(self):
+        with patch("pippin.utils.pool.execute_command") as mock_exec, \
+                patch("pippin.utils.wda.start_wda", return_value=True) as mock_start, \
+                patch("pippin.utils.executor.set_device_set") as mock_set:
+            pool._bring_up("C1", 8101, "/pool-set")
+        self.assertEqual(mock_exec.call_args_list[0].args[0], ["xcrun", "simctl", "--set", "/pool-set", "boot", "C1"])
+        mock_start.assert_called_once_with("C1", port=8101, device_set="/pool-set")
+        mock_set.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from pippin.utils.sandbox import walk, fingerprints, diff_fingerprints
+
+class TestSandboxWalker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        os.makedirs(os.path.join(root, "a", "deep"))
+        for rel in ["top.json", "a/one.txt", "a/deep/two.json"]:
+            with open(os.path.join(root, rel), "w") as f:
+                f.write(rel)
+        self.root = root
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_walk_lists_sizes_in_order(self):
+        entries, truncated = walk(self.root)
+        self.assertFalse(truncated)
+        self.assertEqual([e["path"] for e in entries],
+                         ["a/", "a/deep/", "a/deep/two.json", "a/one.txt", "top.json"])
+        self.assertEqual(entries[-1]["size"], len("top.json"))
+
+    def test_walk_limits(self):
+        entries, _ = walk(self.root, max_depth=1)
+        self.assertNotIn("a/deep/two.json", [e["path"] for e in entries])
+
+        entries, truncated = walk(self.root, max_entries=2)
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(truncated)
+
+        entries, _ = walk(self.root, pattern="*.json")
+        self.assertEqual([e["path"] for e in entries], ["a/deep/two.json", "top.json"])
+
+    def test_diff_fingerprints(self):
+        before = fingerprints(walk(self.root)[0])
+        os.remove(os.path.join(self.root, "top.json"))
+        with open(os.path.join(self.root, "a", "one.txt"), "a") as f:
+            f.write("more")
+        with open(os.path.join(self.root, "new.bin"), "w") as f:
+            f.write("x")
+        changes = diff_fingerprints(before, fingerprints(walk(self.root)[0]))
+        self.assertEqual(changes, {"added": ["new.bin"], "removed": ["top.json"], "changed": ["a/one.txt"]})
+
+if __name__ == "__main__":
+    unittest.main()
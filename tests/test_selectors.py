@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+from pippin.utils.selectors import compile_selector, select, SelectorError
+from pippin.utils.ui import find_element, flatten_tree
+
+def node(role, label=None, identifier=None, children=None, visible=True):
+    n = {"role": role, "frame": {"x": 0, "y": 0, "width": 10, "height": 10}, "nodes": children or []}
+    if label:
+        n["AXLabel"] = label
+    if identifier:
+        n["AXIdentifier"] = identifier
+    if not visible:
+        n["visible"] = False
+    return n
+
+def build_tree():
+    return node("Window", children=[
+        node("NavigationBar", children=[node("Button", "Back", "nav.back"), node("StaticText", "Orders")]),
+        node("Table", children=[
+            node("Cell", "Order 17", children=[node("StaticText", "Total $5")]),
+            node("Cell", "Order 18", children=[node("Other", children=[node("StaticText", "Total $9")])]),
+            node("Button", "Back"),
+        ]),
+    ])
+
+class TestSelectors(unittest.TestCase):
+    def setUp(self):
+        self.tree = build_tree()
+
+    def labels(self, selector):
+        return [n.get("AXLabel") for n in select(self.tree, selector)]
+
+    def test_role_and_id(self):
+        self.assertEqual(self.labels("sel:Button#nav.back"), ["Back"])
+        self.assertEqual(self.labels("sel:button"), ["Back", "Back"])
+
+    def test_descendant_and_child(self):
+        self.assertEqual(len(select(self.tree, "sel:NavigationBar Button")), 1)
+        self.assertEqual(self.labels("sel:Cell StaticText"), ["Total $5", "Total $9"])
+        self.assertEqual(self.labels("sel:Cell > StaticText"), ["Total $5"])
+        self.assertEqual(self.labels("sel:Table > Cell > * > StaticText"), ["Total $9"])
+
+    def test_label_operators(self):
+        self.assertEqual(self.labels("sel:Cell[label=order 18]"), ["Order 18"])
+        self.assertEqual(self.labels("sel:*[label*=total]"), ["Total $5", "Total $9"])
+        self.assertEqual(self.labels("sel:*[label^='Order 1']"), ["Order 17", "Order 18"])
+        self.assertEqual(self.labels(r"sel:Cell[label=~\d7$]"), ["Order 17"])
+
+    def test_nth(self):
+        self.assertEqual(self.labels("sel:Cell:nth(1)"), ["Order 18"])
+        self.assertEqual(self.labels("sel:Cell:nth(-1)"), ["Order 18"])
+        self.assertEqual(self.labels("sel:Cell:nth(5)"), [])
+
+    def test_compiled_once(self):
+        self.assertIs(compile_selector("sel:Table Cell"), compile_selector("sel:Table Cell"))
+
+    def test_errors(self):
+        for bad in ("sel:", "sel:Button[", "sel:[color=red]", "sel:Cell[label=~(]", "sel:Button,Cell"):
+            with self.assertRaises(SelectorError):
+                compile_selector(bad)
+
+    def test_find_element_with_selector(self):
+        flat = flatten_tree([self.tree])
+        found = find_element("sel:Table Button[label=Back]", silent=True, elements=flat)
+        self.assertIs(found, self.tree["nodes"][1]["nodes"][2])
+
+    def test_find_element_skips_offscreen(self):
+        self.tree["nodes"][1]["nodes"][0]["visible"] = False
+        flat = flatten_tree([self.tree])
+        self.assertEqual(find_element("sel:Cell", silent=True, elements=flat)["AXLabel"], "Order 18")
+
+    @patch("pippin.utils.ui.get_ui_tree_hierarchical")
+    def test_inspect_query_selector(self, mock_tree):
+        import json
+        import sys
+        from io import StringIO
+        from pippin.commands import vision
+        mock_tree.return_value = [self.tree]
+        captured = StringIO()
+        sys.stdout = captured
+        try:
+            with patch("pippin.commands.vision.save_handles"):
+                vision.inspect_cmd(interactive_only=False, query="sel:NavigationBar Button")
+        finally:
+            sys.stdout = sys.__stdout__
+        text = captured.getvalue()
+        self.assertIn("nav.back", text)
+        self.assertNotIn("Order 17", text)
+
+if __name__ == "__main__":
+    unittest.main()
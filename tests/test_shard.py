@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from pippin.utils import shard
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for name, body in [("a.pippin", "# login\npippin launch com.example --clean\ntap 'Log in'\n"),
+                           ("b.pippin", "assert Welcome visible\n"),
+                           ("notes.md", "ignored")]:
+            with open(os.path.join(self.tmp.name, name), "w") as f:
+                f.write(body)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_script(self):
+        steps = shard.parse_script(os.path.join(self.tmp.name, "a.pippin"))
+        self.assertEqual(steps, [(2, ["launch", "com.example", "--clean"]), (3, ["tap", "Log in"])])
+
+    def test_longest_first_order(self):
+        scenarios = shard.load_scenarios(self.tmp.name)
+        self.assertEqual([os.path.basename(p) for p in scenarios], ["a.pippin", "b.pippin"])
+        ordered = shard.order_longest_first(scenarios, {"a.pippin": 1.0, "b.pippin": 9.0})
+        self.assertEqual([os.path.basename(p) for p in ordered], ["b.pippin", "a.pippin"])
+
+    def test_run_shards_uses_every_device(self):
+        def fake_run(path, udid, step_timeout):
+            return {"scenario": os.path.basename(path), "device": udid,
+                    "status": "failed" if path.endswith("b.pippin") else "passed", "duration": 1.0}
+
+        streamed = []
+        with patch("pippin.utils.shard.run_scenario", side_effect=fake_run):
+            summary = shard.run_shards(shard.load_scenarios(self.tmp.name), ["D1", "D2"], on_result=streamed.append)
+        self.assertEqual(len(streamed), 2)
+        self.assertEqual(summary["passed"], 1)
+        self.assertEqual(summary["failed"], ["b.pippin"])
+        self.assertEqual(set(summary["utilization"]), {"D1", "D2"})
+        self.assertEqual(summary["slowest"][0]["duration"], 1.0)
+
+    def test_malformed_script_fails_the_run(self):
+        with open(os.path.join(self.tmp.name, "c.pippin"), "w") as f:
+            f.write("tap 'Log in\n")
+        with open(os.path.join(self.tmp.name, "d.sh"), "w") as f:
+            f.write("echo not a scenario\n")
+        scenarios = shard.load_scenarios(self.tmp.name)
+        self.assertNotIn("d.sh", [os.path.basename(p) for p in scenarios])
+        with patch("pippin.utils.shard.subprocess.run") as mock_run:
+            mock_run.return_value.returncode = 0
+            summary = shard.run_shards([p for p in scenarios if p.endswith("c.pippin")], ["D1"])
+        self.assertEqual(summary["scenarios"], 1)
+        self.assertEqual(summary["failed"], ["c.pippin"])
+        mock_run.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
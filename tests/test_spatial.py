@@ -0,0 +1,48 @@
+import unittest
+from pippin.utils.spatial import SpatialIndex
+
+def _frame(x, y, w, h):
+    return {"x": x, "y": y, "width": w, "height": h}
+
+def _screen(with_alert=False):
+    content = [
+        {"role": "NavigationBar", "frame": _frame(0, 0, 375, 100)},
+        {"role": "Cell", "AXLabel": "Row", "frame": _frame(0, 80, 375, 44),
+         "nodes": [{"role": "StaticText", "AXLabel": "Row", "frame": _frame(16, 90, 100, 20)}]},
+        {"role": "Button", "AXLabel": "Save", "frame": _frame(100, 400, 175, 44)},
+    ]
+    if with_alert:
+        content.append({"role": "Alert", "AXLabel": "Error", "frame": _frame(50, 300, 275, 200)})
+    return [{"role": "Window", "frame": _frame(0, 0, 375, 812), "nodes": content}]
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_point_query_topmost_first(self):
+        index = SpatialIndex(_screen())
+        hits = index.at(20, 95)
+        self.assertEqual([h["role"] for h in hits], ["StaticText", "Cell", "NavigationBar", "Window"])
+        self.assertEqual(index.at(1000, 1000), [])
+
+    def test_rect_query(self):
+        index = SpatialIndex(_screen())
+        roles = [el["role"] for el in index.in_rect((0, 395, 375, 10))]
+        self.assertEqual(roles, ["Button", "Window"])
+
+    def test_occlusion(self):
+        tree = _screen(with_alert=True)
+        index = SpatialIndex(tree)
+        button = tree[0]["nodes"][2]
+        self.assertEqual(index.occluder(button)["role"], "Alert")
+        # A cell's own label is not an occluder, and nothing covers the cell's center
+        cell = tree[0]["nodes"][1]
+        self.assertIsNone(index.occluder(cell))
+        # The bar is drawn before the cell, so it does not cover the cell's top edge
+        self.assertIsNone(index.occluder(cell, (200, 85)))
+
+    def test_works_on_flat_lists(self):
+        from pippin.utils.ui import flatten_tree
+        flat = flatten_tree(_screen(with_alert=True))
+        index = SpatialIndex(flat)
+        self.assertEqual(index.occluder(flat[4])["role"], "Alert")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
 from unittest.mock import patch, mock_open
 import os
-from pippin.utils.state import get_last_bundle_id, set_last_bundle_id, STATE_FILE
+import tempfile
+from pippin.utils.state import get_last_bundle_id, set_last_bundle_id, STATE_FILE, get_device_state, set_device_state
 
 class TestState(unittest.TestCase):
     @patch("builtins.open", new_callable=mock_open, read_data="com.example.app")
@@ -19,5 +20,28 @@ class TestState(unittest.TestCase):
         mock_file.assert_called_with(STATE_FILE, "w")
         mock_file().write.assert_called_with("com.test.app")
 
+    def test_last_bundle_id_per_selected_device(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {udid: os.path.join(tmp, f"{udid}.json") for udid in ("A", "B")}
+            with patch("pippin.utils.state._device_state_file", side_effect=paths.get), \
+                 patch("pippin.utils.state.STATE_FILE", os.path.join(tmp, "last")):
+                for udid, bundle_id in (("A", "com.a"), ("B", "com.b")):
+                    with patch("pippin.utils.device.selected_udid", return_value=udid):
+                        set_last_bundle_id(bundle_id)
+                with patch("pippin.utils.device.selected_udid", return_value="A"):
+                    self.assertEqual(get_last_bundle_id(), "com.a")
+                with patch("pippin.utils.device.selected_udid", return_value=None):
+                    self.assertEqual(get_last_bundle_id(), "com.b")
+
+    def test_device_state_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.json")
+            with patch("pippin.utils.state._device_state_file", return_value=path):
+                self.assertIsNone(get_device_state("UDID", "page"))
+                set_device_state("UDID", "page", 2)
+                self.assertEqual(get_device_state("UDID", "page"), 2)
+                set_device_state("UDID", "page", None)
+                self.assertEqual(get_device_state("UDID", "page", 0), 0)
+
 if __name__ == "__main__":
     unittest.main()
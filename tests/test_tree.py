@@ -0,0 +1,74 @@
+import sys
+import unittest
+import xml.etree.ElementTree as ET
+from pippin.utils.tree import (
+    walk, SimplifyVisitor, FlattenVisitor, GeometryVisitor, ScreenInfoVisitor, ScreenIdVisitor, DigestVisitor
+)
+from pippin.utils.wda import _xml_to_element
+from pippin.utils.ui import flatten_tree
+
+def _tree():
+    return [{
+        "role": "Window", "AXIdentifier": "Home", "frame": {"x": 0, "y": 0, "width": 390, "height": 844},
+        "nodes": [
+            {"role": "NavigationBar", "AXIdentifier": "Settings", "nodes": [
+                {"role": "Button", "AXLabel": "Back"},
+            ]},
+            {"role": "Other", "nodes": [
+                {"role": "Button", "AXIdentifier": "save", "AXLabel": "Save"},
+            ]},
+            {"role": "StaticText", "AXLabel": "Footer"},
+        ],
+    }]
+
+class TestTreeWalk(unittest.TestCase):
+    def test_all_analyzers_in_one_pass(self):
+        geometry, screen, info = GeometryVisitor(), ScreenIdVisitor(), ScreenInfoVisitor()
+        flattener, simplifier = FlattenVisitor(), SimplifyVisitor(query="save")
+        walk(_tree(), [geometry, screen, info, flattener, simplifier])
+
+        self.assertEqual(geometry.size(), (390, 844))
+        self.assertEqual(screen.screen_id(), "Home")
+        self.assertEqual(info.info["title"], "Settings")
+        self.assertEqual(info.info["breadcrumb"], ["Back"])
+        self.assertEqual(len(flattener.nodes), 6)
+        # The wrapper collapses into its only child and the query keeps just that branch
+        window = simplifier.results[0]
+        self.assertEqual([c.get("id") for c in window["children"]], ["save"])
+
+    def test_flat_list_walked_in_order(self):
+        flat = flatten_tree(_tree())
+        self.assertEqual(flatten_tree(flat), flat)
+
+    def test_deep_tree_does_not_recurse(self):
+        leaf = {"role": "Button", "AXLabel": "Deep"}
+        node = leaf
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = {"role": "Other", "nodes": [node]}
+        simplifier = SimplifyVisitor()
+        walk([node], [simplifier])
+        self.assertEqual(simplifier.results[0]["label"], "Deep")
+        self.assertEqual(len(flatten_tree([node])), sys.getrecursionlimit() * 2 + 1)
+
+class TestSnapshotDigest(unittest.TestCase):
+    XML = """
+    <AppiumAUT>
+        <XCUIElementTypeWindow type="XCUIElementTypeWindow" x="0" y="0" width="375" height="812">
+            <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" label="{title}" x="0" y="100" width="375" height="20" />
+        </XCUIElementTypeWindow>
+    </AppiumAUT>
+    """
+
+    def _digest(self, title):
+        tree = _xml_to_element(ET.fromstring(self.XML.format(title=title)))
+        self.assertNotIn("digest", tree)
+        visitor = DigestVisitor()
+        walk([tree], [visitor])
+        return visitor.digest
+
+    def test_digest_tracks_content(self):
+        self.assertEqual(self._digest("One"), self._digest("One"))
+        self.assertNotEqual(self._digest("One"), self._digest("Two"))
+
+if __name__ == '__main__':
+    unittest.main()